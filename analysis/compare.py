@@ -0,0 +1,241 @@
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import ingest_results
+from analysis.rtf_summary import DEFAULT_METADATA, load_durations, run_metrics
+
+UNIT_KEYS = ["engine", "device", "dataset", "utterance"]
+# All metrics are lower-is-better
+METRICS = ["time_sec", "rtf", "ram_peak_mb", "wer"]
+
+
+def load_units(store_dir, durations=None, wer_csv=None):
+    """
+    One row per engine/device/dataset/utterance with the iteration means of
+    latency, RTF and peak RAM, plus the utterance WER when a per-utterance
+    WER CSV (from score_transcriptions.py) is given.
+    """
+    runs = run_metrics(store_dir, durations)
+    metrics = [m for m in METRICS if m in runs]
+    units = runs.groupby(UNIT_KEYS, observed=True)[metrics].mean().reset_index()
+    for key in UNIT_KEYS:
+        units[key] = units[key].astype(str)
+
+    if wer_csv is not None:
+        wer = pd.read_csv(wer_csv, usecols=UNIT_KEYS + ["wer"], dtype=str)
+        wer["wer"] = wer["wer"].astype(float)
+        units = units.merge(wer, on=UNIT_KEYS, how="outer")
+    return units
+
+
+def _group_layout(groups):
+    """Sort order, group labels, start offsets and sizes of a label array"""
+    order = np.argsort(groups, kind="stable")
+    labels, starts, counts = np.unique(
+        groups[order], return_index=True, return_counts=True
+    )
+    return order, labels, starts, counts
+
+
+def bootstrap_means(
+    values,
+    groups,
+    n_resamples=10_000,
+    batch_size=1000,
+    confidence=0.95,
+    random_state=42,
+):
+    """
+    Percentile bootstrap CIs of the mean of `values` within every group.
+
+    All groups are resampled together: each batch draws a (batch x N) matrix
+    of within-group indices and reduces it with np.add.reduceat, so the
+    Python loop only runs n_resamples / batch_size times.
+    """
+    values, groups = np.asarray(values, dtype=float), np.asarray(groups)
+    order, labels, starts, counts = _group_layout(groups)
+    values = values[order]
+    pos_start = np.repeat(starts, counts)
+    pos_count = np.repeat(counts, counts)
+
+    rng = np.random.default_rng(random_state)
+    means = np.empty((n_resamples, len(labels)))
+    for first in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - first)
+        u = rng.random((size, len(values)))
+        idx = pos_start + (u * pos_count).astype(np.int64)
+        means[first : first + size] = (
+            np.add.reduceat(values[idx], starts, axis=1) / counts
+        )
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha], axis=0)
+    point = np.add.reduceat(values, starts) / counts
+    return pd.DataFrame(
+        {"n": counts, "mean": point, "ci_low": low, "ci_high": high},
+        index=pd.Index(labels, name="group"),
+    )
+
+
+def sign_flip_pvalues(
+    diffs, groups, n_resamples=10_000, batch_size=1000, random_state=42
+):
+    """
+    Two-sided paired randomization test per group: the observed mean
+    difference is compared with means after random sign flips, which is
+    the null distribution when neither side of the pair is better.
+    """
+    diffs, groups = np.asarray(diffs, dtype=float), np.asarray(groups)
+    order, labels, starts, counts = _group_layout(groups)
+    diffs = diffs[order]
+    observed = np.abs(np.add.reduceat(diffs, starts) / counts)
+
+    rng = np.random.default_rng(random_state)
+    extreme = np.zeros(len(labels))
+    for first in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - first)
+        signs = rng.integers(0, 2, (size, len(diffs))) * 2 - 1
+        flipped = np.abs(np.add.reduceat(signs * diffs, starts, axis=1) / counts)
+        extreme += (flipped >= observed - 1e-12).sum(axis=0)
+    # Add-one so that p is never exactly zero
+    return pd.Series((extreme + 1) / (n_resamples + 1), index=labels, name="p_value")
+
+
+def paired_differences(units, by, metric):
+    """
+    Differences of `metric` for every pair of `by` levels (e.g. two
+    engines), matched on all other unit keys (same device, dataset and
+    utterance for an engine comparison).
+    """
+    match_keys = [k for k in UNIT_KEYS if k != by]
+    wide = units.pivot_table(index=match_keys, columns=by, values=metric)
+
+    frames = []
+    for a, b in itertools.combinations(sorted(wide.columns), 2):
+        diff = (wide[a] - wide[b]).dropna()
+        frames.append(pd.DataFrame({"pair": f"{a} vs {b}", "diff": diff.to_numpy()}))
+    if not frames:
+        return pd.DataFrame(columns=["pair", "diff"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def compare(
+    units,
+    by="engine",
+    metrics=METRICS,
+    n_resamples=10_000,
+    batch_size=1000,
+    random_state=42,
+):
+    """
+    Returns (ranking, pairwise) tables for the levels of `by`.
+
+    ranking: per level and metric, the mean over utterances with its
+    bootstrap CI and the rank (1 = lowest). pairwise: for every pair of
+    levels, the mean paired difference with CI and sign-flip p-value.
+    """
+    resampling = dict(
+        n_resamples=n_resamples, batch_size=batch_size, random_state=random_state
+    )
+    ranking, pairwise = [], []
+    for metric in metrics:
+        if metric not in units:
+            continue
+        valid = units.dropna(subset=[metric])
+        if valid.empty:
+            continue
+
+        levels = bootstrap_means(valid[metric], valid[by], **resampling)
+        levels["rank"] = levels["mean"].rank(method="min").astype(int)
+        levels.insert(0, "metric", metric)
+        ranking.append(levels.rename_axis(by).reset_index())
+
+        diffs = paired_differences(valid, by, metric)
+        if diffs.empty:
+            continue
+        pairs = bootstrap_means(diffs["diff"], diffs["pair"], **resampling)
+        pairs = pairs.join(
+            sign_flip_pvalues(diffs["diff"], diffs["pair"], **resampling)
+        )
+        pairs.insert(0, "metric", metric)
+        pairwise.append(pairs.rename_axis("pair").reset_index())
+
+    stats = ["n", "mean", "ci_low", "ci_high"]
+    ranking = (
+        pd.concat(ranking, ignore_index=True)
+        if ranking
+        else pd.DataFrame(columns=[by, "metric"] + stats + ["rank"])
+    )
+    pairwise = (
+        pd.concat(pairwise, ignore_index=True)
+        if pairwise
+        else pd.DataFrame(columns=["pair", "metric"] + stats + ["p_value"])
+    )
+    return ranking.sort_values(["metric", "rank"], ignore_index=True), pairwise
+
+
+def _parse_filters(values):
+    filters = {}
+    for value in values or []:
+        key, _, level = value.partition("=")
+        if key not in UNIT_KEYS or not level:
+            raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {value!r}")
+        filters.setdefault(key, []).append(level)
+    return filters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bootstrap CIs and paired tests between engines or devices"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument(
+        "--metadata", nargs="+", default=DEFAULT_METADATA, help="CSVs with duration_sec"
+    )
+    parser.add_argument(
+        "--wer",
+        default=os.path.join("wer_results", "wer_per_utterance.csv"),
+        help="Per-utterance WER CSV (skipped if missing)",
+    )
+    parser.add_argument(
+        "--by", choices=["engine", "device"], default="engine", help="Compared levels"
+    )
+    parser.add_argument(
+        "--filter",
+        nargs="+",
+        help="Restrict units, e.g. dataset=commonvoice device=s23",
+    )
+    parser.add_argument("--resamples", type=int, default=10_000, help="Resamples")
+    parser.add_argument("--output", default="comparison", help="Output folder")
+    args = parser.parse_args()
+
+    ingest_results(args.results, args.store)
+    wer_csv = args.wer if os.path.exists(args.wer) else None
+    units = load_units(args.store, load_durations(args.metadata), wer_csv)
+    for key, levels in _parse_filters(args.filter).items():
+        units = units[units[key].isin(levels)]
+    if units.empty:
+        print("⚠️ No runs match the filters, nothing to compare")
+        sys.exit(1)
+
+    ranking, pairwise = compare(units, by=args.by, n_resamples=args.resamples)
+    os.makedirs(args.output, exist_ok=True)
+    ranking.to_csv(os.path.join(args.output, f"ranking_by_{args.by}.csv"), index=False)
+    pairwise.to_csv(
+        os.path.join(args.output, f"pairwise_by_{args.by}.csv"), index=False
+    )
+
+    print(f"\n=== Ranking by {args.by} (mean, 95% CI) ===")
+    print(ranking.round(4).to_string(index=False))
+    print("\n=== Paired differences ===")
+    print(pairwise.round(4).to_string(index=False))
+    print(f"\n✅ Saved comparison to {os.path.abspath(args.output)}")
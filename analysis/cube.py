@@ -0,0 +1,346 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import ingest_results, load_manifest
+from analysis.rtf_summary import DEFAULT_METADATA, run_metrics
+from common.metadata_store import load_metadata
+from common.subset_selection import DURATION_BINS, DURATION_LABELS
+
+CUBE_FILE = "analysis_cube.parquet"
+ALL = "ALL"
+UNKNOWN = "unknown"
+RUN_DIMENSIONS = ["engine", "device", "dataset"]
+# Speaker/clip strata; `gender` holds LibriSpeech `sex` (F/M) or the
+# Common Voice `gender` value
+CLIP_DIMENSIONS = ["gender", "age", "duration_cat"]
+DIMENSIONS = RUN_DIMENSIONS + CLIP_DIMENSIONS
+SUM_MEASURES = [
+    "runs",
+    "time_sec",
+    "cpu_seconds",
+    "audio_sec",
+    # time and CPU of the runs whose clip duration is known, for the ratios
+    "time_sec_timed",
+    "cpu_seconds_timed",
+    "ram_peak_mb_sum",
+    "utterances_scored",
+    "ref_words",
+    "word_errors",
+    "ref_chars",
+    "char_errors",
+]
+MAX_MEASURES = ["ram_peak_mb_max"]
+MEASURES = SUM_MEASURES + MAX_MEASURES
+AGGREGATIONS = {**{m: "sum" for m in SUM_MEASURES}, **{m: "max" for m in MAX_MEASURES}}
+
+
+def load_attributes(metadata_paths=DEFAULT_METADATA):
+    """utterance id -> gender/age/duration_cat/duration_sec from subset or
+    metadata files; the first file listing an utterance wins"""
+    frames = []
+    for path in metadata_paths:
+        if not os.path.exists(path):
+            print(f"⚠️ Missing metadata file: {path}")
+            continue
+        df = load_metadata(path)
+        attrs = pd.DataFrame(
+            {
+                "utterance": df["filename"].astype(str).str.rsplit(".", n=1).str[0],
+                "duration_sec": df["duration_sec"].astype(float),
+            }
+        )
+        gender = df["gender"] if "gender" in df else df.get("sex")
+        attrs["gender"] = UNKNOWN if gender is None else gender.astype(str).to_numpy()
+        attrs["age"] = df["age"].astype(str).to_numpy() if "age" in df else UNKNOWN
+        attrs["duration_cat"] = pd.cut(
+            attrs["duration_sec"], bins=DURATION_BINS, labels=DURATION_LABELS
+        ).astype(str)
+        frames.append(attrs)
+    if not frames:
+        return pd.DataFrame(columns=["duration_sec"] + CLIP_DIMENSIONS)
+
+    attrs = pd.concat(frames, ignore_index=True).drop_duplicates("utterance")
+    attrs[CLIP_DIMENSIONS] = (
+        attrs[CLIP_DIMENSIONS].replace({"": UNKNOWN, "nan": UNKNOWN}).fillna(UNKNOWN)
+    )
+    return attrs.set_index("utterance")
+
+
+def _with_attributes(df, attributes):
+    df = df.assign(utterance=df["utterance"].astype(str))
+    df = df.join(attributes, on="utterance")
+    df[CLIP_DIMENSIONS] = df[CLIP_DIMENSIONS].fillna(UNKNOWN)
+    for dim in RUN_DIMENSIONS:
+        df[dim] = df[dim].astype(str)
+    return df
+
+
+def leaf_facts(store_dir, attributes, files=None, wer=None):
+    """
+    Finest-grained cells (one per combination of all DIMENSIONS) from the
+    ingested runs of `files` (default: all) and the per-utterance WER rows
+    in `wer` (a DataFrame like wer_per_utterance.csv, or None).
+    """
+    parts = []
+    if files is None or len(files):
+        runs = run_metrics(store_dir, attributes["duration_sec"], files=files)
+        runs = _with_attributes(runs.drop(columns=["duration_sec"]), attributes)
+        runs["runs"] = 1
+        timed = runs["duration_sec"].notna()
+        runs["audio_sec"] = runs["duration_sec"].fillna(0.0)
+        runs["time_sec_timed"] = runs["time_sec"].where(timed, 0.0)
+        runs["cpu_seconds_timed"] = runs["cpu_seconds"].where(timed, 0.0)
+        runs["ram_peak_mb_sum"] = runs["ram_peak_mb"]
+        runs["ram_peak_mb_max"] = runs["ram_peak_mb"]
+        parts.append(runs)
+
+    if wer is not None and len(wer):
+        scored = _with_attributes(wer, attributes)
+        scored["utterances_scored"] = 1
+        scored["word_errors"] = scored["sub"] + scored["ins"] + scored["del"]
+        scored["char_errors"] = (
+            scored["char_sub"] + scored["char_ins"] + scored["char_del"]
+        )
+        parts.append(scored)
+
+    if not parts:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+    facts = pd.concat(parts, ignore_index=True)
+    for measure in MEASURES:
+        if measure not in facts:
+            facts[measure] = 0.0
+    facts[SUM_MEASURES] = facts[SUM_MEASURES].fillna(0)
+    return facts.groupby(DIMENSIONS).agg(AGGREGATIONS).reset_index()
+
+
+def roll_up(leaves):
+    """
+    Aggregates leaf cells over every subset of DIMENSIONS (2^6 group-bys of
+    the already small leaf table). Rolled-up dimensions hold ALL, so a cube
+    row is addressed by a value (or ALL) for every dimension.
+    """
+    cuboids = []
+    for n in range(len(DIMENSIONS) + 1):
+        for kept in itertools.combinations(DIMENSIONS, n):
+            if kept:
+                cuboid = leaves.groupby(list(kept)).agg(AGGREGATIONS).reset_index()
+            else:
+                cuboid = leaves[MEASURES].agg(AGGREGATIONS).to_frame().T
+            for dim in DIMENSIONS:
+                if dim not in kept:
+                    cuboid[dim] = ALL
+            cuboids.append(cuboid[DIMENSIONS + MEASURES])
+    return pd.concat(cuboids, ignore_index=True)
+
+
+def merge_cubes(cube, delta):
+    """Adds the cells of `delta` to `cube`: sums add up, maxima take the max"""
+    merged = pd.concat([cube, delta], ignore_index=True)
+    for dim in DIMENSIONS:
+        merged[dim] = merged[dim].astype(str)
+    return merged.groupby(DIMENSIONS).agg(AGGREGATIONS).reset_index()
+
+
+def save_cube(cube, meta, path=CUBE_FILE):
+    cube = cube.copy()
+    for dim in DIMENSIONS:
+        cube[dim] = cube[dim].astype("category")
+    cube.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    with open(_meta_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+    os.replace(_meta_path(path) + ".tmp", _meta_path(path))
+
+
+def load_cube(path=CUBE_FILE):
+    """Returns (cube, meta); meta holds the [size, mtime_ns] stamps of the
+    result files and of the WER CSV the cube was built from"""
+    if not os.path.exists(path):
+        return None, {"files": {}, "wer": None}
+    with open(_meta_path(path), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return pd.read_parquet(path), meta
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def update_cube(
+    store_dir,
+    path=CUBE_FILE,
+    wer_csv=None,
+    metadata=DEFAULT_METADATA,
+    rebuild=False,
+):
+    """
+    Brings the cube in line with the ingested store and the WER CSV.
+
+    Result files not yet in the cube are aggregated on their own and merged
+    into it, and so are the WER rows the first time a WER CSV is given. A
+    full rebuild happens with `rebuild`, when there is no cube yet, or when
+    an ingested file or the WER CSV changed since it was counted (old cells
+    cannot be subtracted because of the maxima). Returns the cube.
+    """
+    cube, meta = load_cube(path)
+    manifest = load_manifest(store_dir)
+    wer_stamp = None if wer_csv is None else _stamp(wer_csv)
+
+    stale = [f for f, stamp in meta["files"].items() if manifest.get(f) != stamp]
+    wer_changed = meta.get("wer") is not None and wer_stamp not in (None, meta["wer"])
+    if "wer" not in meta or wer_changed:
+        stale.append(wer_csv)
+    if stale and not rebuild and cube is not None:
+        print(
+            f"⚠️ {len(stale)} input files changed since they were counted, rebuilding"
+        )
+    if cube is None or rebuild or stale:
+        meta = {"files": {}, "wer": None}
+        cube = None
+
+    new_files = sorted(set(manifest) - set(meta["files"]))
+    new_wer = None
+    if wer_stamp is not None and meta["wer"] is None:
+        new_wer = pd.read_csv(wer_csv, dtype={"utterance": str, "device": str})
+        meta["wer"] = wer_stamp
+
+    if not new_files and (new_wer is None or new_wer.empty):
+        print("Cube is up to date")
+        return cube
+
+    attributes = load_attributes(metadata)
+    files = None if cube is None else new_files
+    delta = roll_up(leaf_facts(store_dir, attributes, files=files, wer=new_wer))
+    cube = delta if cube is None else merge_cubes(cube, delta)
+    meta["files"].update({f: manifest[f] for f in new_files})
+    save_cube(cube, meta, path)
+    n_wer = 0 if new_wer is None else len(new_wer)
+    print(
+        f"✅ Added {len(new_files)} result files and {n_wer} scored utterances, "
+        f"{len(cube)} cells in {path}"
+    )
+    return cube
+
+
+def query(cube, by=(), **filters):
+    """
+    Answers a slice or roll-up from the cube without touching the runs.
+
+    `by` lists the dimensions to break down by; `filters` fix dimensions to
+    a value or a list of values (e.g. device="s23", age=["twenties",
+    "thirties"]). All other dimensions are rolled up. Returns one row per
+    `by` combination with the aggregates and the derived WER, CER, RTF,
+    CPU-seconds per audio second and mean peak RAM.
+    """
+    by = list(by)
+    unknown = set(by) | set(filters)
+    unknown -= set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+    mask = pd.Series(True, index=cube.index)
+    for dim in DIMENSIONS:
+        column = cube[dim]
+        if dim in filters:
+            values = filters[dim]
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            mask &= column.isin([str(v) for v in values])
+        elif dim in by:
+            mask &= column != ALL
+        else:
+            mask &= column == ALL
+    cells = cube[mask]
+
+    if by:
+        result = cells.groupby(by, observed=True).agg(AGGREGATIONS).reset_index()
+    else:
+        result = cells[MEASURES].agg(AGGREGATIONS).to_frame().T
+
+    runs = result["runs"].where(result["runs"] > 0)
+    result["wer"] = result["word_errors"] / result["ref_words"].where(
+        result["ref_words"] > 0
+    )
+    result["cer"] = result["char_errors"] / result["ref_chars"].where(
+        result["ref_chars"] > 0
+    )
+    audio = result["audio_sec"].where(result["audio_sec"] > 0)
+    result["rtf"] = result["time_sec_timed"] / audio
+    result["cpu_per_audio_sec"] = result["cpu_seconds_timed"] / audio
+    result["ram_peak_mb_mean"] = result["ram_peak_mb_sum"] / runs
+    return result
+
+
+def _parse_filters(values):
+    filters = {}
+    for value in values or []:
+        key, _, level = value.partition("=")
+        if key not in DIMENSIONS or not level:
+            raise argparse.ArgumentTypeError(f"Expected DIMENSION=VALUE, got {value!r}")
+        filters.setdefault(key, []).append(level)
+    return filters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pre-aggregated accuracy/resource cube over engine, device, "
+        "dataset, gender, age and duration category"
+    )
+    parser.add_argument("command", choices=["update", "query"])
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument(
+        "--metadata", nargs="+", default=DEFAULT_METADATA, help="Subset/metadata files"
+    )
+    parser.add_argument(
+        "--wer",
+        default=os.path.join("wer_results", "wer_per_utterance.csv"),
+        help="Per-utterance WER CSV (skipped if missing)",
+    )
+    parser.add_argument("--cube", default=CUBE_FILE, help="Cube file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild from scratch")
+    parser.add_argument(
+        "--by", nargs="*", choices=DIMENSIONS, default=[], help="Breakdown dimensions"
+    )
+    parser.add_argument(
+        "--filter", nargs="+", help="Slice, e.g. dataset=commonvoice age=twenties"
+    )
+    args = parser.parse_args()
+
+    if args.command == "update":
+        ingest_results(args.results, args.store)
+        wer_csv = args.wer if os.path.exists(args.wer) else None
+        update_cube(args.store, args.cube, wer_csv, args.metadata, args.rebuild)
+        sys.exit(0)
+
+    cube, _ = load_cube(args.cube)
+    if cube is None:
+        print(f"⚠️ No cube in {args.cube}, run the update command first")
+        sys.exit(1)
+    start = time.perf_counter()
+    result = query(cube, by=args.by, **_parse_filters(args.filter))
+    elapsed = time.perf_counter() - start
+    columns = args.by + [
+        "runs",
+        "utterances_scored",
+        "wer",
+        "cer",
+        "rtf",
+        "cpu_per_audio_sec",
+        "ram_peak_mb_mean",
+        "ram_peak_mb_max",
+    ]
+    print(result[columns].round(4).to_string(index=False))
+    print(f"\n{len(result)} rows in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import ingest_results, load_table
+from analysis.rtf_summary import (
+    DEFAULT_METADATA,
+    GROUP_KEYS,
+    RUN_KEYS,
+    load_durations,
+    sample_intervals,
+)
+
+DEFAULT_PROFILES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "device_profiles.csv"
+)
+
+
+def load_device_profiles(path=DEFAULT_PROFILES):
+    """
+    Reads the device profile table (device, cluster, cores, relative_power)
+    and expands core ranges like "3-6" into one row per core.
+
+    relative_power is the full-load power of one core of the cluster relative
+    to a little core, so energy comes out in little-core-seconds.
+    """
+    profiles = pd.read_csv(path, dtype={"cores": str})
+    bounds = profiles["cores"].str.split("-", expand=True)
+    first = bounds[0].astype(int)
+    last = bounds[1].fillna(bounds[0]).astype(int) if 1 in bounds else first
+    profiles["core"] = [list(range(a, b + 1)) for a, b in zip(first, last)]
+    profiles = profiles.explode("core").astype({"core": "int16"})
+    return profiles[["device", "core", "cluster", "relative_power"]]
+
+
+def cluster_usage(store_dir, profiles):
+    """
+    Busy core-seconds and estimated energy per run and cluster.
+
+    Each per-core reading is weighted by the sample interval, mapped to its
+    cluster and scaled by the cluster's relative power, all in one merge and
+    groupby over the cores table.
+    """
+    samples = load_table(
+        store_dir, "samples", columns=["file", "iteration", "sample", "time_ms"]
+    )
+    samples["interval_sec"] = sample_intervals(samples)
+    intervals = samples.set_index(["file", "iteration", "sample"])["interval_sec"]
+
+    cores = load_table(store_dir, "cores")
+    cores = cores.join(intervals, on=["file", "iteration", "sample"])
+    cores = cores.merge(profiles, on=["device", "core"], how="left")
+    unknown = cores.loc[cores["cluster"].isna(), "device"].unique()
+    if len(unknown):
+        print(f"⚠️ No core profile for devices: {', '.join(map(str, unknown))}")
+        cores = cores.dropna(subset=["cluster"])
+
+    cores["busy_sec"] = cores["cpu"] / 100 * cores["interval_sec"]
+    cores["energy"] = cores["busy_sec"] * cores["relative_power"]
+    return (
+        cores.groupby(RUN_KEYS + ["cluster"], observed=True)[["busy_sec", "energy"]]
+        .sum()
+        .reset_index()
+    )
+
+
+def energy_per_run(usage, durations=None):
+    """
+    Per-run cluster residency (share of busy core-time on each cluster),
+    total estimated energy and energy per second of audio.
+    """
+    busy = usage.pivot_table(
+        index=RUN_KEYS,
+        columns="cluster",
+        values="busy_sec",
+        aggfunc="sum",
+        fill_value=0,
+    )
+    residency = busy.div(busy.sum(axis=1), axis=0).add_prefix("residency_")
+    runs = residency.join(
+        usage.groupby(RUN_KEYS, observed=True)[["busy_sec", "energy"]].sum()
+    ).reset_index()
+
+    if durations is not None:
+        runs["duration_sec"] = runs["utterance"].astype(str).map(durations)
+        runs["energy_per_audio_sec"] = runs["energy"] / runs["duration_sec"]
+    return runs
+
+
+def summarize_energy(runs, by=GROUP_KEYS):
+    """Mean residency and energy per group; energy per utterance averages the
+    iterations of each utterance first"""
+    per_utterance = runs.groupby(list(by) + ["utterance"], observed=True).mean(
+        numeric_only=True
+    )
+    metrics = [
+        c
+        for c in per_utterance
+        if c.startswith("residency_") or c in ("energy", "energy_per_audio_sec")
+    ]
+    summary = per_utterance.groupby(list(by), observed=True)[metrics].mean()
+    return summary.rename(columns={"energy": "energy_per_utterance"}).reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-cluster residency and estimated energy of benchmark runs"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument(
+        "--profiles", default=DEFAULT_PROFILES, help="Device profile CSV"
+    )
+    parser.add_argument(
+        "--metadata", nargs="+", default=DEFAULT_METADATA, help="CSVs with duration_sec"
+    )
+    parser.add_argument("--output", default="energy_summary.csv", help="Output CSV")
+    args = parser.parse_args()
+
+    ingest_results(args.results, args.store)
+    usage = cluster_usage(args.store, load_device_profiles(args.profiles))
+    runs = energy_per_run(usage, load_durations(args.metadata))
+    summary = summarize_energy(runs)
+    summary.to_csv(args.output, index=False)
+
+    print("\n=== Cluster residency and energy (little-core-seconds) ===")
+    print(summary.round(3).to_string(index=False))
+    print(f"\n✅ Saved summary to {args.output}")
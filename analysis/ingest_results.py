@@ -0,0 +1,358 @@
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+TABLE_TYPES = {
+    "iterations": {
+        "iteration": pa.int16(),
+        "time": pa.float64(),
+        "start_time": pa.float64(),
+        "status": pa.string(),
+    },
+    "samples": {
+        "iteration": pa.int16(),
+        "sample": pa.int32(),
+        "time_ms": pa.float64(),
+        "fps": pa.float64(),
+        "ram_mb": pa.float64(),
+    },
+    "threads": {
+        "iteration": pa.int16(),
+        "sample": pa.int32(),
+        "thread": pa.dictionary(pa.int32(), pa.string()),  # few distinct names
+        "cpu": pa.float64(),
+    },
+    "cores": {
+        "iteration": pa.int16(),
+        "sample": pa.int32(),
+        "core": pa.int16(),
+        "cpu": pa.float64(),
+    },
+}
+TABLES = list(TABLE_TYPES)
+MANIFEST = "_manifest.json"
+
+# results_<device>_<utterance>_<engine>.json
+RESULT_FILE_RE = re.compile(
+    r"^results_(?P<device>[^_]+)_"
+    r"(?P<utterance>common_voice_[a-z]+_\d+|\d+-\d+-\d+)_"
+    r"(?P<engine>.+)\.json$"
+)
+
+# Device names used inconsistently in result file names
+DEVICE_ALIASES = {"samsungS23": "s23"}
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+_DELIMITERS = _WS + ",:]}"
+CHUNK_SIZE = 1 << 20  # characters read at a time
+
+
+def parse_result_path(path, results_dir):
+    """Returns engine/dataset/device/utterance parsed from a result file path.
+
+    The engine is taken from the file name, which is what the benchmark app
+    wrote; a few runs were filed under another engine's folder."""
+    rel_path = os.path.relpath(path, results_dir).replace(os.sep, "/")
+    match = RESULT_FILE_RE.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Unexpected result file name: {rel_path}")
+    return {
+        "file": rel_path,
+        "engine": match["engine"],
+        "dataset": rel_path.split("/")[-2].replace(" ", "_"),
+        "device": match["device"],
+        "utterance": match["utterance"],
+    }
+
+
+class _JsonReader:
+    """
+    Pulls a JSON document through a rolling text buffer: chunks of
+    `chunk_size` characters are read as the walk advances and the part
+    before the current position is dropped, so memory is bounded by the
+    chunk size plus the largest single value decoded.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r}, got {found!r}")
+        self.pos += 1
+
+    def decode(self):
+        """Decodes the next value; reads more when it runs past the buffer.
+        A value counts as complete only when a delimiter follows it, as a
+        number cut at the buffer edge (e.g. `12.` of `12.5`) still decodes."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_object(reader, on_key):
+    """Walks the JSON object at the reader's position. For every key
+    `on_key(key)` is called and must consume its value."""
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+        on_key(key)
+        if reader.peek() == "}":
+            reader.pos += 1
+            return
+        reader.expect(",")
+
+
+def _iter_array(reader, on_item):
+    """Like `_iter_object` for arrays: `on_item(index)` per element."""
+    reader.expect("[")
+    index = 0
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        on_item(index)
+        index += 1
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        reader.expect(",")
+
+
+def stream_result_file(path, chunk_size=CHUNK_SIZE):
+    """
+    Streams a benchmark result JSON into column lists without loading or
+    building the whole document: the file is read in chunks and only one
+    measure object is decoded at a time.
+
+    Returns a dict of table name -> dict of column lists.
+    """
+    columns = {
+        table: {name: [] for name in types} for table, types in TABLE_TYPES.items()
+    }
+    it_cols, s_cols = columns["iterations"], columns["samples"]
+    t_cols, c_cols = columns["threads"], columns["cores"]
+
+    def on_measure(iteration, sample):
+        measure = reader.decode()
+        s_cols["iteration"].append(iteration)
+        s_cols["sample"].append(sample)
+        s_cols["time_ms"].append(measure.get("time"))
+        s_cols["fps"].append(measure.get("fps"))
+        s_cols["ram_mb"].append(measure.get("ram"))
+
+        cpu = measure.get("cpu", {})
+        # Zero readings are dropped, they make up most of the per-thread map
+        for name, value in cpu.get("perName", {}).items():
+            if value:
+                t_cols["iteration"].append(iteration)
+                t_cols["sample"].append(sample)
+                t_cols["thread"].append(name)
+                t_cols["cpu"].append(value)
+        for core, value in cpu.get("perCore", {}).items():
+            if value:
+                c_cols["iteration"].append(iteration)
+                c_cols["sample"].append(sample)
+                c_cols["core"].append(int(core))
+                c_cols["cpu"].append(value)
+
+    def on_iteration(iteration):
+        fields = {}
+
+        def on_key(key):
+            if key == "measures":
+                _iter_array(reader, lambda i: on_measure(iteration, i))
+            else:
+                fields[key] = reader.decode()
+
+        _iter_object(reader, on_key)
+        it_cols["iteration"].append(iteration)
+        it_cols["time"].append(fields.get("time"))
+        it_cols["start_time"].append(fields.get("startTime"))
+        it_cols["status"].append(fields.get("status"))
+
+    def on_root_key(key):
+        if key == "iterations":
+            _iter_array(reader, on_iteration)
+        else:
+            reader.decode()
+
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _JsonReader(f, chunk_size)
+        _iter_object(reader, on_root_key)
+    return columns
+
+
+def _table_path(store_dir, table, file_key):
+    return os.path.join(store_dir, table, file_key + ".parquet")
+
+
+def _file_key(rel_path):
+    return os.path.splitext(rel_path.replace(" ", "_").replace("/", "__"))[0]
+
+
+def ingest_file(path, results_dir, store_dir):
+    """Parses one result file and writes one Parquet file per table"""
+    info = parse_result_path(path, results_dir)
+    columns = stream_result_file(path)
+    key = _file_key(info["file"])
+
+    rows = 0
+    for table, cols in columns.items():
+        n = len(cols["iteration"])
+        arrays = {
+            name: pa.DictionaryArray.from_arrays(
+                pa.array([0] * n, type=pa.int32()), pa.array([value])
+            )
+            for name, value in info.items()
+        }
+        arrays.update(
+            {
+                name: pa.array(values, type=TABLE_TYPES[table][name])
+                for name, values in cols.items()
+            }
+        )
+        pq.write_table(pa.table(arrays), _table_path(store_dir, table, key))
+        rows += n
+    return info["file"], rows
+
+
+def find_result_files(results_dir):
+    paths = []
+    for root, _, files in os.walk(results_dir):
+        for file in files:
+            if file.startswith("results_") and file.endswith(".json"):
+                paths.append(os.path.join(root, file))
+    return sorted(paths)
+
+
+def load_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def ingest_results(
+    results_dir="benchmark_results", store_dir="benchmark_store", workers=None
+):
+    """
+    Ingests benchmark result JSONs into a Parquet store, in parallel.
+
+    Files already in the store's manifest with unchanged size and mtime are
+    skipped. Returns the list of newly ingested result files (relative to
+    `results_dir`).
+    """
+    for table in TABLES:
+        os.makedirs(os.path.join(store_dir, table), exist_ok=True)
+
+    manifest = load_manifest(store_dir)
+    pending = []
+    for path in find_result_files(results_dir):
+        rel_path = os.path.relpath(path, results_dir).replace(os.sep, "/")
+        st = os.stat(path)
+        if manifest.get(rel_path) != [st.st_size, st.st_mtime_ns]:
+            pending.append((path, [st.st_size, st.st_mtime_ns]))
+
+    print(f"Found {len(manifest)} ingested, {len(pending)} new result files")
+    if not pending:
+        return []
+
+    ingested = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(ingest_file, path, results_dir, store_dir)
+            for path, _ in pending
+        ]
+        for (path, stamp), future in tqdm(
+            zip(pending, futures), total=len(pending), desc="Ingesting"
+        ):
+            try:
+                rel_path, _ = future.result()
+            except Exception as e:
+                print(f"⚠️ Error ingesting {path}: {e}")
+                continue
+            manifest[rel_path] = stamp
+            ingested.append(rel_path)
+
+    _save_manifest(store_dir, manifest)
+    return ingested
+
+
+def load_table(store_dir, table, columns=None, filter=None):
+    """Loads a table from the store as a DataFrame. `filter` is a pyarrow
+    compute expression, e.g. `pc.field("engine") == "vosk"`."""
+    dataset = ds.dataset(os.path.join(store_dir, table), format="parquet")
+    df = dataset.to_table(columns=columns, filter=filter).to_pandas()
+    if "device" in df:
+        df["device"] = (
+            df["device"].astype(str).replace(DEVICE_ALIASES).astype("category")
+        )
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest benchmark_results JSONs into a Parquet store"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Output store folder"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    ingested = ingest_results(args.results, args.store, workers=args.workers)
+    print(f"\n✅ Ingested {len(ingested)} result files into {args.store}")
@@ -0,0 +1,140 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import ingest_results, load_table
+from analysis.rtf_summary import GROUP_KEYS, sample_intervals
+
+RUN = ["file", "iteration"]
+PHASES = ["startup", "playback", "decoding", "idle"]
+# Threads that only work while the test clip is being played back
+PLAYBACK_THREADS = ("ExoPlayer:Playb", "MediaCodec_loop")
+PLAYBACK_MIN_CPU = 1.0  # % of a core
+IDLE_MAX_CPU = 5.0  # % of a core, summed over all threads
+
+
+def load_timelines(store_dir):
+    """Samples of every run with total and playback-thread CPU columns"""
+    samples = load_table(store_dir, "samples")
+    threads = load_table(store_dir, "threads")
+    keys = RUN + ["sample"]
+
+    is_playback = threads["thread"].astype(str).str.startswith(PLAYBACK_THREADS)
+    cpu = pd.DataFrame(
+        {
+            "cpu_total": threads.groupby(keys, observed=True)["cpu"].sum(),
+            "cpu_playback": threads[is_playback]
+            .groupby(keys, observed=True)["cpu"]
+            .sum(),
+        }
+    )
+    samples = samples.join(cpu, on=keys)
+    samples[["cpu_total", "cpu_playback"]] = samples[
+        ["cpu_total", "cpu_playback"]
+    ].fillna(0.0)
+    return samples.sort_values(keys, ignore_index=True)
+
+
+def segment_phases(samples):
+    """
+    Labels every sample with a phase, for all runs in one pass:
+
+    - playback: the longest stretch in which the playback threads are busy
+      (single-sample gaps are bridged),
+    - startup: everything before playback (app start, model loading),
+    - decoding: after playback, until the last sample above the idle level
+      (the recognizer finishing the buffered audio),
+    - idle: the rest of the recording.
+    """
+    by_run = [samples[c] for c in RUN]
+    run = samples.groupby(RUN, observed=True, sort=False)
+    active = samples["cpu_playback"] >= PLAYBACK_MIN_CPU
+    prev_active = run["cpu_playback"].shift(1).fillna(0) >= PLAYBACK_MIN_CPU
+    next_active = run["cpu_playback"].shift(-1).fillna(0) >= PLAYBACK_MIN_CPU
+    active |= prev_active & next_active
+
+    # Contiguous stretches of equal activity within each run
+    new_stretch = active.ne(active.groupby(by_run, observed=True).shift())
+    stretch_id = new_stretch.cumsum()
+    stretch_len = stretch_id.map(stretch_id.value_counts())
+    playback_len = stretch_len.where(active, 0)
+
+    longest = playback_len.groupby(by_run, observed=True).transform("max")
+    in_playback = active & (playback_len == longest) & (longest > 0)
+    # Several equally long stretches: keep the first one
+    first_id = (
+        stretch_id.where(in_playback).groupby(by_run, observed=True).transform("min")
+    )
+    in_playback &= stretch_id == first_id
+
+    t = samples["time_ms"]
+    pb_start = t.where(in_playback).groupby(by_run, observed=True).transform("min")
+    pb_end = t.where(in_playback).groupby(by_run, observed=True).transform("max")
+    busy = samples["cpu_total"] > IDLE_MAX_CPU
+    last_busy = t.where(busy).groupby(by_run, observed=True).transform("max")
+
+    samples = samples.copy()
+    samples["phase"] = pd.Categorical(
+        np.select(
+            [t < pb_start, t <= pb_end, t <= last_busy],
+            ["startup", "playback", "decoding"],
+            "idle",
+        ),
+        categories=PHASES,
+    )
+    return samples
+
+
+def phase_report(samples):
+    """Per run and phase: duration, CPU-seconds, mean CPU and RAM growth"""
+    samples = samples.copy()
+    by_run = [samples[c] for c in RUN]
+    samples["interval_sec"] = sample_intervals(samples)
+    samples["cpu_seconds"] = samples["cpu_total"] / 100 * samples["interval_sec"]
+    samples["ram_growth_mb"] = (
+        samples["ram_mb"] - samples["ram_mb"].groupby(by_run, observed=True).shift()
+    ).fillna(0.0)
+
+    keys = ["engine", "device", "dataset", "utterance"] + RUN + ["phase"]
+    report = samples.groupby(keys, observed=True).agg(
+        duration_sec=("interval_sec", "sum"),
+        cpu_seconds=("cpu_seconds", "sum"),
+        ram_growth_mb=("ram_growth_mb", "sum"),
+        ram_peak_mb=("ram_mb", "max"),
+    )
+    report["cpu_mean_pct"] = 100 * report["cpu_seconds"] / report["duration_sec"]
+    return report.reset_index()
+
+
+def summarize_phases(report, by=GROUP_KEYS):
+    """Mean phase metrics per group"""
+    metrics = ["duration_sec", "cpu_seconds", "cpu_mean_pct", "ram_growth_mb"]
+    return (
+        report.groupby(list(by) + ["phase"], observed=True)[metrics]
+        .mean()
+        .reset_index()
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Split benchmark timelines into startup/playback/decoding/idle"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument("--output", default="phase_report.csv", help="Output CSV")
+    args = parser.parse_args()
+
+    ingest_results(args.results, args.store)
+    report = phase_report(segment_phases(load_timelines(args.store)))
+    report.to_csv(args.output, index=False)
+
+    print("\n=== Mean per-phase metrics ===")
+    print(summarize_phases(report).round(2).to_string(index=False))
+    print(f"\n✅ Saved per-run phase report to {args.output}")
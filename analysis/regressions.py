@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import ingest_results, load_manifest
+from analysis.rtf_summary import (
+    DEFAULT_METADATA,
+    GROUP_KEYS,
+    load_durations,
+    run_metrics,
+)
+
+BASELINE_FILE = "benchmark_baseline.json"
+# Lower is better for all of them; time_sec is left out because it depends
+# on which utterances were played
+CHECKED_METRICS = ["rtf", "cpu_per_audio_sec", "ram_peak_mb"]
+
+
+def group_stats(runs, metrics=CHECKED_METRICS):
+    """Returns {"engine/device/dataset": {metric: {n, mean, std}}}"""
+    stats = {}
+    for keys, group in runs.groupby(GROUP_KEYS, observed=True):
+        entry = {}
+        for metric in metrics:
+            values = group[metric].dropna().to_numpy() if metric in group else []
+            if len(values):
+                entry[metric] = {
+                    "n": int(len(values)),
+                    "mean": float(values.mean()),
+                    "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+                }
+        stats["/".join(map(str, keys))] = entry
+    return stats
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {"groups": {}, "files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline.setdefault("files", {})
+    return baseline
+
+
+def save_baseline(stats, files, path=BASELINE_FILE):
+    """`files` maps the result files the baseline covers to their
+    [size, mtime_ns] stamps from the store manifest"""
+    baseline = {
+        "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "groups": stats,
+        "files": files,
+    }
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def compare_to_baseline(baseline, current, rel_tolerance=0.05, z=3.0):
+    """
+    Compares current group stats against the baseline.
+
+    A metric regresses when its mean grows by more than both `rel_tolerance`
+    of the baseline mean and `z` standard errors of the difference, so
+    noisy groups with few iterations need a larger change to be flagged.
+    Returns a list of dicts, one per group and metric.
+    """
+    rows = []
+    for group, metrics in sorted(current.items()):
+        base_metrics = baseline["groups"].get(group)
+        for metric, new in metrics.items():
+            row = {"group": group, "metric": metric, "new": new["mean"]}
+            old = (base_metrics or {}).get(metric)
+            if old is None:
+                rows.append({**row, "status": "new"})
+                continue
+
+            stderr = np.sqrt(old["std"] ** 2 / old["n"] + new["std"] ** 2 / new["n"])
+            threshold = max(rel_tolerance * abs(old["mean"]), z * stderr)
+            delta = new["mean"] - old["mean"]
+            if delta > threshold:
+                status = "regression"
+            elif delta < -threshold:
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append(
+                {
+                    **row,
+                    "old": old["mean"],
+                    "delta": delta,
+                    "threshold": threshold,
+                    "status": status,
+                }
+            )
+    return rows
+
+
+def uncovered_files(baseline, manifest):
+    """Ingested result files that are not in the baseline, or changed since"""
+    covered = baseline["files"]
+    return sorted(rel for rel, stamp in manifest.items() if covered.get(rel) != stamp)
+
+
+def format_diff(rows):
+    """Readable one-line-per-metric diff"""
+    marks = {"regression": "❌", "improvement": "⬇️", "ok": "✅", "new": "🆕"}
+    lines = []
+    for row in rows:
+        if row["status"] == "new":
+            lines.append(
+                f"{marks['new']} {row['group']:<40} {row['metric']:<18} "
+                f"{row['new']:.3f} (no baseline)"
+            )
+            continue
+        pct = 100 * row["delta"] / row["old"] if row["old"] else float("nan")
+        lines.append(
+            f"{marks[row['status']]} {row['group']:<40} {row['metric']:<18} "
+            f"{row['old']:.3f} -> {row['new']:.3f} ({pct:+.1f}%, "
+            f"threshold ±{row['threshold']:.3f})"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Detect RTF/CPU/RAM regressions against a stored baseline"
+    )
+    parser.add_argument(
+        "command",
+        choices=["update", "check"],
+        help="update: baseline from all ingested runs; "
+        "check: compare runs the baseline does not cover",
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument(
+        "--metadata", nargs="+", default=DEFAULT_METADATA, help="CSVs with duration_sec"
+    )
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="Relative change ignored"
+    )
+    parser.add_argument(
+        "--z", type=float, default=3.0, help="Standard errors a change must exceed"
+    )
+    args = parser.parse_args()
+
+    # Which runs to check comes from the baseline, not from what this call
+    # ingested, so a regression keeps failing until the baseline is updated
+    ingest_results(args.results, args.store)
+    manifest = load_manifest(args.store)
+    durations = load_durations(args.metadata)
+
+    if args.command == "update":
+        stats = group_stats(run_metrics(args.store, durations))
+        save_baseline(stats, manifest, args.baseline)
+        print(f"✅ Saved baseline for {len(stats)} groups to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if not baseline["groups"]:
+        print(f"⚠️ No baseline in {args.baseline}, run the update command first")
+
+    new_files = uncovered_files(baseline, manifest)
+    if not new_files:
+        print("No result files outside the baseline to check")
+        sys.exit(0)
+
+    current = group_stats(run_metrics(args.store, durations, files=new_files))
+    rows = compare_to_baseline(baseline, current, args.tolerance, args.z)
+    print(f"\n=== {len(new_files)} result files vs baseline ===")
+    print(format_diff(rows))
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions detected")
+        sys.exit(1)
+    print("\n✅ No regressions")
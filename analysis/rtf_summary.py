@@ -0,0 +1,174 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+import pyarrow.compute as pc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+from analysis.ingest_results import ingest_results, load_table
+from common.audio_features import load_speech_durations
+from common.metadata_store import load_metadata
+
+RUN_KEYS = ["file", "engine", "dataset", "device", "utterance", "iteration"]
+GROUP_KEYS = ["engine", "device", "dataset"]
+DEFAULT_METADATA = [
+    os.path.join(REPO_DIR, path)
+    for path in [
+        "librispeech/clean/librispeech_test_clean_selected_subset.csv",
+        "librispeech/other/librispeech_test_other_selected_subset.csv",
+        "commonvoice/commonvoice_with_durations.csv",
+    ]
+]
+
+
+def load_durations(metadata_csvs):
+    """Returns utterance id -> duration_sec from subset/metadata CSVs or
+    typed metadata (see common/metadata_store.py)"""
+    frames = []
+    for path in metadata_csvs:
+        if not os.path.exists(path):
+            print(f"⚠️ Missing metadata file: {path}")
+            continue
+        df = load_metadata(path, columns=["filename", "duration_sec"])
+        df["utterance"] = df["filename"].str.rsplit(".", n=1).str[0]
+        frames.append(df[["utterance", "duration_sec"]])
+    if not frames:
+        return pd.Series(dtype=float, name="duration_sec")
+    durations = pd.concat(frames, ignore_index=True).drop_duplicates("utterance")
+    return durations.set_index("utterance")["duration_sec"].astype(float)
+
+
+def sample_intervals(samples):
+    """Seconds covered by each sample: the gap to the previous sample of the
+    same iteration (the first sample covers the time since start)"""
+    t = samples["time_ms"]
+    prev = t.groupby([samples["file"], samples["iteration"]], observed=True).shift()
+    return (t - prev.fillna(0)) / 1000
+
+
+def run_metrics(store_dir, durations=None, files=None):
+    """
+    Computes per-iteration metrics from the ingested store: processing time,
+    real-time factor, integrated CPU-seconds and peak/mean RAM. `files`
+    restricts the computation to the given result files.
+    """
+    filter = None if files is None else pc.field("file").isin(list(files))
+    iterations = load_table(store_dir, "iterations", filter=filter)
+    samples = load_table(store_dir, "samples", filter=filter)
+    threads = load_table(
+        store_dir,
+        "threads",
+        columns=["file", "iteration", "sample", "cpu"],
+        filter=filter,
+    )
+
+    # Total CPU per sample (100% = one fully busy core)
+    cpu = threads.groupby(["file", "iteration", "sample"], observed=True)["cpu"].sum()
+    samples = samples.join(cpu.rename("cpu_total"), on=["file", "iteration", "sample"])
+    samples["cpu_total"] = samples["cpu_total"].fillna(0.0)
+    samples["cpu_seconds"] = samples["cpu_total"] / 100 * sample_intervals(samples)
+
+    per_run = samples.groupby(RUN_KEYS, observed=True).agg(
+        cpu_seconds=("cpu_seconds", "sum"),
+        ram_peak_mb=("ram_mb", "max"),
+        ram_mean_mb=("ram_mb", "mean"),
+        samples=("sample", "size"),
+    )
+    runs = iterations.join(per_run, on=RUN_KEYS)
+    runs["time_sec"] = runs["time"] / 1000
+
+    if durations is not None:
+        runs["duration_sec"] = runs["utterance"].astype(str).map(durations)
+        runs["rtf"] = runs["time_sec"] / runs["duration_sec"]
+        runs["cpu_per_audio_sec"] = runs["cpu_seconds"] / runs["duration_sec"]
+        missing = runs.loc[runs["duration_sec"].isna(), "utterance"].unique()
+        if len(missing):
+            print(
+                f"⚠️ No duration for {len(missing)} utterances: {', '.join(map(str, missing[:5]))}..."
+            )
+    return runs
+
+
+def add_speech_metrics(runs, speech):
+    """Adds speech_sec (utterance id -> detected speech time, see
+    common/audio_features.py) and RTF / CPU-seconds per second of speech, so
+    leading and trailing silence does not skew engines"""
+    runs["speech_sec"] = runs["utterance"].astype(str).map(speech)
+    speech_sec = runs["speech_sec"].where(runs["speech_sec"] > 0)
+    runs["rtf_speech"] = runs["time_sec"] / speech_sec
+    runs["cpu_per_speech_sec"] = runs["cpu_seconds"] / speech_sec
+    return runs
+
+
+def summarize_runs(runs, by=GROUP_KEYS, quantiles=(0.5, 0.95, 0.99)):
+    """Per-group mean and percentiles over all iterations of all utterances"""
+    metrics = [
+        m
+        for m in [
+            "time_sec",
+            "rtf",
+            "rtf_speech",
+            "cpu_seconds",
+            "cpu_per_audio_sec",
+            "cpu_per_speech_sec",
+            "ram_peak_mb",
+            "ram_mean_mb",
+        ]
+        if m in runs
+    ]
+    grouped = runs.groupby(list(by), observed=True)[metrics]
+
+    summary = grouped.mean().add_suffix("_mean")
+    pct = grouped.quantile(list(quantiles)).unstack()
+    pct.columns = [f"{metric}_p{int(q * 100)}" for metric, q in pct.columns]
+    summary = summary.join(pct)
+    summary.insert(0, "runs", grouped.size())
+    summary.insert(
+        1, "utterances", runs.groupby(list(by), observed=True)["utterance"].nunique()
+    )
+    return summary.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Real-time factor and resource summary of benchmark runs"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    parser.add_argument(
+        "--metadata", nargs="+", default=DEFAULT_METADATA, help="CSVs with duration_sec"
+    )
+    parser.add_argument(
+        "--features",
+        nargs="*",
+        default=[],
+        help="Feature stores (audio_features.py) to normalize by speech time",
+    )
+    parser.add_argument("--output", default="rtf_summary.csv", help="Output CSV")
+    args = parser.parse_args()
+
+    ingest_results(args.results, args.store)
+    runs = run_metrics(args.store, load_durations(args.metadata))
+    if args.features:
+        runs = add_speech_metrics(runs, load_speech_durations(args.features))
+    summary = summarize_runs(runs)
+    summary.to_csv(args.output, index=False)
+
+    columns = [
+        "engine",
+        "device",
+        "dataset",
+        "runs",
+        "rtf_p50",
+        "rtf_p95",
+        *(["rtf_speech_p50"] if args.features else []),
+        "cpu_seconds_mean",
+        "ram_peak_mb_p95",
+    ]
+    print("\n=== RTF / resource summary ===")
+    print(summary[columns].round(3).to_string(index=False))
+    print(f"\n✅ Saved summary to {args.output}")
@@ -0,0 +1,274 @@
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from librispeech.transcript_index import load_transcript_index
+
+# transcriptions_<device>-<dataset>_<engine>.txt
+TRANSCRIPTION_FILE_RE = re.compile(
+    r"^transcriptions_(?P<device>[^-]+)-"
+    r"(?P<dataset>commonvoice|librispeech_[a-z]+)_"
+    r"(?P<engine>.+)\.txt$"
+)
+
+COUNT_COLUMNS = [
+    "ref_words",
+    "sub",
+    "ins",
+    "del",
+    "ref_chars",
+    "char_sub",
+    "char_ins",
+    "char_del",
+]
+GROUP_COLUMNS = ["device", "dataset", "engine"]
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s']")
+_APOSTROPHE_RE = re.compile(r"(^|\s)'+|'+(\s|$)")
+
+
+def normalize_text(text):
+    """Lowercases, strips punctuation (keeping in-word apostrophes) and
+    collapses repeated whitespace, e.g. the double spaces in vosk output"""
+    text = text.lower().replace("’", "'").replace("-", " ")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    text = _APOSTROPHE_RE.sub(r"\1\2", text)
+    return " ".join(text.split())
+
+
+def edit_ops(ref, hyp):
+    """
+    Levenshtein alignment of two integer sequences.
+
+    The DP is vectorized per row: substitutions/deletions come from the
+    previous row in one NumPy expression and the insertion chain along the
+    row is resolved with a running minimum (`D[j] = j + cummin(T[k] - k)`).
+    Returns (substitutions, insertions, deletions).
+    """
+    ref = np.asarray(ref)
+    hyp = np.asarray(hyp)
+    n, m = len(ref), len(hyp)
+    if n == 0:
+        return 0, m, 0
+    if m == 0:
+        return 0, 0, n
+
+    offsets = np.arange(m + 1)
+    dist = np.empty((n + 1, m + 1), dtype=np.int32)
+    dist[0] = offsets
+    for i in range(1, n + 1):
+        prev = dist[i - 1]
+        row = np.empty(m + 1, dtype=np.int32)
+        row[0] = i
+        row[1:] = np.minimum(prev[1:] + 1, prev[:-1] + (hyp != ref[i - 1]))
+        dist[i] = np.minimum.accumulate(row - offsets) + offsets
+
+    # Backtrace, preferring matches/substitutions over insertions/deletions
+    sub = ins = dele = 0
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0:
+            cost = 0 if ref[i - 1] == hyp[j - 1] else 1
+            if dist[i, j] == dist[i - 1, j - 1] + cost:
+                sub += cost
+                i, j = i - 1, j - 1
+                continue
+        if i > 0 and dist[i, j] == dist[i - 1, j] + 1:
+            dele += 1
+            i -= 1
+        else:
+            ins += 1
+            j -= 1
+    return sub, ins, dele
+
+
+def _encode_words(words, vocab):
+    return [vocab.setdefault(w, len(vocab)) for w in words]
+
+
+def _encode_chars(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def score_pair(ref_text, hyp_text, vocab):
+    """Returns word and character error counts for one utterance"""
+    ref_text, hyp_text = normalize_text(ref_text), normalize_text(hyp_text)
+    ref_words, hyp_words = ref_text.split(), hyp_text.split()
+
+    w_sub, w_ins, w_del = edit_ops(
+        _encode_words(ref_words, vocab), _encode_words(hyp_words, vocab)
+    )
+    c_sub, c_ins, c_del = edit_ops(_encode_chars(ref_text), _encode_chars(hyp_text))
+    return {
+        "ref_words": len(ref_words),
+        "sub": w_sub,
+        "ins": w_ins,
+        "del": w_del,
+        "ref_chars": len(ref_text),
+        "char_sub": c_sub,
+        "char_ins": c_ins,
+        "char_del": c_del,
+    }
+
+
+def load_transcriptions(path):
+    """Reads `<utterance id> <text>` lines (hypotheses and LibriSpeech
+    combined_transcriptions.txt) or `<file>\\t<sentence>` lines (Common Voice
+    combined_transcriptions.tsv). Ids are returned without file extension."""
+    texts = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if "\t" in line:
+                utt_id, text = line.split("\t", 1)
+            else:
+                parts = line.split(" ", 1)
+                utt_id, text = parts[0], parts[1] if len(parts) > 1 else ""
+            texts[os.path.splitext(utt_id.strip())[0]] = text
+    return texts
+
+
+def load_references(source):
+    """Returns utterance id -> reference text. `source` is a dict, a
+    combined_transcriptions file or a LibriSpeech folder (its *.trans.txt
+    files are parsed; nothing is written into it)."""
+    if isinstance(source, dict):
+        return source
+    if os.path.isdir(source):
+        return load_transcript_index(source)
+    return load_transcriptions(source)
+
+
+def parse_transcription_path(path):
+    match = TRANSCRIPTION_FILE_RE.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Unexpected transcription file name: {path}")
+    return match.groupdict()
+
+
+def score_file(hyp_path, refs):
+    """Scores one hypothesis file against an id -> reference text map"""
+    info = parse_transcription_path(hyp_path)
+    hyps = load_transcriptions(hyp_path)
+
+    vocab = {}
+    rows = []
+    for utt_id, hyp_text in hyps.items():
+        if utt_id not in refs:
+            print(f"⚠️ No reference for {utt_id} in {os.path.basename(hyp_path)}")
+            continue
+        row = {**info, "utterance": utt_id}
+        row.update(score_pair(refs[utt_id], hyp_text, vocab))
+        rows.append(row)
+    return rows
+
+
+def summarize(per_utt, by=GROUP_COLUMNS):
+    """Aggregates per-utterance counts into corpus-level WER/CER"""
+    counts = COUNT_COLUMNS
+    summary = per_utt.groupby(list(by), observed=True)[counts].sum()
+    summary.insert(0, "utterances", per_utt.groupby(list(by), observed=True).size())
+    summary["wer"] = (summary["sub"] + summary["ins"] + summary["del"]) / summary[
+        "ref_words"
+    ]
+    summary["cer"] = (
+        summary["char_sub"] + summary["char_ins"] + summary["char_del"]
+    ) / summary["ref_chars"]
+    return summary.reset_index()
+
+
+def score_transcriptions(hyp_dir, references, workers=None):
+    """
+    Scores every transcriptions_<device>-<dataset>_<engine>.txt in `hyp_dir`
+    in one multi-process pass.
+
+    `references` maps dataset name (e.g. "librispeech_clean") to the
+    combined_transcriptions file written by the copy scripts, a LibriSpeech
+    folder or an already loaded dict. Files of datasets without references
+    are skipped.
+
+    Returns (per_utterance, summary) DataFrames; they have their usual
+    columns and no rows when nothing could be scored.
+    """
+    jobs = []
+    for file in sorted(os.listdir(hyp_dir)):
+        if not TRANSCRIPTION_FILE_RE.match(file):
+            continue
+        dataset = parse_transcription_path(file)["dataset"]
+        if dataset not in references:
+            print(f"Skipping {file}: no reference transcripts for {dataset}")
+            continue
+        jobs.append((os.path.join(hyp_dir, file), dataset))
+
+    refs = {dataset: load_references(references[dataset]) for _, dataset in jobs}
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(score_file, hyp, refs[dataset]) for hyp, dataset in jobs
+        ]
+        for future in tqdm(futures, desc="Scoring"):
+            rows.extend(future.result())
+
+    columns = GROUP_COLUMNS + ["utterance"] + COUNT_COLUMNS
+    per_utt = pd.DataFrame(rows, columns=columns)
+    per_utt[COUNT_COLUMNS] = per_utt[COUNT_COLUMNS].astype(int)
+    per_utt["wer"] = (per_utt["sub"] + per_utt["ins"] + per_utt["del"]) / per_utt[
+        "ref_words"
+    ].where(per_utt["ref_words"] > 0)
+    per_utt["cer"] = (
+        per_utt["char_sub"] + per_utt["char_ins"] + per_utt["char_del"]
+    ) / per_utt["ref_chars"].where(per_utt["ref_chars"] > 0)
+    return per_utt, summarize(per_utt)
+
+
+def _parse_refs(values):
+    references = {}
+    for value in values:
+        dataset, _, path = value.partition("=")
+        if not path:
+            raise argparse.ArgumentTypeError(f"Expected DATASET=PATH, got {value}")
+        references[dataset] = path
+    return references
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compute WER/CER for all transcription result files"
+    )
+    parser.add_argument(
+        "--hyp-dir", default="transcription_results", help="Hypotheses folder"
+    )
+    parser.add_argument(
+        "--refs",
+        nargs="+",
+        required=True,
+        help="DATASET=PATH pairs, e.g. librispeech_clean=combined_transcriptions.txt "
+        "or librispeech_clean=test-clean (LibriSpeech folder)",
+    )
+    parser.add_argument("--output", default="wer_results", help="Output folder")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    per_utt, summary = score_transcriptions(
+        args.hyp_dir, _parse_refs(args.refs), workers=args.workers
+    )
+    os.makedirs(args.output, exist_ok=True)
+    per_utt.to_csv(os.path.join(args.output, "wer_per_utterance.csv"), index=False)
+    summary.to_csv(os.path.join(args.output, "wer_summary.csv"), index=False)
+
+    print("\n=== WER/CER Summary ===")
+    print(
+        summary[["device", "dataset", "engine", "utterances", "wer", "cer"]].to_string(
+            index=False
+        )
+    )
+    print(f"\n✅ Saved results to {os.path.abspath(args.output)}")
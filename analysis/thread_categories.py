@@ -0,0 +1,139 @@
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ingest_results import load_table
+
+# Category ids are positions in this list and stay fixed across runs
+THREAD_CATEGORIES = ["recognizer", "jit", "gc", "binder", "render", "media", "other"]
+
+# Per-process numbering that differs between runs and devices
+NAME_RULES = [
+    (re.compile(r" \(\d+\)$"), ""),  # duplicate names: "MediaCodec_loop (3)"
+    (re.compile(r"^binder:\d+_\w+$"), "binder"),  # "binder:4148_3"
+    (re.compile(r"^(Hw)?Binder #\d*$"), r"\1Binder"),  # "Binder #2", "HwBinder #"
+    (re.compile(r"^Thread-\d+$"), "Thread"),
+    (re.compile(r"^stream-\d+$"), "stream"),  # host replay harness
+    (re.compile(r"^pool-\d+-thread-\d+$"), "pool-thread"),
+]
+
+# Normalized buckets of numbered worker threads -> category. Matched
+# exactly, as a prefix like "Thread" would also catch e.g. "ThreadPoolForeg"
+CATEGORY_NAMES = {
+    "Thread": "recognizer",
+    "pool-thread": "recognizer",
+    "stream": "recognizer",
+}
+
+# Normalized name prefix -> category, first match wins
+CATEGORY_PREFIXES = [
+    ("recognizer", ("UI Thread",)),
+    ("jit", ("Jit thread pool", "Profile Saver")),
+    ("gc", ("HeapTaskDaemon", "FinalizerDaemon", "FinalizerWatchd", "ReferenceQueueD")),
+    ("binder", ("binder", "Binder", "HwBinder")),
+    ("render", ("RenderThread", "mali-", "hwuiTask", "GPU completion")),
+    ("media", ("ExoPlayer:", "MediaCodec_", "AudioPortEventH", "AudioTrack")),
+]
+
+
+def normalize_thread_name(name):
+    """Strips run-specific numbering, e.g. binder:4148_3 (2) -> binder"""
+    for pattern, replacement in NAME_RULES:
+        name = pattern.sub(replacement, name)
+    return name
+
+
+def thread_category(name):
+    """Category id of a normalized thread name"""
+    if name in CATEGORY_NAMES:
+        return THREAD_CATEGORIES.index(CATEGORY_NAMES[name])
+    for category, prefixes in CATEGORY_PREFIXES:
+        if name.startswith(prefixes):
+            return THREAD_CATEGORIES.index(category)
+    return THREAD_CATEGORIES.index("other")
+
+
+def intern_threads(thread_column):
+    """
+    Maps a column of raw thread names to interned integer ids.
+
+    Only the distinct raw names are normalized. Returns the per-row name ids,
+    the sorted normalized names and the category id of each name.
+    """
+    raw = thread_column.astype("category")
+    normalized = [normalize_thread_name(str(name)) for name in raw.cat.categories]
+    names, inverse = np.unique(
+        np.asarray(normalized, dtype=object), return_inverse=True
+    )
+    name_ids = inverse.astype(np.int32)[raw.cat.codes.to_numpy()]
+    name_category = np.array([thread_category(n) for n in names], dtype=np.int8)
+    return name_ids, names, name_category
+
+
+def thread_cpu_matrices(store_dir):
+    """
+    Builds one dense float32 (samples x thread names) CPU matrix per run
+    from the ingested store.
+
+    All runs share a single allocation: rows are laid out run after run and
+    filled with one np.add.at, then split into per-run views. Returns
+    (names, name_category, matrices) where matrices maps
+    (file, iteration) -> matrix.
+    """
+    samples = load_table(store_dir, "samples", columns=["file", "iteration", "sample"])
+    threads = load_table(
+        store_dir, "threads", columns=["file", "iteration", "sample", "thread", "cpu"]
+    )
+    name_ids, names, name_category = intern_threads(threads["thread"])
+
+    runs = samples.groupby(["file", "iteration"], observed=True)["sample"].max() + 1
+    offsets = runs.cumsum() - runs
+    row = (
+        offsets.reindex(pd.MultiIndex.from_frame(threads[["file", "iteration"]]))
+        .to_numpy()
+        .astype(np.int64)
+        + threads["sample"].to_numpy()
+    )
+
+    cpu = np.zeros((int(runs.sum()), len(names)), dtype=np.float32)
+    np.add.at(cpu, (row, name_ids), threads["cpu"].to_numpy(dtype=np.float32))
+
+    matrices = dict(zip(runs.index, np.split(cpu, runs.cumsum().to_numpy()[:-1])))
+    return names, name_category, matrices
+
+
+def category_cpu(matrix, name_category):
+    """Sums a (samples x names) CPU matrix into (samples x categories)"""
+    one_hot = np.eye(len(THREAD_CATEGORIES), dtype=matrix.dtype)[name_category]
+    return matrix @ one_hot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mean CPU per thread category for every engine/device"
+    )
+    parser.add_argument(
+        "--store", default="benchmark_store", help="Parquet store folder"
+    )
+    args = parser.parse_args()
+
+    names, name_category, matrices = thread_cpu_matrices(args.store)
+    print(
+        f"Interned {len(names)} thread names into {len(THREAD_CATEGORIES)} categories"
+    )
+
+    info = load_table(args.store, "iterations", columns=["file", "engine", "device"])
+    info = info.drop_duplicates("file").set_index("file")
+    rows = []
+    for (file, iteration), matrix in matrices.items():
+        per_category = category_cpu(matrix, name_category).mean(axis=0)
+        rows.append([info.at[file, "engine"], info.at[file, "device"], *per_category])
+
+    df = pd.DataFrame(rows, columns=["engine", "device"] + THREAD_CATEGORIES)
+    print("\n=== Mean CPU % per thread category ===")
+    print(df.groupby(["engine", "device"]).mean().astype(float).round(2).to_string())
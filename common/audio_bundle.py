@@ -0,0 +1,154 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.parallel import bounded_submit
+
+SAMPLE_RATE = 16000
+PCM_DTYPE = np.int16
+INDEX_SUFFIX = ".index.csv"
+INDEX_COLUMNS = ["utterance", "offset", "length", "duration_sec", "text"]
+
+
+def _decode(path, sample_rate):
+    """Decodes one file to int16 mono PCM"""
+    from normalize_volume.volume import load_audio
+
+    samples = load_audio(path, sample_rate)
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(PCM_DTYPE)
+
+
+def write_bundle(
+    audio_dir,
+    subset_csv,
+    bundle_path,
+    texts=None,
+    sample_rate=SAMPLE_RATE,
+    workers=None,
+):
+    """
+    Decodes every file of a subset CSV (flat `audio_dir`, as written by the
+    copy scripts) once and packs it into a single contiguous int16 PCM file.
+
+    Next to `bundle_path` an index CSV stores each utterance's sample offset
+    and length, its duration and its reference text from `texts`
+    (utterance id -> text). Files are decoded in a process pool, at most
+    twice the number of workers at a time, and written in subset order, so
+    only a few decoded clips are held in memory.
+    Returns the index DataFrame.
+    """
+    filenames = pd.read_csv(subset_csv, usecols=["filename"])["filename"]
+    jobs = [(os.path.join(audio_dir, f), sample_rate) for f in filenames]
+    texts = texts or {}
+
+    rows = []
+    offset = 0
+    tmp_path = bundle_path + ".tmp"
+    with open(tmp_path, "wb") as out, ProcessPoolExecutor(
+        max_workers=workers
+    ) as executor:
+        futures = bounded_submit(executor, _decode, jobs, workers)
+        for filename, (_, future) in tqdm(
+            zip(filenames, futures), total=len(jobs), desc="Packing audio"
+        ):
+            try:
+                pcm = future.result()
+            except Exception as e:
+                print(f"⚠️ Error decoding {filename}: {e}")
+                continue
+            out.write(pcm.tobytes())
+            utterance = os.path.splitext(filename)[0]
+            rows.append(
+                (
+                    utterance,
+                    offset,
+                    len(pcm),
+                    len(pcm) / sample_rate,
+                    texts.get(utterance, ""),
+                )
+            )
+            offset += len(pcm)
+
+    index = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+    index.to_csv(bundle_path + INDEX_SUFFIX, index=False)
+    os.replace(tmp_path, bundle_path)
+    print(
+        f"✅ Packed {len(index)} clips ({offset / sample_rate / 60:.1f} min, "
+        f"{offset * np.dtype(PCM_DTYPE).itemsize / 2**20:.1f} MB) into {bundle_path}"
+    )
+    return index
+
+
+class AudioBundle:
+    """
+    Read-only view of a packed PCM bundle. The samples are memory-mapped, so
+    `bundle[utterance]` returns an int16 slice of the file without decoding
+    or copying.
+    """
+
+    def __init__(self, bundle_path, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.index = pd.read_csv(
+            bundle_path + INDEX_SUFFIX,
+            dtype={"utterance": str, "text": str},
+            keep_default_na=False,
+        ).set_index("utterance")
+        if os.path.getsize(bundle_path) == 0:
+            self.samples = np.zeros(0, dtype=PCM_DTYPE)
+        else:
+            self.samples = np.memmap(bundle_path, dtype=PCM_DTYPE, mode="r")
+        self._offsets = self.index["offset"].to_dict()
+        self._lengths = self.index["length"].to_dict()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, utterance):
+        return utterance in self._offsets
+
+    def __getitem__(self, utterance):
+        offset = self._offsets[utterance]
+        return self.samples[offset : offset + self._lengths[utterance]]
+
+    def ids(self):
+        return list(self.index.index)
+
+    def text(self, utterance):
+        return self.index.at[utterance, "text"]
+
+    def float_samples(self, utterance):
+        """Samples as float32 in [-1, 1] (this one is a copy)"""
+        return self[utterance].astype(np.float32) / 32767
+
+
+if __name__ == "__main__":
+    from analysis.score_transcriptions import load_transcriptions
+
+    parser = argparse.ArgumentParser(
+        description="Pack a selected subset into one 16 kHz int16 PCM bundle"
+    )
+    parser.add_argument("--input", required=True, help="Folder with copied audio")
+    parser.add_argument("--subset", required=True, help="Subset CSV file")
+    parser.add_argument(
+        "--transcripts",
+        default=None,
+        help="combined_transcriptions.txt/.tsv (default: the one in --input)",
+    )
+    parser.add_argument("--output", required=True, help="Bundle file (.pcm)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    transcripts = args.transcripts
+    if transcripts is None:
+        for name in ("combined_transcriptions.txt", "combined_transcriptions.tsv"):
+            if os.path.exists(os.path.join(args.input, name)):
+                transcripts = os.path.join(args.input, name)
+    texts = load_transcriptions(transcripts) if transcripts else {}
+
+    write_bundle(args.input, args.subset, args.output, texts, workers=args.workers)
@@ -0,0 +1,377 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.parallel import bounded_submit
+
+SAMPLE_RATE = 16000
+FRAME = 400  # 25 ms
+HOP = 160  # 10 ms
+N_FFT = 512
+FEATURE_DTYPE = np.float16
+INDEX_SUFFIX = ".index.csv"
+META_SUFFIX = ".meta.json"
+INDEX_COLUMNS = [
+    "utterance",
+    "offset",
+    "frames",
+    "duration_sec",
+    "speech_sec",
+    "leading_silence_sec",
+    "trailing_silence_sec",
+    "snr_db",
+    "size",
+    "mtime_ns",
+]
+# Rewrite the store once this share of its rows is no longer indexed
+COMPACT_FRACTION = 0.25
+
+# Speech-activity detection
+MIN_SPEECH_DB = -55.0  # frames below this are never speech
+MIN_RANGE_DB = 10.0  # below this floor-to-speech range a clip is all one class
+HANGOVER_FRAMES = 20  # the stored mask is extended by 200 ms on both sides
+
+
+def frame_signal(samples, frame=FRAME, hop=HOP):
+    """(frames, frame) strided view of the signal, zero-padded to one frame"""
+    if len(samples) < frame:
+        samples = np.pad(samples, (0, frame - len(samples)))
+    return np.lib.stride_tricks.sliding_window_view(samples, frame)[::hop]
+
+
+def frame_energy_db(frames):
+    power = np.mean(np.square(frames, dtype=np.float32), axis=1)
+    return 10 * np.log10(power + 1e-10)
+
+
+def speech_activity(energy_db):
+    """
+    Energy-based speech mask for one clip.
+
+    The noise floor and speech level are the 10th and 90th percentile of
+    the frame energies, and frames above their midpoint are speech. Clips
+    whose levels differ by less than MIN_RANGE_DB are either all speech or
+    all silence.
+    """
+    noise, loud = np.percentile(energy_db, [10, 90])
+    if loud - noise < MIN_RANGE_DB:
+        return np.full(len(energy_db), loud > MIN_SPEECH_DB)
+    return energy_db > max((noise + loud) / 2, MIN_SPEECH_DB)
+
+
+def smooth_mask(mask, hangover=HANGOVER_FRAMES):
+    """Widens speech by `hangover` frames on both sides, which also bridges
+    pauses shorter than twice that"""
+    if not hangover or not mask.any():
+        return mask
+    kernel = np.ones(2 * hangover + 1)
+    return np.convolve(mask, kernel, mode="same") > 0
+
+
+def snr_db(energy_db, mask):
+    """Mean speech power over mean non-speech power, in dB (NaN without both)"""
+    if mask.all() or not mask.any():
+        return float("nan")
+    power = 10 ** (energy_db / 10)
+    speech, noise = power[mask].mean(), power[~mask].mean()
+    return float(10 * np.log10(max(speech - noise, 1e-10) / noise))
+
+
+@lru_cache(maxsize=None)
+def _mel_filters(sample_rate, n_mels):
+    import librosa
+
+    return librosa.filters.mel(sr=sample_rate, n_fft=N_FFT, n_mels=n_mels).T
+
+
+def log_mel(frames, sample_rate=SAMPLE_RATE, n_mels=80):
+    """Natural-log mel energies (frames x n_mels) of Hann-windowed frames"""
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, n=N_FFT, axis=1)) ** 2
+    return np.log(power @ _mel_filters(sample_rate, n_mels) + 1e-10)
+
+
+def analyze(samples, sample_rate=SAMPLE_RATE, n_mels=0):
+    """
+    Returns (features, stats) for one clip. `features` has one row per
+    10 ms frame: energy in dBFS, the speech mask (0/1) smoothed with
+    smooth_mask and, with n_mels, the log-mel energies. `stats` holds the
+    clip-level values of the index, measured on the unsmoothed mask.
+    """
+    frames = frame_signal(samples)
+    energy = frame_energy_db(frames)
+    mask = speech_activity(energy)
+
+    columns = [energy, smooth_mask(mask)]
+    if n_mels:
+        columns += list(log_mel(frames, sample_rate, n_mels).T)
+    features = np.column_stack(columns).astype(FEATURE_DTYPE)
+
+    seconds_per_frame = HOP / sample_rate
+    speech = np.flatnonzero(mask)
+    duration = len(samples) / sample_rate
+    if len(speech):
+        leading = float(speech[0] * seconds_per_frame)
+        trailing = max(duration - (speech[-1] * HOP + FRAME) / sample_rate, 0.0)
+    else:
+        leading = trailing = duration
+    stats = {
+        "frames": len(features),
+        "duration_sec": duration,
+        "speech_sec": min(len(speech) * seconds_per_frame, duration),
+        "leading_silence_sec": leading,
+        "trailing_silence_sec": trailing,
+        "snr_db": snr_db(energy, mask),
+    }
+    return features, stats
+
+
+def _analyze_file(path, sample_rate, n_mels):
+    from normalize_volume.volume import load_audio
+
+    return analyze(load_audio(path, sample_rate), sample_rate, n_mels)
+
+
+def _meta(sample_rate, n_mels):
+    columns = ["energy_db", "speech"] + [f"mel_{i}" for i in range(n_mels)]
+    return {
+        "sample_rate": sample_rate,
+        "frame": FRAME,
+        "hop": HOP,
+        "hangover": HANGOVER_FRAMES,
+        "n_mels": n_mels,
+        "columns": columns,
+    }
+
+
+def _store_rows(store_path, row_bytes):
+    return os.path.getsize(store_path) // row_bytes if os.path.exists(store_path) else 0
+
+
+def _compact(store_path, index, row_bytes):
+    """Writes the indexed rows, in index order, to `store_path`.tmp and
+    updates the offsets in `index`. The caller moves the file in place."""
+    n_columns = row_bytes // np.dtype(FEATURE_DTYPE).itemsize
+    rows = np.memmap(store_path, dtype=FEATURE_DTYPE, mode="r").reshape(-1, n_columns)
+    offsets = []
+    with open(store_path + ".tmp", "wb") as out:
+        offset = 0
+        for start, frames in zip(index["offset"], index["frames"]):
+            out.write(rows[start : start + frames].tobytes())
+            offsets.append(offset)
+            offset += frames
+    del rows
+    index["offset"] = offsets
+
+
+def write_features(
+    audio_dir,
+    subset_csv,
+    store_path,
+    n_mels=0,
+    sample_rate=SAMPLE_RATE,
+    workers=None,
+    rebuild=False,
+):
+    """
+    Decodes every file of a subset CSV once, in a process pool, and stores
+    its per-frame features as float16 rows in `store_path`, with a
+    per-utterance index (offset, frames, speech time, silence, SNR) and a
+    meta JSON next to it.
+
+    Later runs only analyze files that are new or whose size or mtime
+    changed; their rows are appended and the index points to the newest
+    ones. Once more than COMPACT_FRACTION of the rows belong to replaced
+    clips or clips that left the subset, the store is rewritten without
+    them. It starts over with `rebuild`, when the sample rate or number of
+    mel bins changes, or when the store file is missing or shorter than its
+    index. Returns the index DataFrame.
+    """
+    meta = _meta(sample_rate, n_mels)
+    index_path, meta_path = store_path + INDEX_SUFFIX, store_path + META_SUFFIX
+    row_bytes = len(meta["columns"]) * np.dtype(FEATURE_DTYPE).itemsize
+    old = None
+    if not rebuild and os.path.exists(meta_path) and os.path.exists(index_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            if json.load(f) == meta:
+                old = pd.read_csv(index_path, dtype={"utterance": str})
+    if old is not None and len(old):
+        if (old["offset"] + old["frames"]).max() > _store_rows(store_path, row_bytes):
+            print(f"⚠️ {store_path} is missing or shorter than its index, rebuilding")
+            old = None
+    if old is None:
+        old = pd.DataFrame(columns=INDEX_COLUMNS)
+        if os.path.exists(store_path):
+            os.remove(store_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+
+    filenames = pd.read_csv(subset_csv, usecols=["filename"])["filename"]
+    known = {row.utterance: row for row in old.itertuples(index=False)}
+    rows, pending = [], []
+    for filename in filenames:
+        path = os.path.join(audio_dir, filename)
+        utterance = os.path.splitext(filename)[0]
+        try:
+            st = os.stat(path)
+        except OSError:
+            print(f"⚠️ Missing file: {filename}")
+            continue
+        stamp = (st.st_size, st.st_mtime_ns)
+        row = known.get(utterance)
+        if row is not None and (row.size, row.mtime_ns) == stamp:
+            rows.append(row._asdict())
+        else:
+            pending.append((utterance, path, stamp))
+    print(f"{len(rows)} utterances reused, {len(pending)} to analyze")
+
+    jobs = [(path, sample_rate, n_mels) for _, path, _ in pending]
+    with open(store_path, "ab") as out, ProcessPoolExecutor(
+        max_workers=workers
+    ) as executor:
+        offset = out.tell() // row_bytes
+        futures = bounded_submit(executor, _analyze_file, jobs, workers)
+        for (utterance, _, stamp), (_, future) in tqdm(
+            zip(pending, futures), total=len(jobs), desc="Analyzing audio"
+        ):
+            try:
+                features, stats = future.result()
+            except Exception as e:
+                print(f"⚠️ Error analyzing {utterance}: {e}")
+                continue
+            out.write(features.tobytes())
+            rows.append(
+                {
+                    "utterance": utterance,
+                    "offset": offset,
+                    **stats,
+                    "size": stamp[0],
+                    "mtime_ns": stamp[1],
+                }
+            )
+            offset += len(features)
+
+    index = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+    stored = _store_rows(store_path, row_bytes)
+    orphaned = stored - int(index["frames"].sum())
+    compact = orphaned > COMPACT_FRACTION * stored
+    if compact:
+        print(f"Compacting {store_path}: {orphaned} of {stored} rows unused")
+        _compact(store_path, index, row_bytes)
+    index.to_csv(index_path + ".tmp", index=False)
+    if compact:
+        # The old index does not match the compacted rows. Without any
+        # index, a crash before the new one is in place makes the next run
+        # rebuild instead of reading moved rows.
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        os.replace(store_path + ".tmp", store_path)
+    os.replace(index_path + ".tmp", index_path)
+    speech, total = index["speech_sec"].sum(), index["duration_sec"].sum()
+    print(
+        f"✅ {len(index)} clips, {speech / 60:.1f} of {total / 60:.1f} min are "
+        f"speech, median SNR {index['snr_db'].median():.1f} dB ({store_path})"
+    )
+    return index
+
+
+class FeatureStore:
+    """
+    Read-only view of a feature store. Rows are memory-mapped float16, so
+    `store[utterance]` returns the (frames x columns) slice without copying.
+    """
+
+    def __init__(self, store_path):
+        with open(store_path + META_SUFFIX, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.index = pd.read_csv(
+            store_path + INDEX_SUFFIX, dtype={"utterance": str}
+        ).set_index("utterance")
+        n_columns = len(self.meta["columns"])
+        if os.path.getsize(store_path) == 0:
+            self.rows = np.zeros((0, n_columns), dtype=FEATURE_DTYPE)
+        else:
+            self.rows = np.memmap(store_path, dtype=FEATURE_DTYPE, mode="r").reshape(
+                -1, n_columns
+            )
+        end = self.index["offset"] + self.index["frames"]
+        if len(end) and end.max() > len(self.rows):
+            raise ValueError(
+                f"{store_path} has {len(self.rows)} rows, its index needs "
+                f"{end.max()}; run write_features again"
+            )
+        self._offsets = self.index["offset"].to_dict()
+        self._frames = self.index["frames"].to_dict()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, utterance):
+        return utterance in self._offsets
+
+    def __getitem__(self, utterance):
+        offset = self._offsets[utterance]
+        return self.rows[offset : offset + self._frames[utterance]]
+
+    def energy_db(self, utterance):
+        return self[utterance][:, 0]
+
+    def speech_mask(self, utterance):
+        return self[utterance][:, 1] > 0
+
+    def log_mel(self, utterance):
+        if not self.meta["n_mels"]:
+            raise ValueError("Store was written without log-mel features")
+        return self[utterance][:, 2:]
+
+
+def load_speech_durations(store_paths):
+    """Returns utterance id -> speech_sec from the indexes of feature stores"""
+    frames = []
+    for path in store_paths:
+        if not os.path.exists(path + INDEX_SUFFIX):
+            print(f"⚠️ Missing feature store: {path}")
+            continue
+        frames.append(
+            pd.read_csv(
+                path + INDEX_SUFFIX,
+                usecols=["utterance", "speech_sec"],
+                dtype={"utterance": str},
+            )
+        )
+    if not frames:
+        return pd.Series(dtype=float, name="speech_sec")
+    speech = pd.concat(frames, ignore_index=True).drop_duplicates("utterance")
+    return speech.set_index("utterance")["speech_sec"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Speech activity, SNR and optional log-mel features per clip"
+    )
+    parser.add_argument("--input", required=True, help="Folder with copied audio")
+    parser.add_argument("--subset", required=True, help="Subset CSV file")
+    parser.add_argument("--output", required=True, help="Feature store file")
+    parser.add_argument(
+        "--mels", type=int, default=0, help="Log-mel bins, e.g. 80 (0 = none)"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute all clips")
+    args = parser.parse_args()
+
+    write_features(
+        args.input,
+        args.subset,
+        args.output,
+        n_mels=args.mels,
+        workers=args.workers,
+        rebuild=args.rebuild,
+    )
@@ -0,0 +1,279 @@
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tqdm import tqdm
+
+# MPEG audio header lookup tables, indexed by the raw bit fields of the header
+MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+MPEG_LAYERS = {1: 3, 2: 2, 3: 1}
+MPEG_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+MPEG_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# How far into the file we look for the first MPEG frame (after ID3v2 tags)
+MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+
+class ProbeError(Exception):
+    """Raised when an audio header cannot be found or parsed"""
+
+
+def _id3v2_size(header):
+    """Total size of the ID3v2 tag starting with the 10 `header` bytes, or
+    None if they do not start a tag"""
+    if len(header) < 10 or header[:3] != b"ID3":
+        return None
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    if header[5] & 0x10:  # footer present
+        size += 10
+    return 10 + size
+
+
+def _skip_id3v2(fileobj):
+    """Skips (possibly stacked) ID3v2 tags, returns offset of the audio data"""
+    offset = fileobj.tell()
+    while True:
+        size = _id3v2_size(fileobj.read(10))
+        if size is None:
+            fileobj.seek(offset)
+            return offset
+        offset += size
+        fileobj.seek(offset)
+
+
+def _parse_mpeg_header(data):
+    """Returns frame parameters for a 4-byte MPEG audio header or None"""
+    if len(data) < 4 or data[0] != 0xFF or (data[1] & 0xE0) != 0xE0:
+        return None
+
+    version = MPEG_VERSIONS.get((data[1] >> 3) & 0x03)
+    layer = MPEG_LAYERS.get((data[1] >> 1) & 0x03)
+    bitrate_idx = data[2] >> 4
+    rate_idx = (data[2] >> 2) & 0x03
+    if version is None or layer is None or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    bitrate = MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version][rate_idx]
+    padding = (data[2] >> 1) & 0x01
+    mono = (data[3] >> 6) == 3
+
+    if layer == 1:
+        # Layer I frames are 12 slots of 4 bytes per 384 samples
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "mono": mono,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length,
+    }
+
+
+def _vbr_frame_count(frame, header):
+    """Reads the frame count (minus LAME delay/padding in samples) from a
+    Xing/Info or VBRI header inside the first frame. Returns None for CBR
+    streams without such a header."""
+    if frame["layer"] != 3:
+        return None
+
+    if frame["version"] == 1:
+        xing_offset = 4 + (17 if frame["mono"] else 32)
+    else:
+        xing_offset = 4 + (9 if frame["mono"] else 17)
+
+    xing = header[xing_offset:]
+    if xing[:4] in (b"Xing", b"Info") and len(xing) >= 8:
+        flags = struct.unpack(">I", xing[4:8])[0]
+        if not flags & 0x1:
+            return None
+        frames = struct.unpack(">I", xing[8:12])[0]
+        pos = 12
+        if flags & 0x2:
+            pos += 4
+        if flags & 0x4:
+            pos += 100
+        if flags & 0x8:
+            pos += 4
+
+        samples = frames * frame["samples_per_frame"]
+        lame = xing[pos : pos + 24]
+        if len(lame) == 24 and lame[:4] == b"LAME":
+            delay = (lame[21] << 4) | (lame[22] >> 4)
+            padding = ((lame[22] & 0x0F) << 8) | lame[23]
+            samples = max(0, samples - delay - padding)
+        return samples
+
+    vbri = header[4 + 32 :]
+    if vbri[:4] == b"VBRI" and len(vbri) >= 18:
+        frames = struct.unpack(">I", vbri[14:18])[0]
+        return frames * frame["samples_per_frame"]
+
+    return None
+
+
+def probe_mp3(fileobj, size=None):
+    """Returns duration (seconds) of an MP3 stream by reading only the
+    frame headers: Xing/Info/VBRI frame count when present, otherwise
+    the first frame's bitrate and the stream size (CBR)."""
+    if size is None:
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+    fileobj.seek(0)
+
+    audio_start = _skip_id3v2(fileobj)
+    data = fileobj.read(MP3_SYNC_SEARCH_BYTES)
+
+    pos = data.find(b"\xff")
+    while 0 <= pos < len(data) - 4:
+        frame = _parse_mpeg_header(data[pos : pos + 4])
+        if frame is not None:
+            # Require the next frame to line up so a stray 0xFFE in the
+            # stream is not mistaken for a sync word
+            next_pos = pos + frame["frame_length"]
+            following = _parse_mpeg_header(data[next_pos : next_pos + 4])
+            if following is not None or next_pos >= len(data) - 4:
+                break
+        pos = data.find(b"\xff", pos + 1)
+    else:
+        raise ProbeError("no MPEG frame header found")
+
+    samples = _vbr_frame_count(frame, data[pos : pos + 256])
+    if samples is not None:
+        return samples / frame["sample_rate"]
+
+    audio_bytes = size - (audio_start + pos)
+    fileobj.seek(max(0, size - 128))
+    if fileobj.read(3) == b"TAG":  # ID3v1 tag at the end
+        audio_bytes -= 128
+    return max(0, audio_bytes) * 8 / frame["bitrate"]
+
+
+def probe_flac(fileobj, size=None):
+    """Returns duration (seconds) of a FLAC stream from its STREAMINFO block"""
+    fileobj.seek(0)
+    _skip_id3v2(fileobj)
+
+    if fileobj.read(4) != b"fLaC":
+        raise ProbeError("missing fLaC marker")
+    block_header = fileobj.read(4)
+    if len(block_header) < 4 or (block_header[0] & 0x7F) != 0:
+        raise ProbeError("first metadata block is not STREAMINFO")
+
+    info = fileobj.read(34)
+    if len(info) < 34:
+        raise ProbeError("truncated STREAMINFO block")
+
+    # 20 bits sample rate | 3 bits channels | 5 bits bps | 36 bits total samples
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if sample_rate == 0:
+        raise ProbeError("invalid sample rate in STREAMINFO")
+    return total_samples / sample_rate
+
+
+PROBERS = {
+    ".flac": probe_flac,
+    ".mp3": probe_mp3,
+}
+
+
+def probe_duration(path):
+    """Returns duration (seconds) of a FLAC or MP3 file without decoding it"""
+    prober = PROBERS.get(os.path.splitext(path)[1].lower())
+    if prober is None:
+        raise ProbeError(f"unsupported audio format: {path}")
+    with open(path, "rb") as f:
+        return prober(f, size=os.fstat(f.fileno()).st_size)
+
+
+def _probe_safe(path):
+    try:
+        return probe_duration(path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _probe_parallel(paths, workers, use_processes, desc):
+    if not paths:
+        return []
+
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 8))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        chunksize = 1
+
+    with executor:
+        results = executor.map(_probe_safe, paths, chunksize=chunksize)
+        return list(tqdm(results, total=len(paths), desc=desc))
+
+
+def probe_durations(
+    paths, workers=None, use_processes=False, desc="Probing audio", cache=None
+):
+    """
+    Reads durations of many audio files in parallel.
+
+    Header reads are I/O bound, so a thread pool is used by default;
+    `use_processes=True` switches to a process pool for slow network
+    filesystems where parsing in one interpreter becomes the bottleneck.
+    When a `DurationCache` is given, only files missing from it (or changed
+    since they were cached) are probed and hit/miss counts are printed.
+
+    Returns a list of (duration_sec, error) tuples in the order of `paths`,
+    where exactly one of the two is None.
+    """
+    paths = list(paths)
+    if cache is None:
+        return _probe_parallel(paths, workers, use_processes, desc)
+
+    results = [None] * len(paths)
+    pending = []
+    for i, path in enumerate(paths):
+        try:
+            key = cache.key(path)
+        except OSError as e:
+            results[i] = (None, str(e))
+            continue
+        duration = cache.get(key)
+        if duration is None:
+            pending.append((i, key))
+        else:
+            results[i] = (duration, None)
+
+    probed = _probe_parallel(
+        [paths[i] for i, _ in pending], workers, use_processes, desc
+    )
+
+    new_entries = []
+    for (i, key), (duration, error) in zip(pending, probed):
+        results[i] = (duration, error)
+        if error is None:
+            new_entries.append((key, duration))
+    cache.put_many(new_entries)
+
+    cache.report()
+    return results
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+COPY_MODES = ["copy", "hardlink", "reflink"]
+MANIFEST_NAME = "copy_manifest.jsonl"
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src, dest):
+    """Copies via copy_file_range, which lets filesystems such as btrfs or
+    XFS share extents instead of duplicating data"""
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src, dest)
+
+
+def _link_or_copy(src, dest, mode):
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass  # different filesystem or links unsupported
+    elif mode == "reflink" and hasattr(os, "copy_file_range"):
+        try:
+            _reflink(src, dest)
+            return "reflink"
+        except OSError:
+            pass
+
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def _transfer(src, dest, mode):
+    """Transfers into a temporary file next to `dest` and renames it, so an
+    existing `dest` is only replaced once the new file is complete"""
+    tmp_path = dest + ".tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        method = _link_or_copy(src, tmp_path, mode)
+        os.replace(tmp_path, dest)
+    finally:
+        # Also left behind when both were hard links to the same file, as
+        # rename then does nothing
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    return method
+
+
+def load_copy_manifest(manifest_path):
+    """Returns dest path -> manifest entry for completed copies"""
+    entries = {}
+    if not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # truncated last line after a crash
+            entries[entry["dest"]] = entry
+    return entries
+
+
+def _is_done(entry, src, dest):
+    if entry is None:
+        return False
+    try:
+        src_stat, dest_stat = os.stat(src), os.stat(dest)
+    except OSError:
+        return False
+    return (
+        entry["size"] == src_stat.st_size == dest_stat.st_size
+        and entry["src_mtime_ns"] == src_stat.st_mtime_ns
+    )
+
+
+def copy_files(pairs, mode="copy", workers=8, manifest_path=None, verify=False):
+    """
+    Copies (src, dest) pairs with a thread pool.
+
+    `mode` is "copy", "hardlink" or "reflink"; links fall back to a regular
+    copy when source and destination are on different filesystems. Every
+    finished file is appended to a JSON-lines manifest with its SHA-256, so
+    an interrupted run resumes by skipping files already recorded there
+    (`verify=True` also re-hashes them).
+
+    Returns a list of (dest, error) tuples in the order of `pairs`; error is
+    None on success or the raised exception.
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode {mode!r}, expected one of {COPY_MODES}")
+
+    done = load_copy_manifest(manifest_path) if manifest_path else {}
+    lock = threading.Lock()
+    manifest = open(manifest_path, "a", encoding="utf-8") if manifest_path else None
+    skipped = 0
+
+    def run(pair):
+        nonlocal skipped
+        src, dest = pair
+        entry = done.get(dest)
+        if _is_done(entry, src, dest) and (
+            not verify or file_checksum(dest) == entry["sha256"]
+        ):
+            with lock:
+                skipped += 1
+            return dest, None
+        try:
+            method = _transfer(src, dest, mode)
+            record = {
+                "src": src,
+                "dest": dest,
+                "size": os.path.getsize(src),
+                "src_mtime_ns": os.stat(src).st_mtime_ns,
+                "sha256": file_checksum(dest),
+                "method": method,
+            }
+        except Exception as e:
+            return dest, e
+        if manifest is not None:
+            with lock:
+                manifest.write(json.dumps(record) + "\n")
+                manifest.flush()
+        return dest, None
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                tqdm(executor.map(run, pairs), total=len(pairs), desc="Copying")
+            )
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    if skipped:
+        print(f"Resumed: {skipped} files already copied according to manifest")
+    return results
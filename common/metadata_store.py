@@ -0,0 +1,114 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Low-cardinality text columns, stored dictionary-encoded
+CATEGORICAL_COLUMNS = ["gender", "age", "locale", "sex", "duration_cat", "accents"]
+# Long or repeated identifiers, stored as int32 codes plus a side dictionary
+ID_COLUMNS = ["client_id", "speaker_id", "chapter_id"]
+FLOAT32_COLUMNS = ["duration_sec", "duration_min"]
+IDS_SUFFIX = ".ids.parquet"
+
+# How the CSVs are read, so ids keep their leading zeros
+CSV_DTYPES = {column: str for column in ID_COLUMNS + CATEGORICAL_COLUMNS}
+
+
+def to_typed(df):
+    """Converts metadata columns to categoricals and float32 in place"""
+    for column in df.columns.intersection(CATEGORICAL_COLUMNS + ID_COLUMNS):
+        df[column] = df[column].astype("category")
+    for column in df.columns.intersection(FLOAT32_COLUMNS):
+        df[column] = df[column].astype(np.float32)
+    return df
+
+
+def _ids_path(path):
+    return os.path.splitext(path)[0] + IDS_SUFFIX
+
+
+def save_metadata(df, path):
+    """
+    Writes a metadata DataFrame as typed Parquet.
+
+    Id columns are replaced by int32 codes and their distinct values go to
+    a side dictionary (<name>.ids.parquet with column/code/value rows), so
+    e.g. 128-character client ids are stored once per speaker.
+    """
+    df = to_typed(df.copy())
+    dictionaries = []
+    for column in df.columns.intersection(ID_COLUMNS):
+        values = df[column].cat.categories.astype(str)
+        dictionaries.append(
+            pd.DataFrame(
+                {
+                    "column": column,
+                    "code": np.arange(len(values), dtype=np.int32),
+                    "value": values,
+                }
+            )
+        )
+        df[column] = df[column].cat.codes.astype(np.int32)
+
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+    if dictionaries:
+        ids = pd.concat(dictionaries, ignore_index=True)
+        ids["column"] = ids["column"].astype("category")
+        pq.write_table(pa.Table.from_pandas(ids, preserve_index=False), _ids_path(path))
+
+
+def load_metadata(path, columns=None, decode_ids=True):
+    """
+    Loads corpus metadata written by save_metadata, or a CSV.
+
+    Only `columns` are read from Parquet. Id columns come back as
+    categoricals of the original strings, or as the raw int32 codes with
+    decode_ids=False. CSVs are converted to the same dtypes.
+    """
+    if path.endswith(".csv"):
+        usecols = None if columns is None else lambda c: c in columns
+        return to_typed(pd.read_csv(path, usecols=usecols, dtype=CSV_DTYPES))
+
+    df = pq.read_table(path, columns=columns).to_pandas()
+    id_columns = list(df.columns.intersection(ID_COLUMNS))
+    if decode_ids and id_columns:
+        ids = pq.read_table(
+            _ids_path(path), filters=[("column", "in", id_columns)]
+        ).to_pandas()
+        for column, values in ids.groupby("column", observed=True):
+            categories = values.sort_values("code")["value"].to_numpy()
+            df[column] = pd.Categorical.from_codes(df[column], categories)
+    return df
+
+
+def import_csv(csv_path, path=None):
+    """Converts a metadata CSV to typed Parquet next to it"""
+    path = path or os.path.splitext(csv_path)[0] + ".parquet"
+    save_metadata(load_metadata(csv_path), path)
+    return path
+
+
+def export_csv(path, csv_path=None):
+    """Writes typed Parquet metadata back to CSV"""
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    load_metadata(path).to_csv(csv_path, index=False)
+    return csv_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert corpus metadata between CSV and typed Parquet"
+    )
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("input", help="CSV to import or Parquet to export")
+    parser.add_argument("--output", default=None, help="Output path")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        output = import_csv(args.input, args.output)
+    else:
+        output = export_csv(args.input, args.output)
+    print(f"✅ Saved {output}")
@@ -0,0 +1,19 @@
+import os
+from collections import deque
+
+
+def bounded_submit(executor, fn, items, workers=None):
+    """
+    Submits `fn(*item)` for every item and yields (item, future) in input
+    order, keeping at most twice the number of workers in flight. Results
+    that finish early wait in their futures, so memory holds a bounded
+    number of them instead of one per item.
+    """
+    window = 2 * (workers or os.cpu_count() or 1)
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, *item)))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
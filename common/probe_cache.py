@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+
+class DurationCache:
+    """
+    On-disk cache of probed audio durations.
+
+    Entries are keyed by the path relative to the cache file's folder and
+    invalidated whenever the file size or modification time changes, so a
+    re-scan only probes new or modified files. Keeping relative paths lets
+    the corpus and its cache be moved together without losing entries.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.root_dir = os.path.dirname(os.path.abspath(cache_path))
+        self._prefix = os.path.join(self.root_dir, "")
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(cache_path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS durations (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                duration_sec REAL NOT NULL
+            )""")
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            rows = self.conn.execute(
+                "SELECT path, size, mtime_ns, duration_sec FROM durations"
+            )
+            self._entries = {
+                path: (size, mtime, dur) for path, size, mtime, dur in rows
+            }
+        return self._entries
+
+    def key(self, path):
+        """Returns (relative path, size, mtime_ns) for a file, raises OSError
+        if it does not exist"""
+        st = os.stat(path)
+        abs_path = os.path.abspath(path)
+        if abs_path.startswith(self._prefix):
+            rel_path = abs_path[len(self._prefix) :]
+        else:
+            rel_path = os.path.relpath(abs_path, self.root_dir)
+        return rel_path.replace(os.sep, "/"), st.st_size, st.st_mtime_ns
+
+    def get(self, key):
+        """Returns cached duration for a key from `key()` or None"""
+        rel_path, size, mtime_ns = key
+        entry = self._load().get(rel_path)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put_many(self, items):
+        """Stores (key, duration_sec) pairs"""
+        rows = [(k[0], k[1], k[2], duration) for k, duration in items]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?)", rows
+            )
+        entries = self._load()
+        for rel_path, size, mtime_ns, duration in rows:
+            entries[rel_path] = (size, mtime_ns, duration)
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        print(
+            f"Duration cache: {self.hits} hits, {self.misses} misses "
+            f"({rate:.1f}% hit rate) in {self.cache_path}"
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
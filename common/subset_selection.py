@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+DURATION_BINS = [0, 5, 10, float("inf")]
+DURATION_LABELS = ["short", "medium", "long"]
+
+
+def add_duration_columns(df):
+    """Adds duration_min and duration_cat (short/medium/long) columns"""
+    df["duration_min"] = df["duration_sec"] / 60
+    df["duration_cat"] = pd.cut(
+        df["duration_sec"], bins=DURATION_BINS, labels=DURATION_LABELS
+    )
+    return df
+
+
+def select_duration_budget(
+    df,
+    group_weights,
+    group_cols,
+    target_minutes=30,
+    tolerance_sec=5.0,
+    random_state=42,
+):
+    """
+    Selects a random subset whose total duration_sec hits `target_minutes`
+    within `tolerance_sec`, with the budget split across strata by weight.
+
+    `group_weights` maps stratum tuples (values of `group_cols`) to their
+    share of the total duration. Rows are shuffled, and each row is keyed by
+    how far into its stratum's budget it starts (within-stratum cumulative
+    duration / stratum budget). Taking rows in key order fills all strata at
+    the same relative pace. Clips longer than their stratum's whole budget
+    (plus the tolerance) are never taken. The cut is then made where the
+    overall cumulative duration is closest to the target. Strata that run
+    out of clips leave their budget to the others. If the cut still misses
+    the tolerance, the boundary clip is swapped for a later one of the right
+    length.
+
+    The tolerance is best-effort: when no swap gets within it (e.g. too few
+    clips), a warning with the reached total is printed.
+
+    Everything is groupby/cumsum/searchsorted, so this scales to
+    full-corpus metadata.
+    """
+    target_sec = target_minutes * 60
+    weights = pd.Series(
+        list(group_weights.values()),
+        index=pd.MultiIndex.from_tuples(list(group_weights), names=group_cols),
+    )
+
+    keys = pd.MultiIndex.from_frame(df[group_cols].astype(object))
+    row_weights = weights.reindex(keys).to_numpy(dtype=float)
+    pool = df[np.nan_to_num(row_weights) > 0]
+    row_weights = row_weights[np.nan_to_num(row_weights) > 0]
+    if pool.empty:
+        return pool.copy()
+
+    # Normalize weights over strata that are actually present
+    present = pd.MultiIndex.from_frame(pool[group_cols].astype(object)).unique()
+    budgets = row_weights / weights.reindex(present).sum() * target_sec
+
+    # A clip that alone overshoots its stratum would push the total past the
+    # target whenever it is drawn early
+    fits_budget = pool["duration_sec"].to_numpy(dtype=float) <= budgets + tolerance_sec
+    pool, budgets = pool[fits_budget], budgets[fits_budget]
+    if pool.empty:
+        print(f"⚠️ No clip fits the {target_minutes} min budget of its group")
+        return pool.copy()
+
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(len(pool))
+    pool = pool.iloc[order]
+    budgets = budgets[order]
+
+    # float64 sums: typed metadata stores durations as float32
+    durations = pool["duration_sec"].to_numpy(dtype=float)
+    start_in_stratum = (
+        pool["duration_sec"]
+        .astype(float)
+        .groupby([pool[c] for c in group_cols], observed=True, sort=False)
+        .cumsum()
+        .to_numpy()
+        - durations
+    )
+    fill_key = start_in_stratum / budgets
+
+    by_key = np.argsort(fill_key, kind="stable")
+    cumulative = np.cumsum(durations[by_key])
+
+    # Prefix length whose total is closest to the target
+    n = int(np.searchsorted(cumulative, target_sec))
+    if n < len(cumulative) and (
+        n == 0 or cumulative[n] - target_sec < target_sec - cumulative[n - 1]
+    ):
+        n += 1
+    chosen = by_key[:n]
+
+    total = cumulative[n - 1] if n else 0.0
+    if abs(total - target_sec) > tolerance_sec and n > 0:
+        # Replace the boundary clip with the first later one that fits
+        needed = target_sec - (total - durations[by_key[n - 1]])
+        rest = by_key[n:]
+        fits = np.flatnonzero(np.abs(durations[rest] - needed) <= tolerance_sec)
+        if fits.size:
+            chosen = np.concatenate([by_key[: n - 1], rest[fits[:1]]])
+            total = total - durations[by_key[n - 1]] + durations[rest[fits[0]]]
+    if abs(total - target_sec) > tolerance_sec:
+        print(
+            f"⚠️ Selected {total:.1f} s, more than {tolerance_sec:g} s away "
+            f"from the {target_sec:g} s target"
+        )
+
+    subset = pool.iloc[np.sort(chosen)]
+    return subset.sample(frac=1, random_state=random_state)
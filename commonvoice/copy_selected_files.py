@@ -1,39 +1,52 @@
 import os
-import shutil
+import sys
 import pandas as pd
 import argparse
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.copy_engine import COPY_MODES, MANIFEST_NAME, copy_files
+
 
 def process_commonvoice_subset(
-    input_folder, subset_csv, output_folder, save_transcripts=True
+    input_folder,
+    subset_csv,
+    output_folder,
+    save_transcripts=True,
+    mode="copy",
+    workers=8,
 ):
     """Copy audio files listed in Common Voice subset CSV to output folder,
-    optionally save combined transcripts file."""
+    optionally save combined transcripts file. `mode` selects copy, hardlink
+    or reflink; interrupted runs resume from the copy manifest."""
 
     subset = pd.read_csv(subset_csv)
     os.makedirs(output_folder, exist_ok=True)
 
+    audio_src = input_folder + os.sep + subset["filename"]
+    audio_dest = output_folder + os.sep + subset["filename"]
+    results = copy_files(
+        list(zip(audio_src, audio_dest)),
+        mode=mode,
+        workers=workers,
+        manifest_path=os.path.join(output_folder, MANIFEST_NAME),
+    )
+
+    sentences = subset["sentence"] if "sentence" in subset else [""] * len(subset)
     transcriptions = []
     copied_files = 0
 
-    for _, row in subset.iterrows():
-        filename = row["filename"]
-        audio_src = os.path.join(input_folder, filename)
-        audio_dest = os.path.join(output_folder, filename)
-
-        try:
-            shutil.copy2(audio_src, audio_dest)
+    for filename, src, sentence, (_, error) in zip(
+        subset["filename"], audio_src, sentences, results
+    ):
+        if isinstance(error, FileNotFoundError):
+            print(f"⚠️ Missing file: {src}")
+        elif error is not None:
+            print(f"⚠️ Error copying {filename}: {str(error)}")
+        else:
             copied_files += 1
-
             if save_transcripts:
-                sentence = row.get("sentence", "")
                 transcriptions.append(f"{filename}\t{sentence}")
 
-        except FileNotFoundError:
-            print(f"⚠️ Missing file: {audio_src}")
-        except Exception as e:
-            print(f"⚠️ Error copying {filename}: {str(e)}")
-
     if save_transcripts:
         transcript_path = os.path.join(output_folder, "combined_transcriptions.tsv")
         with open(transcript_path, "w", encoding="utf-8") as f:
@@ -60,6 +73,10 @@ if __name__ == "__main__":
         action="store_true",
         help="Do not save combined transcripts file",
     )
+    parser.add_argument(
+        "--mode", choices=COPY_MODES, default="copy", help="How files are transferred"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Copy threads")
 
     args = parser.parse_args()
 
@@ -68,4 +85,6 @@ if __name__ == "__main__":
         subset_csv=args.subset,
         output_folder=args.output,
         save_transcripts=not args.no_transcripts,
+        mode=args.mode,
+        workers=args.workers,
     )
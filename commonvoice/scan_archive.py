@@ -0,0 +1,174 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import MP3_SYNC_SEARCH_BYTES, _id3v2_size, probe_mp3
+from commonvoice.scan_metadata_commonvoice import read_matching_metadata
+from commonvoice.select_CV_subset import select_balanced_subset
+
+# Metadata member read from the archive when no TSV is given
+TSV_MEMBER = "validated.tsv"
+
+
+def _read_head(fileobj):
+    """Reads the ID3v2 tags and the frame sync search window of an MP3 -
+    everything probe_mp3 looks at except the ID3v1 tail"""
+    head = b""
+    while True:
+        header = fileobj.read(10)
+        head += header
+        size = _id3v2_size(header)
+        if size is None:
+            break
+        head += fileobj.read(size - 10)
+    return head + fileobj.read(MP3_SYNC_SEARCH_BYTES)
+
+
+def _iter_members(archive_path, desc, names=()):
+    """Streams (member, fileobj) for every .mp3 in a .tar/.tar.gz/.tar.bz2
+    and for members whose base name is in `names`. The archive is read
+    sequentially, so memory does not grow with it."""
+    with tarfile.open(archive_path, mode="r|*") as tar:
+        for member in tqdm(tar, desc=desc, unit=" members"):
+            if not member.isfile():
+                continue
+            if member.name.endswith(".mp3") or os.path.basename(member.name) in names:
+                yield member, tar.extractfile(member)
+
+
+def scan_archive(archive_path, metadata_path=None, tsv_member=TSV_MEMBER):
+    """
+    Scans a Common Voice release archive without extracting it.
+
+    Each clip's duration is read from the header bytes of the archive
+    member (the rest of the member is skipped), then the clips are joined
+    with the rows of `metadata_path`. Without it the `tsv_member` TSV is
+    taken from the same stream; as it can come before the clips, it is
+    copied to a temporary file and filtered in chunks once all clips are
+    known. Returns the same columns as scan_commonvoice.
+    """
+    names = () if metadata_path else (tsv_member,)
+    filenames, durations = [], []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tsv_copy = os.path.join(tmp_dir, tsv_member)
+        members = _iter_members(archive_path, "Scanning archive", names)
+        for member, fileobj in members:
+            filename = os.path.basename(member.name)
+            if filename == tsv_member and not member.name.endswith(".mp3"):
+                if not os.path.exists(tsv_copy):
+                    with open(tsv_copy, "wb") as f:
+                        shutil.copyfileobj(fileobj, f)
+                continue
+            try:
+                # The ID3v1 tail is not read, which can add 128 bytes of
+                # CBR audio (~8 ms) to the duration
+                head = io.BytesIO(_read_head(fileobj))
+                duration = probe_mp3(head, size=member.size)
+            except Exception as e:
+                print(f"Error with {filename}: {e}")
+                continue
+            filenames.append(filename)
+            durations.append(duration)
+
+        if metadata_path is None:
+            if not os.path.exists(tsv_copy):
+                raise ValueError(
+                    f"No {tsv_member} in {archive_path}, pass the TSV path"
+                )
+            metadata_path = tsv_copy
+        meta = read_matching_metadata(metadata_path, set(filenames))
+    data = pd.DataFrame({"filename": filenames, "duration_sec": durations})
+    missing = ~data["filename"].isin(meta.index)
+    if missing.any():
+        print(f"⚠️ {missing.sum()} clips have no metadata row, skipping them")
+        data = data[~missing]
+
+    meta = meta.reindex(data["filename"])
+    for column in ["client_id", "sentence", "age", "gender", "locale"]:
+        data[column] = meta[column].to_numpy() if column in meta else ""
+    columns = ["filename", "client_id", "sentence", "age", "gender", "locale"]
+    return data[columns + ["duration_sec"]].reset_index(drop=True)
+
+
+def extract_selected(archive_path, subset, output_folder, save_transcripts=True):
+    """
+    Extracts only the clips listed in `subset` (a DataFrame with filename
+    and sentence columns) from the archive into a flat `output_folder`,
+    like process_commonvoice_subset does from an unpacked folder.
+
+    Clips already present with the right size are kept, and the stream
+    stops as soon as all clips have been found.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    wanted = set(subset["filename"])
+    found = set()
+
+    for member, fileobj in _iter_members(archive_path, "Extracting"):
+        filename = os.path.basename(member.name)
+        if filename not in wanted or filename in found:
+            continue
+        dest = os.path.join(output_folder, filename)
+        if not (os.path.exists(dest) and os.path.getsize(dest) == member.size):
+            with open(dest + ".tmp", "wb") as f:
+                shutil.copyfileobj(fileobj, f)
+            os.replace(dest + ".tmp", dest)
+        found.add(filename)
+        if len(found) == len(wanted):
+            break
+
+    for filename in sorted(wanted - found):
+        print(f"⚠️ Missing file: {filename}")
+
+    if save_transcripts:
+        copied = subset[subset["filename"].isin(found)]
+        sentences = copied["sentence"] if "sentence" in copied else [""] * len(copied)
+        transcript_path = os.path.join(output_folder, "combined_transcriptions.tsv")
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            f.write(
+                "\n".join(f"{n}\t{s}" for n, s in zip(copied["filename"], sentences))
+            )
+        print(f"Saved combined transcripts to {transcript_path}")
+
+    print(f"\n✅ Successfully extracted {len(found)}/{len(wanted)} files")
+    print(f"Output folder: {os.path.abspath(output_folder)}")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scan a Common Voice archive, select a subset and extract it"
+    )
+    parser.add_argument("--archive", required=True, help=".tar/.tar.gz release")
+    parser.add_argument(
+        "--metadata",
+        default=None,
+        help=f"TSV next to the archive (default: {TSV_MEMBER} inside it)",
+    )
+    parser.add_argument(
+        "--output", default="commonvoice_selected_audio", help="Output folder"
+    )
+    parser.add_argument("--target-minutes", type=float, default=30, help="Subset size")
+    args = parser.parse_args()
+
+    print("[1/3] Scanning Common Voice archive...")
+    df = scan_archive(args.archive, args.metadata)
+    df.to_csv("commonvoice_with_durations.csv", index=False)
+    print("Saved full metadata to 'commonvoice_with_durations.csv'")
+
+    print("\n[2/3] Selecting balanced subset...")
+    subset = select_balanced_subset(df, target_minutes=args.target_minutes)
+    subset.drop(columns=["duration_min"]).to_csv(
+        "commonvoice_selected_subset.csv", index=False
+    )
+    print(f"Selected {len(subset)} clips, {subset['duration_min'].sum():.2f} minutes")
+
+    print("\n[3/3] Extracting selected clips...")
+    extract_selected(args.archive, subset, args.output)
@@ -1,10 +1,17 @@
+import csv
 import os
+import sys
 from pydub.utils import mediainfo
 from tqdm import tqdm
 import pandas as pd
 
 from mutagen.mp3 import MP3
-import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import probe_durations
+from common.probe_cache import DurationCache
+
+METADATA_COLUMNS = ["path", "client_id", "sentence", "age", "gender", "locale"]
 
 
 def get_mp3_duration(file_path):
@@ -12,45 +19,76 @@ def get_mp3_duration(file_path):
     return audio.info.length
 
 
-def scan_mp3_with_metadata(audio_dir, meta_df):
-    data = []
+def read_matching_metadata(meta, filenames, chunksize=100_000):
+    """
+    Returns metadata rows whose `path` is in `filenames` (all rows if it is
+    None), indexed by path.
+
+    `meta` is either a DataFrame or a path or binary file object of a Common
+    Voice TSV. TSVs are read in chunks with only the needed columns, so
+    memory depends on the number of matched clips rather than the size of
+    e.g. validated.tsv.
+    """
+    if isinstance(meta, pd.DataFrame):
+        chunks = [meta]
+    else:
+        chunks = pd.read_csv(
+            meta,
+            sep="\t",
+            usecols=lambda c: c in METADATA_COLUMNS,
+            dtype=str,
+            quoting=csv.QUOTE_NONE,  # sentences contain unbalanced quotes
+            chunksize=chunksize,
+        )
+
+    matched = []
+    for chunk in tqdm(chunks, desc="Reading metadata", unit="chunk"):
+        matched.append(
+            chunk if filenames is None else chunk[chunk["path"].isin(filenames)]
+        )
+
+    matched = pd.concat(matched, ignore_index=True)
+    # Keep the first row for duplicated paths, as the per-file lookup did
+    return matched.drop_duplicates("path").set_index("path")
+
 
-    for file in tqdm(os.listdir(audio_dir)):
-        if file.endswith(".mp3"):
-            full_path = os.path.join(audio_dir, file)
+def scan_mp3_with_metadata(
+    audio_dir, meta_df, workers=None, cache_path="duration_cache.sqlite"
+):
+    """Matches .mp3 files in `audio_dir` with their metadata rows
+    (`meta_df` can also be a path to the TSV) and adds durations"""
+    files = [f for f in os.listdir(audio_dir) if f.endswith(".mp3")]
 
-            # try:
-            # Get duration
-            duration = get_mp3_duration(full_path)
+    meta = read_matching_metadata(meta_df, set(files))
+    for file in files:
+        if file not in meta.index:
+            print(f"⚠️ Metadata not found for {file}")
 
-            # Match metadata
-            meta_row = meta_df[meta_df["path"] == file]
-            if meta_row.empty:
-                print(f"⚠️ Metadata not found for {file}")
-                continue
+    files = [f for f in files if f in meta.index]
+    paths = [os.path.join(audio_dir, f) for f in files]
+    if cache_path:
+        with DurationCache(cache_path) as cache:
+            results = probe_durations(paths, workers=workers, cache=cache)
+    else:
+        results = probe_durations(paths, workers=workers)
 
-            row = meta_row.iloc[0]
-            data.append(
-                {
-                    "filename": file,
-                    "client_id": row["client_id"],
-                    "sentence": row["sentence"],
-                    "age": row["age"],
-                    "gender": row["gender"],
-                    "locale": row["locale"],
-                    "duration_sec": duration,
-                }
-            )
+    matched = meta.reindex(files)
+    data = pd.DataFrame({"filename": files})
+    for column in METADATA_COLUMNS[1:]:
+        data[column] = matched[column].to_numpy() if column in matched else pd.NA
+    data["duration_sec"] = [duration for duration, _ in results]
 
-        #   except Exception as e:
-        #       print(f"Error with {file}: {e}")
+    for file, (_, error) in zip(files, results):
+        if error is not None:
+            print(f"Error with {file}: {error}")
 
-    return pd.DataFrame(data)
+    return data[[error is None for _, error in results]].reset_index(drop=True)
 
 
 if __name__ == "__main__":
     print("[1/3] Scanning dataset...")
-    df_meta = pd.read_csv("transcript_en_test.tsv", sep="\t")
-    final_df = scan_mp3_with_metadata(audio_dir="en_test_0", meta_df=df_meta)
+    final_df = scan_mp3_with_metadata(
+        audio_dir="en_test_0", meta_df="transcript_en_test.tsv"
+    )
     final_df.to_csv("cv_test_audio_metadata.csv", index=False)
     print("✅ Metadata matched and saved.")
@@ -1,61 +1,63 @@
 import os
+import sys
 import pandas as pd
-from pydub.utils import mediainfo
 from tqdm import tqdm
-import pandas as pd
-from mutagen.mp3 import MP3
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import probe_durations
+from common.probe_cache import DurationCache
+from common.subset_selection import add_duration_columns, select_duration_budget
 
 
 def get_mp3_duration(file_path):
+    from mutagen.mp3 import MP3
+
     audio = MP3(file_path)
     return audio.info.length
 
 
-def scan_commonvoice(audio_dir, metadata_path):
-    """Scans Common Voice .mp3 files and enriches with duration"""
+def scan_commonvoice(
+    audio_dir, metadata_path, workers=None, cache_path="duration_cache.sqlite"
+):
+    """Scans Common Voice .mp3 files and enriches with duration.
+    Durations are cached in `cache_path` (None disables the cache)."""
     df = pd.read_csv(metadata_path, sep="\t")
 
-    data = []
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Scanning audio"):
-        filename = row["path"]
-        full_path = os.path.join(audio_dir, filename)
-
-        if not os.path.exists(full_path):
-            print(f"Missing file: {filename}")
-            continue
-
-        try:
-            duration = get_mp3_duration(full_path)
-            data.append(
-                {
-                    "filename": filename,
-                    "client_id": row.get("client_id", ""),
-                    "sentence": row.get("sentence", ""),
-                    "age": row.get("age", ""),
-                    "gender": row.get("gender", ""),
-                    "locale": row.get("locale", ""),
-                    "duration_sec": duration,
-                }
-            )
-        except Exception as e:
-            print(f"Error with {filename}: {e}")
-
-    return pd.DataFrame(data)
-
-
-def select_balanced_subset(df, target_minutes=30):
-    """Selects a balanced gender/duration subset"""
+    full_paths = [os.path.join(audio_dir, filename) for filename in df["path"]]
+    exists = [os.path.exists(p) for p in tqdm(full_paths, desc="Scanning audio")]
+    for filename in df.loc[[not e for e in exists], "path"]:
+        print(f"Missing file: {filename}")
+    df = df[exists]
+
+    paths = [p for p, e in zip(full_paths, exists) if e]
+    if cache_path:
+        with DurationCache(cache_path) as cache:
+            results = probe_durations(paths, workers=workers, cache=cache)
+    else:
+        results = probe_durations(paths, workers=workers)
+
+    durations = [duration for duration, _ in results]
+    for filename, (_, error) in zip(df["path"], results):
+        if error is not None:
+            print(f"Error with {filename}: {error}")
+
+    data = pd.DataFrame({"filename": df["path"].to_numpy()})
+    for column in ["client_id", "sentence", "age", "gender", "locale"]:
+        data[column] = df[column].to_numpy() if column in df else ""
+    data["duration_sec"] = durations
+
+    return data[[error is None for _, error in results]].reset_index(drop=True)
+
+
+def select_balanced_subset(df, target_minutes=30, tolerance_sec=5.0):
+    """Selects a balanced gender/duration subset totalling target_minutes
+    (within tolerance_sec); group weights are shares of the duration budget"""
     df = df.copy()
     df = df[
         df["gender"].isin(["male_masculine", "female_feminine"])
     ]  # use only labeled genders
 
-    df["duration_min"] = df["duration_sec"] / 60
-    df["duration_cat"] = pd.cut(
-        df["duration_sec"],
-        bins=[0, 5, 10, float("inf")],
-        labels=["short", "medium", "long"],
-    )
+    add_duration_columns(df)
 
     # Distribution weights
     group_weights = {
@@ -67,19 +69,14 @@ def select_balanced_subset(df, target_minutes=30):
         ("male_masculine", "long"): 0.15,
     }
 
-    stratified = []
-    for (gender, dur_cat), weight in group_weights.items():
-        group = df[(df["gender"] == gender) & (df["duration_cat"] == dur_cat)]
-        sample_size = max(1, int(len(group) * weight))
-        if not group.empty:
-            stratified.append(
-                group.sample(min(sample_size, len(group)), random_state=42)
-            )
-
-    subset = pd.concat(stratified).sample(frac=1, random_state=42)
-    subset = subset.iloc[: int(target_minutes / subset["duration_min"].mean())]
-
-    return subset
+    return select_duration_budget(
+        df,
+        group_weights,
+        group_cols=["gender", "duration_cat"],
+        target_minutes=target_minutes,
+        tolerance_sec=tolerance_sec,
+        random_state=42,
+    )
 
 
 if __name__ == "__main__":
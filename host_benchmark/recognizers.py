@@ -0,0 +1,106 @@
+import importlib
+
+import numpy as np
+
+
+class Recognizer:
+    """
+    Streaming recognizer interface used by the replay harness.
+
+    `start` is called once per utterance, then `set_total` with its length
+    in samples, `accept` with every chunk of int16 samples (it returns the
+    current partial text, or None/"" if there is none yet) and `finish`
+    after the last chunk (it returns the final text).
+    Implementations may hold native models; one instance serves one stream
+    at a time.
+    """
+
+    name = "recognizer"
+
+    def start(self, sample_rate, reference=None):
+        pass
+
+    def set_total(self, total_samples):
+        pass
+
+    def accept(self, chunk):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+
+class DummyRecognizer(Recognizer):
+    """
+    Burns a fixed amount of NumPy work per chunk (windowed FFT frames, like
+    a feature frontend) and emits a token per second of audio, so throughput
+    and scaling can be measured without any model.
+    """
+
+    name = "dummy"
+
+    def __init__(self, frame=400, hop=160, repeats=4):
+        self.frame, self.hop, self.repeats = frame, hop, repeats
+        self.window = np.hanning(frame).astype(np.float32)
+
+    def start(self, sample_rate, reference=None):
+        self.sample_rate = sample_rate
+        self.seen = 0
+        self.tokens = []
+
+    def accept(self, chunk):
+        x = chunk.astype(np.float32) / 32767
+        if len(x) >= self.frame:
+            n = 1 + (len(x) - self.frame) // self.hop
+            idx = np.arange(self.frame) + self.hop * np.arange(n)[:, None]
+            for _ in range(self.repeats):
+                np.abs(np.fft.rfft(x[idx] * self.window, axis=1))
+        self.seen += len(chunk)
+        while len(self.tokens) < self.seen // self.sample_rate:
+            self.tokens.append(f"tok{len(self.tokens)}")
+        return " ".join(self.tokens)
+
+    def finish(self):
+        return " ".join(self.tokens)
+
+
+class EchoRecognizer(Recognizer):
+    """Returns the reference text, revealed in proportion to the audio
+    streamed so far (a zero-WER sanity check for the tooling)"""
+
+    name = "echo"
+
+    def start(self, sample_rate, reference=None):
+        self.words = (reference or "").split()
+        self.total = None
+        self.seen = 0
+
+    def set_total(self, total_samples):
+        self.total = total_samples
+
+    def accept(self, chunk):
+        self.seen += len(chunk)
+        if not self.total:
+            return None
+        n = len(self.words) * self.seen // self.total
+        return " ".join(self.words[:n])
+
+    def finish(self):
+        return " ".join(self.words)
+
+
+RECOGNIZERS = {"dummy": DummyRecognizer, "echo": EchoRecognizer}
+
+
+def load_recognizer(spec):
+    """Returns a recognizer factory: a built-in name (dummy, echo) or a
+    `module:Class` path to a Recognizer subclass"""
+    if spec in RECOGNIZERS:
+        return RECOGNIZERS[spec]
+    module, _, cls = spec.partition(":")
+    if not cls:
+        raise ValueError(
+            f"Unknown recognizer {spec!r}, expected one of "
+            f"{', '.join(RECOGNIZERS)} or module:Class"
+        )
+    return getattr(importlib.import_module(module), cls)
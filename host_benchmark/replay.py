@@ -0,0 +1,339 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_bundle import SAMPLE_RATE, AudioBundle
+from host_benchmark.recognizers import load_recognizer
+
+PROC = "/proc/self"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _set_thread_name(name):
+    """Names the OS thread (Linux), so it shows up in perName like the
+    app threads on the phones"""
+    try:
+        import ctypes
+
+        ctypes.CDLL(None).prctl(15, name.encode()[:15], 0, 0, 0)  # PR_SET_NAME
+    except (OSError, AttributeError):
+        pass
+
+
+def _thread_times():
+    """Returns {(tid, name): cpu seconds} for all threads of this process"""
+    times = {}
+    for tid in os.listdir(os.path.join(PROC, "task")):
+        try:
+            with open(os.path.join(PROC, "task", tid, "stat")) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces and is wrapped in parentheses
+        name = stat[stat.index("(") + 1 : stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2 :].split()
+        times[(tid, name)] = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return times
+
+
+def _core_times():
+    """Returns {core: (busy, total)} jiffies from /proc/stat"""
+    cores = {}
+    with open("/proc/stat") as f:
+        for line in f:
+            if line.startswith("cpu") and line[3].isdigit():
+                parts = line.split()
+                values = list(map(int, parts[1:]))
+                idle = values[3] + values[4]
+                cores[parts[0][3:]] = (sum(values) - idle, sum(values))
+    return cores
+
+
+def _rss_mb():
+    with open(os.path.join(PROC, "statm")) as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+class MeasureSampler(threading.Thread):
+    """
+    Samples per-thread CPU %, per-core CPU % and RSS every `interval_ms` into
+    the `measures` format of the benchmark app. Per-thread CPU covers the
+    whole process, so concurrent streams show up side by side; the sampler
+    itself runs as the `sampler` thread. Without /proc only process-wide
+    CPU is recorded.
+    """
+
+    def __init__(self, interval_ms=500):
+        super().__init__(name="sampler", daemon=True)
+        self.interval = interval_ms / 1000
+        self.measures = []
+        self.start_time = None
+        self.stop_event = threading.Event()
+        self.has_proc = os.path.isdir(os.path.join(PROC, "task"))
+
+    def run(self):
+        _set_thread_name(self.name)
+        start = last = self.start_time = time.perf_counter()
+        if self.has_proc:
+            threads, cores = _thread_times(), _core_times()
+        else:
+            cpu = sum(os.times()[:2])
+        stopped = False
+        while not stopped:
+            # Always record a last sample when stopped, so the end of the
+            # replay is covered
+            stopped = self.stop_event.wait(self.interval)
+            now = time.perf_counter()
+            elapsed = max(now - last, 1e-6)
+            if self.has_proc:
+                new_threads, new_cores = _thread_times(), _core_times()
+                per_name = {}
+                # Suffixes by thread id, so they do not depend on listing order
+                for key, seconds in sorted(
+                    new_threads.items(), key=lambda item: int(item[0][0])
+                ):
+                    busy = 100 * (seconds - threads.get(key, seconds)) / elapsed
+                    name = key[1]
+                    # Same naming as the app for duplicate thread names
+                    n = 2
+                    while name in per_name:
+                        name, n = f"{key[1]} ({n})", n + 1
+                    per_name[name] = busy
+                per_core = {}
+                for core, (busy, total) in new_cores.items():
+                    old_busy, old_total = cores.get(core, (busy, total))
+                    dt = total - old_total
+                    per_core[core] = 100 * (busy - old_busy) / dt if dt else 0
+                threads, cores = new_threads, new_cores
+                ram = _rss_mb()
+            else:
+                new_cpu = sum(os.times()[:2])
+                per_name = {"process": 100 * (new_cpu - cpu) / elapsed}
+                per_core, cpu, ram = {}, new_cpu, 0.0
+
+            self.measures.append(
+                {
+                    "cpu": {"perName": per_name, "perCore": per_core},
+                    "fps": 0,
+                    "ram": ram,
+                    "time": round(1000 * (now - start)),
+                }
+            )
+            last = now
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        return self.measures
+
+    def window(self, start, end):
+        """
+        Measures of the samples that cover perf_counter() times `start` to
+        `end`, i.e. up to the first sample after `end`, with their `time`
+        relative to `start`.
+        """
+        offset = 1000 * (start - self.start_time)
+        last = 1000 * (end - self.start_time + self.interval)
+        return [
+            {**m, "time": m["time"] - round(offset)}
+            for m in self.measures
+            if offset < m["time"] <= last
+        ]
+
+
+def stream_utterance(recognizer, samples, reference, chunk_ms=100, speed=1.0):
+    """
+    Streams one utterance in `chunk_ms` chunks, paced at `speed` x real time
+    (0 = as fast as possible). Returns the iteration dict with latencies,
+    processing RTF and the transcript.
+    """
+    chunk = int(SAMPLE_RATE * chunk_ms / 1000)
+    duration = len(samples) / SAMPLE_RATE
+    recognizer.start(SAMPLE_RATE, reference)
+    recognizer.set_total(len(samples))
+
+    first_partial = None
+    compute = 0.0
+    start = time.perf_counter()
+    for i, offset in enumerate(range(0, len(samples), chunk)):
+        if speed > 0:
+            due = start + i * chunk_ms / 1000 / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t = time.perf_counter()
+        partial = recognizer.accept(samples[offset : offset + chunk])
+        compute += time.perf_counter() - t
+        if partial and first_partial is None:
+            first_partial = time.perf_counter() - start
+
+    audio_end = time.perf_counter()
+    text = recognizer.finish()
+    end = time.perf_counter()
+    compute += end - audio_end
+
+    return {
+        "time": 1000 * (end - start),
+        "firstPartialLatency": None if first_partial is None else 1000 * first_partial,
+        "finalLatency": 1000 * (end - audio_end),
+        "rtf": compute / duration if duration else None,
+        "audioDuration": duration,
+        "transcript": text,
+    }
+
+
+_stream = threading.local()
+
+
+def _replay_job(factory, bundle, utterance, iteration, args, harness_start):
+    # One recognizer per stream thread, reused for all its utterances
+    if not hasattr(_stream, "recognizer"):
+        index = threading.current_thread().name.rsplit("_", 1)[-1]
+        _set_thread_name(f"stream-{index}")
+        _stream.recognizer = factory()
+    recognizer = _stream.recognizer
+
+    started = time.perf_counter()
+    try:
+        result = stream_utterance(
+            recognizer,
+            bundle[utterance],
+            bundle.text(utterance),
+            chunk_ms=args["chunk_ms"],
+            speed=args["speed"],
+        )
+        result["status"] = "SUCCESS"
+    except Exception as e:
+        print(f"⚠️ {utterance} (iteration {iteration}) failed: {e}")
+        result = {"time": 1000 * (time.perf_counter() - started), "status": "FAILURE"}
+    result["startTime"] = 1000 * (started - harness_start)
+    return utterance, iteration, result, (started, time.perf_counter())
+
+
+def run_replay(
+    bundle_path,
+    recognizer="dummy",
+    output_dir="host_results",
+    dataset="librispeech_clean",
+    streams=1,
+    iterations=3,
+    chunk_ms=100,
+    speed=1.0,
+    sample_ms=500,
+    limit=None,
+):
+    """
+    Replays every utterance of a PCM bundle `iterations` times through
+    `streams` concurrent recognizer instances and writes one
+    results_host_<utterance>_<engine>.json per utterance under
+    <output_dir>/<engine>/<dataset>/, in the benchmark_results format.
+    One MeasureSampler covers the whole replay; every iteration gets the
+    samples taken while it ran. Returns a per-iteration summary DataFrame.
+    """
+    bundle = AudioBundle(bundle_path)
+    factory = load_recognizer(recognizer)
+    engine = getattr(factory, "name", recognizer.replace(":", "_"))
+    utterances = bundle.ids()[:limit]
+    jobs = [(u, i) for i in range(iterations) for u in utterances]
+    args = {"chunk_ms": chunk_ms, "speed": speed}
+
+    results, spans = {}, {}
+    sampler = MeasureSampler(sample_ms)
+    sampler.start()
+    harness_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=streams) as executor:
+        futures = [
+            executor.submit(_replay_job, factory, bundle, u, i, args, harness_start)
+            for u, i in jobs
+        ]
+        for future in tqdm(futures, desc=f"Replaying ({streams} streams)"):
+            utterance, iteration, result, span = future.result()
+            results.setdefault(utterance, {})[iteration] = result
+            spans[utterance, iteration] = span
+    wall = time.perf_counter() - harness_start
+    sampler.stop()
+
+    for (utterance, iteration), span in spans.items():
+        result = results[utterance][iteration]
+        result["measures"] = sampler.window(*span)
+        result["ramPeak"] = max((m["ram"] for m in result["measures"]), default=None)
+
+    out_dir = os.path.join(output_dir, engine, dataset)
+    os.makedirs(out_dir, exist_ok=True)
+    rows = []
+    for utterance, by_iteration in results.items():
+        its = [by_iteration[i] for i in sorted(by_iteration)]
+        status = "SUCCESS" if all(r["status"] == "SUCCESS" for r in its) else "FAILURE"
+        path = os.path.join(out_dir, f"results_host_{utterance}_{engine}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"name": "Results", "iterations": its, "status": status}, f)
+        for i, r in enumerate(its):
+            rows.append(
+                {
+                    "utterance": utterance,
+                    "iteration": i,
+                    **{
+                        k: v
+                        for k, v in r.items()
+                        if k not in ("measures", "transcript")
+                    },
+                }
+            )
+
+    summary = pd.DataFrame(rows)
+    audio_sec = summary["audioDuration"].sum() if "audioDuration" in summary else 0
+    print(
+        f"\n✅ {len(jobs)} runs, {audio_sec / 60:.1f} min of audio in {wall:.1f} s "
+        f"({audio_sec / wall:.1f}x real time with {streams} parallel streams)"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stream a PCM bundle through a recognizer on the host"
+    )
+    parser.add_argument("--bundle", required=True, help="Bundle from audio_bundle.py")
+    parser.add_argument(
+        "--recognizer", default="dummy", help="dummy, echo or module:Class"
+    )
+    parser.add_argument("--dataset", default="librispeech_clean", help="Dataset name")
+    parser.add_argument("--output", default="host_results", help="Results folder")
+    parser.add_argument("--streams", type=int, default=1, help="Parallel streams")
+    parser.add_argument("--iterations", type=int, default=3, help="Runs per utterance")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Chunk size (ms)")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="x real time, 0 = unthrottled"
+    )
+    parser.add_argument("--sample-ms", type=int, default=500, help="Measure interval")
+    parser.add_argument("--limit", type=int, default=None, help="Max utterances")
+    args = parser.parse_args()
+
+    summary = run_replay(
+        args.bundle,
+        recognizer=args.recognizer,
+        output_dir=args.output,
+        dataset=args.dataset,
+        streams=args.streams,
+        iterations=args.iterations,
+        chunk_ms=args.chunk_ms,
+        speed=args.speed,
+        sample_ms=args.sample_ms,
+        limit=args.limit,
+    )
+    summary.to_csv(os.path.join(args.output, "replay_summary.csv"), index=False)
+    print(
+        summary[["firstPartialLatency", "finalLatency", "rtf", "ramPeak"]]
+        .describe()
+        .round(3)
+        .to_string()
+    )
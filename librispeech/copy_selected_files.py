@@ -1,11 +1,26 @@
 import os
-import shutil
+import sys
 import pandas as pd
 import argparse
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.copy_engine import COPY_MODES, MANIFEST_NAME, copy_files
+from librispeech.transcript_index import INDEX_NAME, load_transcript_index
 
-def process_subset(input_folder, subset_csv, output_folder, flat_structure=True):
-    """Process subset with optional flat structure and single transcript file"""
+
+def process_subset(
+    input_folder,
+    subset_csv,
+    output_folder,
+    flat_structure=True,
+    mode="copy",
+    workers=8,
+    index_path=None,
+):
+    """Process subset with optional flat structure and single transcript file.
+    `mode` selects copy, hardlink or reflink; interrupted runs resume from
+    the copy manifest in the output folder. The transcript index of the
+    input folder is cached at `index_path` (default: in the output folder)."""
     # Load subset
     subset = pd.read_csv(
         subset_csv,
@@ -19,49 +34,46 @@ def process_subset(input_folder, subset_csv, output_folder, flat_structure=True)
     )
 
     os.makedirs(output_folder, exist_ok=True)
-    transcriptions = []
-    copied_files = 0
 
-    for _, row in subset.iterrows():
-        speaker_id = str(row["speaker_id"])
-        chapter_id = str(row["chapter_id"])
-        filename = str(row["filename"])
-        base_name = os.path.splitext(filename)[0]
+    # Build all source/destination paths column-wise
+    chapter_dirs = subset["speaker_id"] + os.sep + subset["chapter_id"]
+    audio_src = input_folder + os.sep + chapter_dirs + os.sep + subset["filename"]
+    base_names = subset["filename"].str.rsplit(".", n=1).str[0]
 
-        # Source paths
-        audio_src = os.path.join(input_folder, speaker_id, chapter_id, filename)
-        trans_src = os.path.join(
-            input_folder,
-            speaker_id,
-            chapter_id,
-            f"{'-'.join(base_name.split('-')[:2])}.trans.txt",
-        )
+    if flat_structure:
+        audio_dest = output_folder + os.sep + subset["filename"]
+    else:
+        for dest_dir in chapter_dirs.unique():
+            os.makedirs(os.path.join(output_folder, dest_dir), exist_ok=True)
+        audio_dest = output_folder + os.sep + chapter_dirs + os.sep + subset["filename"]
 
-        # Destination handling
-        if flat_structure:
-            audio_dest = os.path.join(output_folder, filename)
-        else:
-            dest_dir = os.path.join(output_folder, speaker_id, chapter_id)
-            os.makedirs(dest_dir, exist_ok=True)
-            audio_dest = os.path.join(dest_dir, filename)
-
-        try:
-            # Copy audio file
-            shutil.copy2(audio_src, audio_dest)
+    results = copy_files(
+        list(zip(audio_src, audio_dest)),
+        mode=mode,
+        workers=workers,
+        manifest_path=os.path.join(output_folder, MANIFEST_NAME),
+    )
 
-            # Extract transcription
-            with open(trans_src, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.startswith(f"{base_name} "):
-                        transcriptions.append(line.strip())
-                        break
+    if index_path is None:
+        index_path = os.path.join(output_folder, INDEX_NAME)
+    transcript_index = load_transcript_index(input_folder, index_path)
+    transcriptions = []
+    copied_files = 0
 
-            copied_files += 1
+    for filename, base_name, (_, error) in zip(subset["filename"], base_names, results):
+        if isinstance(error, FileNotFoundError):
+            print(f"⚠️ Missing file: {error.filename}")
+            continue
+        elif error is not None:
+            print(f"⚠️ Error processing {filename}: {str(error)}")
+            continue
 
-        except FileNotFoundError as e:
-            print(f"⚠️ Missing file: {e.filename}")
-        except Exception as e:
-            print(f"⚠️ Error processing {filename}: {str(e)}")
+        text = transcript_index.get(base_name)
+        if text is None:
+            print(f"⚠️ Missing transcript for {base_name}")
+        else:
+            transcriptions.append(f"{base_name} {text}")
+        copied_files += 1
 
     # Save SINGLE combined transcriptions file
     with open(
@@ -91,6 +103,10 @@ if __name__ == "__main__":
         help="Output folder path",
     )
     parser.add_argument("--flat", action="store_true", help="Use flat output structure")
+    parser.add_argument(
+        "--mode", choices=COPY_MODES, default="copy", help="How files are transferred"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Copy threads")
     args = parser.parse_args()
 
     print(f"Processing with {'flat' if args.flat else 'hierarchical'} structure...")
@@ -99,4 +115,6 @@ if __name__ == "__main__":
         subset_csv=args.subset,
         output_folder=args.output,
         flat_structure=args.flat,
+        mode=args.mode,
+        workers=args.workers,
     )
@@ -1,10 +1,19 @@
+import argparse
+import hashlib
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import librosa
 from tqdm import tqdm
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import probe_durations
+from common.probe_cache import DurationCache
+
 
 def plot_duration_distribution(df, save_path=None, show=True, set_name=None):
     sns.set(style="whitegrid")
@@ -51,31 +60,45 @@ def load_speaker_genders(speakers_file="SPEAKERS.TXT"):
     return speaker_genders
 
 
-def scan_librispeech(root_dir="test-clean", speakers_file="SPEAKERS.TXT"):
-    """Scans LibriSpeech directory and returns DataFrame with metadata"""
+def scan_librispeech(
+    root_dir="test-clean",
+    speakers_file="SPEAKERS.TXT",
+    workers=None,
+    cache_path="duration_cache.sqlite",
+):
+    """Scans LibriSpeech directory and returns DataFrame with metadata.
+    Durations are cached in `cache_path` (None disables the cache)."""
     speaker_genders = load_speaker_genders(speakers_file)
-    data = []
+    entries = []
 
     for root, _, files in tqdm(os.walk(root_dir), desc="Scanning folders"):
         for file in files:
             if file.endswith(".flac"):
                 parts = root.split(os.sep)
                 speaker_id, chapter_id = parts[-2], parts[-1]
-                full_path = os.path.join(root, file)
-
-                try:
-                    duration = librosa.get_duration(filename=full_path)
-                    data.append(
-                        {
-                            "filename": file,
-                            "speaker_id": speaker_id,
-                            "chapter_id": chapter_id,
-                            "sex": speaker_genders.get(speaker_id, "U"),
-                            "duration_sec": duration,
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error processing {file}: {str(e)}")
+                entries.append((os.path.join(root, file), file, speaker_id, chapter_id))
+
+    paths = [e[0] for e in entries]
+    if cache_path:
+        with DurationCache(cache_path) as cache:
+            durations = probe_durations(paths, workers=workers, cache=cache)
+    else:
+        durations = probe_durations(paths, workers=workers)
+
+    data = []
+    for (_, file, speaker_id, chapter_id), (duration, error) in zip(entries, durations):
+        if error is not None:
+            print(f"Error processing {file}: {error}")
+            continue
+        data.append(
+            {
+                "filename": file,
+                "speaker_id": speaker_id,
+                "chapter_id": chapter_id,
+                "sex": speaker_genders.get(speaker_id, "U"),
+                "duration_sec": duration,
+            }
+        )
 
     return pd.DataFrame(data)
 
@@ -118,7 +141,180 @@ def plot_combined_distribution(df, save_path=None, show=True):
     plt.close()
 
 
+BENCHMARK_METRICS = {
+    "rtf": "Współczynnik czasu rzeczywistego (RTF)",
+    "ram_peak_mb": "Szczytowe zużycie pamięci RAM (MB)",
+    "cpu_seconds": "Czas procesora na nagranie (s)",
+}
+
+
+def plot_benchmark_metric(runs, metric, save_path=None, show=True):
+    """Boxplot of one benchmark metric per engine, split by device"""
+    sns.set(style="whitegrid")
+    plt.figure(figsize=(10, 6))
+    sns.boxplot(data=runs, x="engine", y=metric, hue="device", palette="pastel")
+    plt.title(f"{BENCHMARK_METRICS.get(metric, metric)} wg silnika i urządzenia")
+    plt.xlabel("Silnik rozpoznawania mowy", labelpad=15)
+    plt.ylabel(BENCHMARK_METRICS.get(metric, metric))
+    plt.legend(title="Urządzenie")
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path)
+    if show:
+        plt.show()
+    plt.close()
+
+
+PLOT_FUNCTIONS = {
+    "distribution": plot_combined_distribution,
+    "duration": plot_duration_distribution,
+    "gender": plot_gender_distribution,
+    "benchmark": plot_benchmark_metric,
+}
+# Dropped from metadata CSV names to get the names of their figures
+SUBSET_SUFFIX = "_selected_subset"
+
+
+def data_hash(df, plot, kwargs):
+    """Hash of the plotted data and plot arguments"""
+    h = hashlib.sha256(json.dumps([plot, kwargs], sort_keys=True).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()
+
+
+def _render(plot, df, save_path, kwargs):
+    plt.switch_backend("Agg")
+    PLOT_FUNCTIONS[plot](df, save_path=save_path, show=False, **kwargs)
+    return save_path
+
+
+def render_batch(jobs, cache_path="plot_cache.json", workers=None):
+    """
+    Renders (plot, df, save_path, kwargs) jobs headless in a process pool.
+
+    Figures whose data hash matches the one recorded in `cache_path` and
+    whose file still exists are skipped. Returns the list of rendered paths.
+    """
+    hashes = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+
+    stale = []
+    for plot, df, save_path, kwargs in jobs:
+        digest = data_hash(df, plot, kwargs)
+        if hashes.get(save_path) == digest and os.path.exists(save_path):
+            continue
+        stale.append((plot, df, save_path, kwargs, digest))
+    print(f"{len(jobs) - len(stale)} figures up to date, {len(stale)} to render")
+
+    rendered = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_render, plot, df, save_path, kwargs)
+            for plot, df, save_path, kwargs, _ in stale
+        ]
+        for job, future in tqdm(
+            zip(stale, futures), total=len(stale), desc="Rendering"
+        ):
+            try:
+                rendered.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Error rendering {job[2]}: {e}")
+                continue
+            hashes[job[2]] = job[4]
+
+    if cache_path:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=1, sort_keys=True)
+    return rendered
+
+
+def figure_prefix(csv_path):
+    """Path prefix of the figures of a metadata CSV: its folder and dataset
+    name, so the figures of librispeech_test_other_selected_subset.csv
+    overwrite librispeech_test_other_distribution.png etc. next to it"""
+    prefix = os.path.splitext(csv_path)[0]
+    if prefix.endswith(SUBSET_SUFFIX):
+        prefix = prefix[: -len(SUBSET_SUFFIX)]
+    return prefix
+
+
+def metadata_jobs(metadata):
+    """Distribution figures for each NAME=CSV pair, saved next to the CSV"""
+    jobs = []
+    for value in metadata:
+        set_name, _, path = value.rpartition("=")
+        df = pd.read_csv(path, usecols=["sex", "duration_sec"])
+        prefix = figure_prefix(path)
+        jobs.append(("distribution", df, f"{prefix}_distribution.png", {}))
+        for plot in ("duration", "gender"):
+            jobs.append(
+                (plot, df, f"{prefix}_{plot}_distribution.png", {"set_name": set_name})
+            )
+    return jobs
+
+
+def benchmark_jobs(store_dir, plots_dir):
+    """One figure per benchmark metric from the ingested results store"""
+    from analysis.rtf_summary import DEFAULT_METADATA, load_durations, run_metrics
+
+    runs = run_metrics(store_dir, load_durations(DEFAULT_METADATA))
+    runs = runs[["engine", "device"] + list(BENCHMARK_METRICS)]
+    runs = runs.astype({"engine": str, "device": str})
+    os.makedirs(plots_dir, exist_ok=True)
+    return [
+        (
+            "benchmark",
+            runs,
+            os.path.join(plots_dir, f"{metric}.png"),
+            {"metric": metric},
+        )
+        for metric in BENCHMARK_METRICS
+    ]
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Plot LibriSpeech metadata and benchmark metrics"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Render all figures headless from pre-computed metadata",
+    )
+    parser.add_argument(
+        "--metadata",
+        nargs="*",
+        default=[
+            "Librispeech test-clean=librispeech/clean/librispeech_test_clean_selected_subset.csv",
+            "Librispeech test-other=librispeech/other/librispeech_test_other_selected_subset.csv",
+        ],
+        help="NAME=CSV pairs of metadata to plot (batch mode)",
+    )
+    parser.add_argument(
+        "--store",
+        default="benchmark_store",
+        help="Ingested benchmark store, plotted if it exists (batch mode)",
+    )
+    parser.add_argument(
+        "--plots-dir", default="benchmark_plots", help="Benchmark figure folder"
+    )
+    parser.add_argument("--cache", default="plot_cache.json", help="Figure hash file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    if args.batch:
+        matplotlib.use("Agg", force=True)
+        jobs = metadata_jobs(args.metadata)
+        if os.path.isdir(args.store):
+            jobs += benchmark_jobs(args.store, args.plots_dir)
+        rendered = render_batch(jobs, args.cache, args.workers)
+        print(f"✅ Rendered {len(rendered)} figures")
+        sys.exit(0)
+
     df = scan_librispeech("test-clean", "SPEAKERS.TXT")
     # df.to_csv("librispeech_with_gender.csv", index=False)
     print("Saved full metadata to 'librispeech_with_gender.csv'")
@@ -1,9 +1,12 @@
 import os
+import sys
 import pandas as pd
-import librosa
 from tqdm import tqdm
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import probe_durations
+from common.probe_cache import DurationCache
+from common.subset_selection import add_duration_columns, select_duration_budget
 
 
 def plot_duration_distribution(df, save_path=None, show=True):
@@ -15,6 +18,9 @@ def plot_duration_distribution(df, save_path=None, show=True):
     - save_path: ścieżka do zapisu wykresu (np. 'duration_distribution.png') lub None
     - show: czy wyświetlić wykres po utworzeniu
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     sns.set(style="whitegrid")
     plt.figure(figsize=(10, 6))
     sns.histplot(df["duration_sec"], bins=50, kde=True, color="skyblue")
@@ -42,45 +48,55 @@ def load_speaker_genders(speakers_file="SPEAKERS.TXT"):
     return speaker_genders
 
 
-def scan_librispeech(root_dir="test-clean", speakers_file="SPEAKERS.TXT"):
-    """Scans LibriSpeech directory and returns DataFrame with metadata"""
+def scan_librispeech(
+    root_dir="test-clean",
+    speakers_file="SPEAKERS.TXT",
+    workers=None,
+    cache_path="duration_cache.sqlite",
+):
+    """Scans LibriSpeech directory and returns DataFrame with metadata.
+    Durations are cached in `cache_path` (None disables the cache)."""
     speaker_genders = load_speaker_genders(speakers_file)
-    data = []
+    entries = []
 
     for root, _, files in tqdm(os.walk(root_dir), desc="Scanning folders"):
         for file in files:
             if file.endswith(".flac"):
                 parts = root.split(os.sep)
                 speaker_id, chapter_id = parts[-2], parts[-1]
-                full_path = os.path.join(root, file)
-
-                try:
-                    duration = librosa.get_duration(filename=full_path)
-                    data.append(
-                        {
-                            "filename": file,
-                            "speaker_id": speaker_id,
-                            "chapter_id": chapter_id,
-                            "sex": speaker_genders.get(speaker_id, "U"),
-                            "duration_sec": duration,
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error processing {file}: {str(e)}")
+                entries.append((os.path.join(root, file), file, speaker_id, chapter_id))
+
+    paths = [e[0] for e in entries]
+    if cache_path:
+        with DurationCache(cache_path) as cache:
+            durations = probe_durations(paths, workers=workers, cache=cache)
+    else:
+        durations = probe_durations(paths, workers=workers)
+
+    data = []
+    for (_, file, speaker_id, chapter_id), (duration, error) in zip(entries, durations):
+        if error is not None:
+            print(f"Error processing {file}: {error}")
+            continue
+        data.append(
+            {
+                "filename": file,
+                "speaker_id": speaker_id,
+                "chapter_id": chapter_id,
+                "sex": speaker_genders.get(speaker_id, "U"),
+                "duration_sec": duration,
+            }
+        )
 
     return pd.DataFrame(data)
 
 
-def select_balanced_subset(df, target_minutes=30):
-    """Selects balanced subset by gender and duration"""
-    df["duration_min"] = df["duration_sec"] / 60
-    df["duration_cat"] = pd.cut(
-        df["duration_sec"],
-        bins=[0, 5, 10, float("inf")],
-        labels=["short", "medium", "long"],
-    )
+def select_balanced_subset(df, target_minutes=30, tolerance_sec=5.0):
+    """Selects balanced subset by gender and duration totalling target_minutes
+    (within tolerance_sec); group weights are shares of the duration budget"""
+    add_duration_columns(df)
 
-    # Calculate sample sizes per group
+    # Share of the duration budget per group
     group_weights = {
         ("F", "short"): 0.15,
         ("F", "medium"): 0.35,
@@ -90,16 +106,14 @@ def select_balanced_subset(df, target_minutes=30):
         ("M", "long"): 0.15,
     }
 
-    stratified = []
-    for (gender, dur_cat), weight in group_weights.items():
-        group = df[(df["sex"] == gender) & (df["duration_cat"] == dur_cat)]
-        sample_size = max(1, int(len(group) * weight))
-        stratified.append(group.sample(sample_size, random_state=42))
-
-    subset = pd.concat(stratified).sample(frac=1, random_state=42)
-    subset = subset.iloc[: int(target_minutes / subset["duration_min"].mean())]
-
-    return subset
+    return select_duration_budget(
+        df,
+        group_weights,
+        group_cols=["sex", "duration_cat"],
+        target_minutes=target_minutes,
+        tolerance_sec=tolerance_sec,
+        random_state=42,
+    )
 
 
 if __name__ == "__main__":
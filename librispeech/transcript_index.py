@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+
+INDEX_NAME = "transcript_index.json"
+
+
+def parse_trans_file(path):
+    """Parses a LibriSpeech <speaker>-<chapter>.trans.txt into id -> text"""
+    transcripts = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(" ", 1)
+            if parts[0]:
+                transcripts[parts[0]] = parts[1] if len(parts) > 1 else ""
+    return transcripts
+
+
+def load_transcript_index(root_dir="test-clean", index_path=None):
+    """
+    Returns utterance id -> reference text for every *.trans.txt under
+    `root_dir`.
+
+    With `index_path` (kept outside the corpus, which stays read-only) the
+    index is persisted together with the size and mtime of each chapter
+    file, so later runs only re-parse chapters that changed. An index built
+    for another folder is ignored. Without it every chapter is parsed.
+    """
+    root = os.path.abspath(root_dir)
+    cached = {"root": root, "chapters": {}}
+    if index_path is not None and os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index_file = json.load(f)
+        if index_file.get("root") == root:
+            cached = index_file
+
+    chapters = {}
+    changed = False
+    for dirpath, _, files in os.walk(root_dir):
+        for file in files:
+            if not file.endswith(".trans.txt"):
+                continue
+            path = os.path.join(dirpath, file)
+            rel_path = os.path.relpath(path, root_dir).replace(os.sep, "/")
+            st = os.stat(path)
+            stamp = [st.st_size, st.st_mtime_ns]
+
+            entry = cached["chapters"].get(rel_path)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, "transcripts": parse_trans_file(path)}
+                changed = True
+            chapters[rel_path] = entry
+
+    if index_path is not None and (changed or len(chapters) != len(cached["chapters"])):
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"root": root, "chapters": chapters}, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    index = {}
+    for entry in chapters.values():
+        index.update(entry["transcripts"])
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the transcript index for a LibriSpeech folder"
+    )
+    parser.add_argument("--input", default="test-clean", help="Input folder path")
+    parser.add_argument("--index", default=INDEX_NAME, help="Index file path")
+    args = parser.parse_args()
+
+    index = load_transcript_index(args.input, args.index)
+    print(f"✅ Indexed {len(index)} transcripts from {args.input}")
@@ -1,7 +1,11 @@
 import os
-from pydub import AudioSegment
-from pydub.playback import play
-from pydub.effects import normalize
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+OUTPUT_FORMATS = {"wav": "WAV", "flac": "FLAC"}
+GAIN_TABLE_COLUMNS = ["filename", "size", "mtime_ns", "peak_dBFS", "rms_dBFS", "lufs"]
 
 def normalize_audio_volume(input_folder, output_folder, target_dBFS=-20.0, file_ext="mp3"):
     """
@@ -12,6 +16,9 @@ def normalize_audio_volume(input_folder, output_folder, target_dBFS=-20.0, file_
     :param target_dBFS: Docelowy poziom głośności w dBFS (domyślnie -20.0)
     :param file_ext: Rozszerzenie plików audio do przetworzenia (domyślnie "wav")
     """
+    from pydub import AudioSegment
+    from pydub.effects import normalize
+
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
@@ -35,9 +42,386 @@ def normalize_audio_volume(input_folder, output_folder, target_dBFS=-20.0, file_
             except Exception as e:
                 print(f"Błąd podczas przetwarzania pliku {filename}: {str(e)}")
 
+def measure_levels(samples):
+    """
+    Zwraca (peak_dBFS, rms_dBFS) dla próbek float w zakresie [-1, 1].
+    Dla ciszy oba poziomy wynoszą -inf.
+    """
+    if samples.size == 0:
+        return float("-inf"), float("-inf")
+    peak = float(np.max(np.abs(samples)))
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    with np.errstate(divide="ignore"):
+        return float(20 * np.log10(peak)), float(20 * np.log10(rms))
+
+
+def load_audio(input_path, sample_rate=16000):
+    """Dekoduje plik audio do tablicy float32 mono o zadanej częstotliwości"""
+    import librosa
+
+    samples, _ = librosa.load(input_path, sr=sample_rate, mono=True)
+    return samples
+
+
+def apply_gain(samples, gain_dB):
+    """Wzmacnia sygnał o gain_dB i przycina go do zakresu [-1, 1]"""
+    gain = np.float32(10 ** (gain_dB / 20))
+    return np.clip(samples * gain, -1.0, 1.0)
+
+
+def _k_weighting_filters(sample_rate):
+    """Współczynniki filtrów K (ITU-R BS.1770): półka wysokich tonów
+    i filtr górnoprzepustowy, wyliczone dla dowolnej częstotliwości"""
+    # Półka wysokich tonów, +4 dB powyżej ~1.7 kHz
+    A = 10 ** (3.99984385397 / 40)
+    w0 = 2 * np.pi * 1681.9744509555319 / sample_rate
+    alpha = np.sin(w0) / (2 * 0.7071752369554193)
+    cos_w0, sqrt_A = np.cos(w0), np.sqrt(A)
+    shelf_b = [
+        A * ((A + 1) + (A - 1) * cos_w0 + 2 * sqrt_A * alpha),
+        -2 * A * ((A - 1) + (A + 1) * cos_w0),
+        A * ((A + 1) + (A - 1) * cos_w0 - 2 * sqrt_A * alpha),
+    ]
+    shelf_a = [
+        (A + 1) - (A - 1) * cos_w0 + 2 * sqrt_A * alpha,
+        2 * ((A - 1) - (A + 1) * cos_w0),
+        (A + 1) - (A - 1) * cos_w0 - 2 * sqrt_A * alpha,
+    ]
+
+    # Filtr górnoprzepustowy ~38 Hz
+    w0 = 2 * np.pi * 38.13547087613982 / sample_rate
+    alpha = np.sin(w0) / (2 * 0.5003270373253953)
+    cos_w0 = np.cos(w0)
+    hp_b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+    hp_a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    return (shelf_b, shelf_a), (hp_b, hp_a)
+
+
+def measure_lufs(samples, sample_rate, block_sec=0.4, overlap=0.75):
+    """
+    Zintegrowana głośność (LUFS) sygnału mono wg ITU-R BS.1770 z bramkowaniem
+    bezwzględnym (-70 LUFS) i względnym (-10 LU). Energie bloków liczone są
+    wektorowo z sumy skumulowanej kwadratów próbek.
+    """
+    from scipy.signal import lfilter
+
+    for b, a in _k_weighting_filters(sample_rate):
+        samples = lfilter(b, a, samples)
+
+    block = int(round(block_sec * sample_rate))
+    step = int(round(block * (1 - overlap)))
+    if len(samples) < block:
+        return float("-inf")
+
+    energy = np.concatenate(([0.0], np.cumsum(np.square(samples, dtype=np.float64))))
+    starts = np.arange(0, len(samples) - block + 1, step)
+    z = (energy[starts + block] - energy[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(z)
+        gated = z[loudness > -70]
+        if gated.size == 0:
+            return float("-inf")
+        relative_gate = -0.691 + 10 * np.log10(gated.mean()) - 10
+        gated = z[(loudness > -70) & (loudness > relative_gate)]
+        return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def _measure_file(input_path, sample_rate, with_lufs):
+    samples = load_audio(input_path, sample_rate)
+    peak_dBFS, rms_dBFS = measure_levels(samples)
+    lufs = measure_lufs(samples, sample_rate) if with_lufs else np.nan
+    return peak_dBFS, rms_dBFS, lufs
+
+
+def measure_loudness(
+    input_folder,
+    table_path="gain_table.csv",
+    file_ext="mp3",
+    sample_rate=16000,
+    with_lufs=False,
+    workers=None,
+):
+    """
+    Pierwszy przebieg: mierzy poziomy (szczyt, RMS i opcjonalnie LUFS)
+    wszystkich plików i zapisuje je w tabeli wzmocnień. Pliki, których
+    rozmiar i czas modyfikacji się nie zmieniły, nie są dekodowane ponownie.
+
+    :param input_folder: Ścieżka do folderu z plikami wejściowymi
+    :param table_path: Plik CSV z tabelą poziomów
+    :param file_ext: Rozszerzenie plików audio do przetworzenia
+    :param sample_rate: Częstotliwość, przy której mierzone są poziomy
+    :param with_lufs: Czy liczyć głośność LUFS (wolniejsze)
+    :param workers: Liczba procesów (domyślnie liczba rdzeni)
+    :return: DataFrame z tabelą poziomów
+    """
+    if os.path.exists(table_path):
+        table = pd.read_csv(table_path).set_index("filename")
+    else:
+        table = pd.DataFrame(columns=GAIN_TABLE_COLUMNS).set_index("filename")
+
+    filenames = sorted(f for f in os.listdir(input_folder) if f.endswith(f".{file_ext}"))
+    rows, pending = {}, {}
+    for filename in filenames:
+        st = os.stat(os.path.join(input_folder, filename))
+        stamp = (st.st_size, st.st_mtime_ns)
+        if filename in table.index:
+            cached = table.loc[filename]
+            fresh = (cached["size"], cached["mtime_ns"]) == stamp
+            if fresh and (not with_lufs or pd.notna(cached["lufs"])):
+                rows[filename] = cached.to_dict()
+                continue
+        pending[filename] = stamp
+
+    print(f"Pomiar {len(pending)} plików ({len(rows)} w tabeli bez zmian)")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            filename: executor.submit(
+                _measure_file, os.path.join(input_folder, filename), sample_rate, with_lufs
+            )
+            for filename in pending
+        }
+        for filename, future in futures.items():
+            try:
+                peak_dBFS, rms_dBFS, lufs = future.result()
+            except Exception as e:
+                print(f"Błąd podczas pomiaru pliku {filename}: {str(e)}")
+                continue
+            size, mtime_ns = pending[filename]
+            rows[filename] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "peak_dBFS": peak_dBFS,
+                "rms_dBFS": rms_dBFS,
+                "lufs": lufs,
+            }
+
+    table = pd.DataFrame.from_dict(rows, orient="index").rename_axis("filename")
+    table = table.reset_index().reindex(columns=GAIN_TABLE_COLUMNS)
+    table.sort_values("filename").to_csv(table_path, index=False)
+    print(f"Zapisano tabelę poziomów: {table_path}")
+    return table
+
+
+def compute_gains(table, target, level="rms"):
+    """Wzmocnienia (dB) potrzebne, by każdy plik osiągnął docelowy poziom
+    `target` (dBFS dla level="rms", LUFS dla level="lufs")"""
+    column = {"rms": "rms_dBFS", "lufs": "lufs"}[level]
+    levels = table[column] if column in table else pd.Series(np.nan, index=table.index)
+    missing = levels.isna()
+    if missing.any():
+        raise ValueError(
+            f"Brak pomiaru {column} dla {int(missing.sum())}/{len(table)} plików; "
+            f"uruchom pomiar z --level {level}"
+        )
+    gains = target - levels
+    # Tylko pliki ciche (-inf) zostają bez zmian
+    return gains.where(np.isfinite(levels), 0.0)
+
+
+def gain_report(table_path="gain_table.csv", target=-20.0, level="rms"):
+    """
+    Tryb „dry-run”: pokazuje rozkład wzmocnień dla danego poziomu docelowego
+    bez dekodowania i zapisywania plików audio.
+    """
+    table = pd.read_csv(table_path)
+    gains = compute_gains(table, target, level)
+    clipped = table["peak_dBFS"] + gains > 0
+
+    print(f"=== Wzmocnienia dla {target} ({level}) ===")
+    print(gains.describe().round(2).to_string())
+    counts, edges = np.histogram(gains, bins=10)
+    for count, lo, hi in zip(counts, edges[:-1], edges[1:]):
+        print(f"{lo:+7.1f} .. {hi:+7.1f} dB | {'#' * int(40 * count / max(counts.max(), 1))} {count}")
+    print(f"Pliki z przesterowaniem: {int(clipped.sum())}/{len(table)}")
+    return pd.DataFrame({"filename": table["filename"], "gain_dB": gains, "clipped": clipped})
+
+
+def _apply_gain_file(input_path, output_path, gain_dB, sample_rate, output_format):
+    import soundfile as sf
+
+    sf.write(
+        output_path,
+        apply_gain(load_audio(input_path, sample_rate), gain_dB),
+        sample_rate,
+        format=OUTPUT_FORMATS[output_format],
+        subtype="PCM_16",
+    )
+
+
+def apply_gain_table(
+    input_folder,
+    output_folder,
+    table_path="gain_table.csv",
+    target=-20.0,
+    level="rms",
+    output_format="wav",
+    sample_rate=16000,
+    workers=None,
+):
+    """
+    Drugi przebieg: stosuje wzmocnienia z tabeli poziomów (bez ponownego
+    pomiaru), więc zmiana poziomu docelowego nie wymaga kolejnej analizy.
+
+    :param input_folder: Ścieżka do folderu z plikami wejściowymi
+    :param output_folder: Ścieżka do folderu na znormalizowane pliki
+    :param table_path: Plik CSV z measure_loudness
+    :param target: Docelowy poziom (dBFS lub LUFS, zależnie od `level`)
+    :param level: "rms" lub "lufs"
+    :param output_format: Format wyjściowy: "wav" lub "flac"
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    table = pd.read_csv(table_path)
+    gains = compute_gains(table, target, level)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for filename, gain_dB in zip(table["filename"], gains):
+            base_name = os.path.splitext(filename)[0]
+            futures[filename] = executor.submit(
+                _apply_gain_file,
+                os.path.join(input_folder, filename),
+                os.path.join(output_folder, f"{base_name}.{output_format}"),
+                gain_dB,
+                sample_rate,
+                output_format,
+            )
+        done = 0
+        for filename, future in futures.items():
+            try:
+                future.result()
+                done += 1
+            except Exception as e:
+                print(f"Błąd podczas przetwarzania pliku {filename}: {str(e)}")
+
+    print(f"Znormalizowano {done}/{len(table)} plików")
+
+
+def _normalize_file_numpy(input_path, output_path, target_dBFS, sample_rate, output_format):
+    import soundfile as sf
+
+    samples = load_audio(input_path, sample_rate)
+    peak_dBFS, rms_dBFS = measure_levels(samples)
+
+    # pydub: normalize() skaluje do szczytu, a apply_gain() ustawia RMS na
+    # target_dBFS - dwa liniowe wzmocnienia składają się w jedno mnożenie
+    gain_dB = target_dBFS - rms_dBFS if np.isfinite(rms_dBFS) else 0.0
+    clipped = peak_dBFS + gain_dB > 0
+    sf.write(
+        output_path,
+        apply_gain(samples, gain_dB),
+        sample_rate,
+        format=OUTPUT_FORMATS[output_format],
+        subtype="PCM_16",
+    )
+    return peak_dBFS, rms_dBFS, gain_dB, clipped
+
+
+def normalize_audio_volume_numpy(
+    input_folder,
+    output_folder,
+    target_dBFS=-20.0,
+    file_ext="mp3",
+    output_format="wav",
+    sample_rate=16000,
+    workers=None,
+):
+    """
+    Szybsza wersja normalize_audio_volume: dekoduje pliki do tablic NumPy,
+    liczy poziomy i wzmocnienie w jednym przebiegu i zapisuje bezstratne
+    pliki mono 16 kHz (WAV/FLAC), których używają silniki na urządzeniach.
+    Pliki przetwarzane są równolegle w puli procesów.
+
+    :param input_folder: Ścieżka do folderu z plikami wejściowymi
+    :param output_folder: Ścieżka do folderu na znormalizowane pliki
+    :param target_dBFS: Docelowy poziom głośności (RMS) w dBFS
+    :param file_ext: Rozszerzenie plików audio do przetworzenia
+    :param output_format: Format wyjściowy: "wav" lub "flac"
+    :param sample_rate: Częstotliwość próbkowania plików wyjściowych
+    :param workers: Liczba procesów (domyślnie liczba rdzeni)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Nieobsługiwany format wyjściowy: {output_format}")
+    os.makedirs(output_folder, exist_ok=True)
+
+    filenames = sorted(f for f in os.listdir(input_folder) if f.endswith(f".{file_ext}"))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for filename in filenames:
+            base_name = os.path.splitext(filename)[0]
+            output_path = os.path.join(output_folder, f"{base_name}.{output_format}")
+            futures[filename] = executor.submit(
+                _normalize_file_numpy,
+                os.path.join(input_folder, filename),
+                output_path,
+                target_dBFS,
+                sample_rate,
+                output_format,
+            )
+
+        for filename, future in futures.items():
+            try:
+                peak_dBFS, rms_dBFS, gain_dB, clipped = future.result()
+            except Exception as e:
+                print(f"Błąd podczas przetwarzania pliku {filename}: {str(e)}")
+                continue
+            results[filename] = (peak_dBFS, rms_dBFS, gain_dB)
+            print(f"Zapisano {filename}: RMS {rms_dBFS:.1f} dBFS, wzmocnienie {gain_dB:+.1f} dB")
+            if clipped:
+                print(f"Uwaga: przesterowanie w pliku {filename}")
+
+    print(f"Znormalizowano {len(results)}/{len(filenames)} plików")
+    return results
+
 if __name__ == "__main__":
-    input_folder = "nagrania"  # Zmień na właściwą ścieżkę
-    output_folder = "normalized"  # Zmień na właściwą ścieżkę
-    target_volume = -20.0  # Docelowa głośność w dBFS (typowe wartości to między -20 a -16)
-    
-    normalize_audio_volume(input_folder, output_folder, target_volume)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Normalizacja głośności plików audio")
+    parser.add_argument("--input", default="nagrania", help="Folder z plikami wejściowymi")
+    parser.add_argument("--output", default="normalized", help="Folder wyjściowy")
+    # Typowe wartości to między -20 a -16 dBFS
+    parser.add_argument("--target", type=float, default=-20.0, help="Docelowa głośność w dBFS")
+    parser.add_argument("--ext", default="mp3", help="Rozszerzenie plików wejściowych")
+    parser.add_argument(
+        "--mode",
+        choices=["pydub", "numpy", "measure", "apply", "report"],
+        default="pydub",
+        help="pydub: zachowuje format wejściowy, numpy: szybki zapis WAV/FLAC 16 kHz mono, "
+        "measure/apply/report: dwuprzebiegowa normalizacja z tabelą wzmocnień",
+    )
+    parser.add_argument("--gain-table", default="gain_table.csv", help="Tabela poziomów (CSV)")
+    parser.add_argument("--level", choices=["rms", "lufs"], default="rms", help="Miara poziomu docelowego")
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="wav", help="Format wyjściowy (tryb numpy)")
+    parser.add_argument("--workers", type=int, default=None, help="Liczba procesów (tryb numpy)")
+    args = parser.parse_args()
+
+    if args.mode == "measure":
+        measure_loudness(
+            args.input,
+            args.gain_table,
+            file_ext=args.ext,
+            with_lufs=args.level == "lufs",
+            workers=args.workers,
+        )
+    elif args.mode == "apply":
+        apply_gain_table(
+            args.input,
+            args.output,
+            args.gain_table,
+            target=args.target,
+            level=args.level,
+            output_format=args.format,
+            workers=args.workers,
+        )
+    elif args.mode == "report":
+        gain_report(args.gain_table, target=args.target, level=args.level)
+    elif args.mode == "numpy":
+        normalize_audio_volume_numpy(
+            args.input,
+            args.output,
+            args.target,
+            file_ext=args.ext,
+            output_format=args.format,
+            workers=args.workers,
+        )
+    else:
+        normalize_audio_volume(args.input, args.output, args.target, file_ext=args.ext)
\ No newline at end of file
@@ -0,0 +1,384 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+
+DATASETS = ["librispeech", "commonvoice"]
+# Run in this order for every dataset and scale; each stage reads the
+# previous stage's output from the work folder
+STAGES = ["scan", "scan_warm", "select", "copy", "normalize", "normalize_pydub"]
+DEFAULT_SCALES = [1000, 10000]
+
+
+def _max_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# --- Stages -----------------------------------------------------------------
+# Each returns the number of items it processed
+
+
+def _scan(dataset, corpus, work, params):
+    from common.metadata_store import save_metadata
+
+    cache = os.path.join(work, "duration_cache.sqlite")
+    if dataset == "librispeech":
+        from librispeech.scan_metadata import scan_librispeech
+
+        df = scan_librispeech(
+            corpus["audio"], corpus["speakers"], params["workers"], cache
+        )
+    else:
+        from commonvoice.select_CV_subset import scan_commonvoice
+
+        df = scan_commonvoice(corpus["audio"], corpus["tsv"], params["workers"], cache)
+    save_metadata(df, os.path.join(work, "metadata.parquet"))
+    return len(df)
+
+
+def _select(dataset, corpus, work, params):
+    from common.metadata_store import load_metadata
+
+    if dataset == "librispeech":
+        from librispeech.scan_metadata import select_balanced_subset
+    else:
+        from commonvoice.select_CV_subset import select_balanced_subset
+
+    df = load_metadata(os.path.join(work, "metadata.parquet"))
+    subset = select_balanced_subset(df, target_minutes=params["target_minutes"])
+    subset.drop(columns=["duration_min"]).to_csv(
+        os.path.join(work, "subset.csv"), index=False
+    )
+    return len(df)
+
+
+def _copy(dataset, corpus, work, params):
+    subset_csv = os.path.join(work, "subset.csv")
+    output = os.path.join(work, "audio")
+    # Cold run: no copy manifest and no transcript index (both are kept in
+    # the output folder) from earlier runs
+    shutil.rmtree(output, ignore_errors=True)
+    if dataset == "librispeech":
+        from librispeech.copy_selected_files import process_subset
+
+        process_subset(corpus["audio"], subset_csv, output, mode=params["copy_mode"])
+    else:
+        from commonvoice.copy_selected_files import process_commonvoice_subset
+
+        process_commonvoice_subset(
+            corpus["audio"], subset_csv, output, mode=params["copy_mode"]
+        )
+    return len(os.listdir(output))
+
+
+def _normalize(dataset, corpus, work, params):
+    from normalize_volume.volume import normalize_audio_volume_numpy
+
+    ext = "flac" if dataset == "librispeech" else "mp3"
+    output = os.path.join(work, "normalized")
+    shutil.rmtree(output, ignore_errors=True)
+    normalize_audio_volume_numpy(
+        os.path.join(work, "audio"), output, file_ext=ext, workers=params["workers"]
+    )
+    return len(os.listdir(output))
+
+
+def _normalize_pydub(dataset, corpus, work, params):
+    from normalize_volume.volume import normalize_audio_volume
+
+    ext = "flac" if dataset == "librispeech" else "mp3"
+    output = os.path.join(work, "normalized_pydub")
+    shutil.rmtree(output, ignore_errors=True)
+    normalize_audio_volume(os.path.join(work, "audio"), output, file_ext=ext)
+    return len(os.listdir(output))
+
+
+STAGE_FUNCTIONS = {
+    "scan": _scan,
+    "scan_warm": _scan,
+    "select": _select,
+    "copy": _copy,
+    "normalize": _normalize,
+    "normalize_pydub": _normalize_pydub,
+}
+
+
+def _skip_reason(stage):
+    # pydub decodes and encodes through ffmpeg
+    if stage == "normalize_pydub" and shutil.which("ffmpeg") is None:
+        return "ffmpeg not found"
+    return None
+
+
+def _measure_stage(stage, dataset, corpus, work, params):
+    """Runs one stage in this (fresh) process and returns its measurements"""
+    if params["trace_memory"]:
+        tracemalloc.start()
+    start = time.perf_counter()
+    items = STAGE_FUNCTIONS[stage](dataset, corpus, work, params)
+    seconds = time.perf_counter() - start
+    entry = {"seconds": seconds, "items": items, "peak_mb": None}
+    if params["trace_memory"]:
+        entry["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    if resource is not None:
+        entry["max_rss_mb"] = _max_rss_mb(resource.RUSAGE_SELF)
+        # Worker pools of the stage, after they have been joined
+        entry["children_max_rss_mb"] = _max_rss_mb(resource.RUSAGE_CHILDREN)
+    return entry
+
+
+def _in_fresh_process(fn, *args):
+    """Calls fn(*args) in a newly spawned interpreter and returns its result"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(fn, *args).result()
+
+
+def run_stage(stage, dataset, corpus, work, params):
+    """
+    Runs a stage in a freshly spawned interpreter, so its max RSS, import
+    time and caches are its own and not left over from earlier stages.
+    Returns a result entry with status ran, failed or skipped.
+    """
+    entry = {"dataset": dataset, "stage": stage}
+    reason = _skip_reason(stage)
+    if reason:
+        print(f"⏭️  {dataset}/{stage}: skipped ({reason})")
+        return {**entry, "status": "skipped", "error": reason}
+
+    print(f"\n▶️  {dataset}/{stage}")
+    try:
+        measures = _in_fresh_process(
+            _measure_stage, stage, dataset, corpus, work, params
+        )
+        entry.update(measures, status="ran")
+        entry["items_per_sec"] = entry["items"] / entry["seconds"]
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+        print(f"❌ {dataset}/{stage} failed: {entry['error']}")
+    return entry
+
+
+def generate_corpus(dataset, root, n_clips, seed=0):
+    """Generates (or reuses) a synthetic corpus, returns its paths and how
+    long that took. Run it through _in_fresh_process: Linux keeps a
+    process's peak RSS across fork and exec, so a big generator run here
+    would show up in the RSS of every stage started afterwards."""
+    from perf.synthetic_corpus import generate_commonvoice, generate_librispeech
+
+    start = time.perf_counter()
+    if dataset == "librispeech":
+        audio, speakers = generate_librispeech(root, n_clips, seed)
+        corpus = {"audio": audio, "speakers": speakers}
+    else:
+        audio, tsv = generate_commonvoice(root, n_clips, seed)
+        corpus = {"audio": audio, "tsv": tsv}
+    return corpus, time.perf_counter() - start
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    scales=DEFAULT_SCALES,
+    datasets=DATASETS,
+    stages=STAGES,
+    corpus_dir="perf_corpus",
+    work_dir="perf_work",
+    target_minutes=30,
+    workers=None,
+    copy_mode="copy",
+    trace_memory=False,
+    seed=0,
+):
+    """
+    Runs every stage on synthetic corpora of every size in `scales` and
+    returns the run record: host, commit, parameters and one result entry
+    per (scale, dataset, stage) with seconds, items, items/s and memory.
+
+    Corpora are kept in `corpus_dir` and reused by later runs. Memory is
+    max RSS of the stage process and of its worker pools; with
+    `trace_memory` also the Python allocation peak, which slows the stage.
+    """
+    params = {
+        "target_minutes": target_minutes,
+        "workers": workers,
+        "copy_mode": copy_mode,
+        "trace_memory": trace_memory,
+    }
+    record = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {**params, "seed": seed},
+        "results": [],
+    }
+
+    for scale in scales:
+        for dataset in datasets:
+            corpus, seconds = _in_fresh_process(
+                generate_corpus,
+                dataset,
+                os.path.join(corpus_dir, f"{dataset}_{scale}"),
+                scale,
+                seed,
+            )
+            record["results"].append(
+                {
+                    "scale": scale,
+                    "dataset": dataset,
+                    "stage": "generate",
+                    "status": "ran",
+                    "seconds": seconds,
+                }
+            )
+            work = os.path.join(work_dir, f"{dataset}_{scale}")
+            shutil.rmtree(work, ignore_errors=True)
+            os.makedirs(work)
+            for stage in stages:
+                entry = run_stage(stage, dataset, corpus, work, params)
+                record["results"].append({"scale": scale, **entry})
+    return record
+
+
+def save_record(record, results_dir="perf_results"):
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = record["started"].replace(":", "").replace("-", "")
+    path = os.path.join(results_dir, f"perf_{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=1)
+    return path
+
+
+def load_history(results_dir="perf_results"):
+    """All saved runs as one DataFrame (a row per run, scale, dataset and
+    stage), for tracking scaling curves across commits"""
+    import pandas as pd
+
+    frames = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "perf_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        df = pd.DataFrame(record["results"])
+        df.insert(0, "started", record["started"])
+        df.insert(1, "commit", record["commit"])
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def print_record(record):
+    import pandas as pd
+
+    df = pd.DataFrame(record["results"])
+    ran = df[df["status"] == "ran"]
+    print("\n=== Seconds per stage ===")
+    print(
+        ran.pivot_table(
+            index=["dataset", "stage"], columns="scale", values="seconds", sort=False
+        )
+        .round(2)
+        .to_string()
+    )
+    if "max_rss_mb" in ran:
+        print("\n=== Max RSS [MB] (stage process / worker pool) ===")
+        rss = ran.dropna(subset=["max_rss_mb"]).copy()
+        rss["rss"] = rss.apply(
+            lambda r: f"{r['max_rss_mb']:.0f} / {r['children_max_rss_mb']:.0f}", axis=1
+        )
+        print(
+            rss.pivot(index=["dataset", "stage"], columns="scale", values="rss")
+            .reindex(rss.set_index(["dataset", "stage"]).index.unique())
+            .to_string()
+        )
+    for _, row in df[df["status"] != "ran"].iterrows():
+        print(f"⚠️ {row['dataset']}/{row['stage']} @ {row['scale']}: {row['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time and memory-profile the data-preparation stages on "
+        "synthetic corpora of growing size (runs offline)"
+    )
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        type=int,
+        default=DEFAULT_SCALES,
+        help="Corpus sizes in clips, e.g. 1000 10000 100000 500000",
+    )
+    parser.add_argument(
+        "--datasets", nargs="+", choices=DATASETS, default=DATASETS, help="Corpora"
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run"
+    )
+    parser.add_argument(
+        "--corpus-dir", default="perf_corpus", help="Generated corpora (reused)"
+    )
+    parser.add_argument("--work-dir", default="perf_work", help="Stage outputs")
+    parser.add_argument("--results", default="perf_results", help="Results folder")
+    parser.add_argument(
+        "--target-minutes", type=float, default=30, help="Subset size per corpus"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument(
+        "--copy-mode", choices=["copy", "hardlink", "reflink"], default="copy"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also record the Python allocation peak (slower)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    args = parser.parse_args()
+
+    record = run_suite(
+        scales=args.scales,
+        datasets=args.datasets,
+        stages=args.stages,
+        corpus_dir=args.corpus_dir,
+        work_dir=args.work_dir,
+        target_minutes=args.target_minutes,
+        workers=args.workers,
+        copy_mode=args.copy_mode,
+        trace_memory=args.trace_memory,
+        seed=args.seed,
+    )
+    print_record(record)
+    print(f"\n✅ Saved results to {save_record(record, args.results)}")
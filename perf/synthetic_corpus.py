@@ -0,0 +1,248 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+MANIFEST_NAME = "corpus.json"
+TEMPLATE_DIR = "_templates"
+# Distinct clip lengths; every clip is a link to one of these templates
+N_TEMPLATES = 32
+MIN_DURATION_SEC = 1.0
+MAX_DURATION_SEC = 30.0
+
+FLAC_SAMPLE_RATE = 16000
+MP3_SAMPLE_RATE = 32000
+CLIPS_PER_CHAPTER = 20
+CHAPTERS_PER_SPEAKER = 3
+CLIPS_PER_CLIENT = 25
+
+CV_AGES = ["teens", "twenties", "thirties", "fourties", "fifties", "sixties"]
+CV_GENDERS = ["male_masculine", "female_feminine", ""]
+CV_GENDER_WEIGHTS = [0.45, 0.25, 0.30]
+WORDS = (
+    "the of and to a in that he was it his for with as had you not be her "
+    "on at by which have or from this him but all she they were my are me "
+    "one their so an said them we who would been will no when there if more"
+).split()
+
+
+def template_durations(n=N_TEMPLATES):
+    """Template lengths, log-spaced so short, medium and long clips all exist,
+    snapped to whole 10 ms"""
+    durations = np.geomspace(MIN_DURATION_SEC, MAX_DURATION_SEC, n)
+    return np.round(durations, 2)
+
+
+def _template_audio(duration, sample_rate, rng):
+    """Tone bursts over noise with leading/trailing silence and a random
+    level, so normalization has real gain to apply"""
+    n = int(round(duration * sample_rate))
+    t = np.arange(n) / sample_rate
+    envelope = (np.sin(2 * np.pi * 3 * t) > 0).astype(np.float32)
+    pad = min(int(0.2 * sample_rate), n // 4)
+    envelope[:pad] = envelope[n - pad :] = 0
+    tone = np.sin(2 * np.pi * rng.uniform(120, 300) * t) * envelope
+    noise = rng.normal(0, 0.01, n)
+    return (10 ** (rng.uniform(-30, -6) / 20) * (tone + noise)).astype(np.float32)
+
+
+def write_templates(folder, ext, sample_rate, seed=0):
+    """Writes the template clips once, returns their paths and durations"""
+    import soundfile as sf
+
+    fmt = {"flac": "FLAC", "mp3": "MP3"}[ext]
+    if fmt not in sf.available_formats():
+        raise RuntimeError(f"libsndfile {sf.__libsndfile_version__} cannot write {fmt}")
+
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    durations = template_durations()
+    for i, duration in enumerate(durations):
+        path = os.path.join(folder, f"template_{i:02d}.{ext}")
+        audio = _template_audio(duration, sample_rate, rng)
+        if not os.path.exists(path):
+            sf.write(path, audio, sample_rate, format=fmt)
+        paths.append(path)
+    return paths, durations
+
+
+def _place(template, dest, link):
+    if link:
+        try:
+            os.link(template, dest)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(template, dest)
+
+
+def _sentences(rng, n, upper=False):
+    lengths = rng.integers(3, 20, n)
+    words = np.array([w.upper() for w in WORDS] if upper else WORDS)
+    picks = rng.integers(0, len(words), lengths.sum())
+    return [
+        " ".join(chunk) for chunk in np.split(words[picks], np.cumsum(lengths)[:-1])
+    ]
+
+
+def _manifest_matches(root, manifest):
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f) == manifest
+
+
+def _save_manifest(root, manifest):
+    with open(os.path.join(root, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def generate_librispeech(root, n_clips, seed=0, link=True):
+    """
+    Builds a LibriSpeech-style tree under `root`: test-clean/<speaker>/
+    <chapter>/<speaker>-<chapter>-<utt>.flac with one .trans.txt per chapter,
+    and SPEAKERS.TXT. Speakers have CHAPTERS_PER_SPEAKER chapters of
+    CLIPS_PER_CHAPTER clips (the last one may be shorter).
+
+    Clips are hard links to a few template FLACs (`link=False` copies them),
+    so 500k clips take seconds and little disk. An existing tree with the
+    same parameters is reused. Returns (audio root, SPEAKERS.TXT path).
+    """
+    manifest = {"kind": "librispeech", "n_clips": n_clips, "seed": seed}
+    audio_root = os.path.join(root, "test-clean")
+    speakers_file = os.path.join(root, "SPEAKERS.TXT")
+    if _manifest_matches(root, manifest):
+        return audio_root, speakers_file
+    shutil.rmtree(root, ignore_errors=True)
+
+    rng = np.random.default_rng(seed)
+    templates, _ = write_templates(
+        os.path.join(root, TEMPLATE_DIR), "flac", FLAC_SAMPLE_RATE, seed
+    )
+    clip_templates = rng.integers(0, len(templates), n_clips)
+    per_speaker = CLIPS_PER_CHAPTER * CHAPTERS_PER_SPEAKER
+    n_speakers = -(-n_clips // per_speaker)
+    speaker_ids = 1000 + np.arange(n_speakers)
+    sexes = rng.choice(["F", "M"], n_speakers)
+    sentences = _sentences(rng, n_clips, upper=True)
+
+    with open(speakers_file, "w", encoding="utf-8") as f:
+        f.write(";ID  |SEX| SUBSET           |MINUTES| NAME\n")
+        for speaker, sex in zip(speaker_ids, sexes):
+            f.write(
+                f"{speaker:<5}| {sex} | test-clean       | 25.00 | Speaker {speaker}\n"
+            )
+
+    for start in tqdm(
+        range(0, n_clips, CLIPS_PER_CHAPTER),
+        desc="Generating LibriSpeech",
+        unit=" chapters",
+    ):
+        chapter_index = start // CLIPS_PER_CHAPTER
+        speaker = speaker_ids[chapter_index // CHAPTERS_PER_SPEAKER]
+        chapter = 100 + chapter_index % CHAPTERS_PER_SPEAKER
+        folder = os.path.join(audio_root, str(speaker), str(chapter))
+        os.makedirs(folder, exist_ok=True)
+        lines = []
+        for utt, i in enumerate(range(start, min(start + CLIPS_PER_CHAPTER, n_clips))):
+            utterance = f"{speaker}-{chapter}-{utt:04d}"
+            _place(
+                templates[clip_templates[i]],
+                os.path.join(folder, utterance + ".flac"),
+                link,
+            )
+            lines.append(f"{utterance} {sentences[i]}\n")
+        with open(
+            os.path.join(folder, f"{speaker}-{chapter}.trans.txt"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.writelines(lines)
+
+    _save_manifest(root, manifest)
+    return audio_root, speakers_file
+
+
+def generate_commonvoice(root, n_clips, seed=0, link=True):
+    """
+    Builds a Common Voice-style folder under `root`: clips/common_voice_en_<n>.mp3
+    and validated.tsv with the release columns. Clients record
+    CLIPS_PER_CLIENT clips each and about a third leave gender empty, as in
+    the real releases. Clips link to template MP3s like in
+    generate_librispeech. Returns (clips folder, TSV path).
+    """
+    manifest = {"kind": "commonvoice", "n_clips": n_clips, "seed": seed}
+    clips_dir = os.path.join(root, "clips")
+    tsv_path = os.path.join(root, "validated.tsv")
+    if _manifest_matches(root, manifest):
+        return clips_dir, tsv_path
+    shutil.rmtree(root, ignore_errors=True)
+
+    rng = np.random.default_rng(seed)
+    templates, _ = write_templates(
+        os.path.join(root, TEMPLATE_DIR), "mp3", MP3_SAMPLE_RATE, seed
+    )
+    clip_templates = rng.integers(0, len(templates), n_clips)
+    n_clients = -(-n_clips // CLIPS_PER_CLIENT)
+    clients = np.array(
+        [hashlib.sha512(f"{seed}-{c}".encode()).hexdigest() for c in range(n_clients)]
+    )
+    client_age = rng.choice(CV_AGES, n_clients)
+    client_gender = rng.choice(CV_GENDERS, n_clients, p=CV_GENDER_WEIGHTS)
+    client_of_clip = np.arange(n_clips) // CLIPS_PER_CLIENT
+    filenames = [f"common_voice_en_{i}.mp3" for i in range(n_clips)]
+
+    os.makedirs(clips_dir, exist_ok=True)
+    for filename, template in tqdm(
+        zip(filenames, clip_templates),
+        total=n_clips,
+        desc="Generating Common Voice",
+        unit=" clips",
+    ):
+        _place(templates[template], os.path.join(clips_dir, filename), link)
+
+    pd.DataFrame(
+        {
+            "client_id": clients[client_of_clip],
+            "path": filenames,
+            "sentence": _sentences(rng, n_clips),
+            "up_votes": 2,
+            "down_votes": 0,
+            "age": client_age[client_of_clip],
+            "gender": client_gender[client_of_clip],
+            "accents": "",
+            "variant": "",
+            "locale": "en",
+            "segment": "",
+        }
+    ).to_csv(tsv_path, sep="\t", index=False)
+
+    _save_manifest(root, manifest)
+    return clips_dir, tsv_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic LibriSpeech or Common Voice corpus"
+    )
+    parser.add_argument("kind", choices=["librispeech", "commonvoice"])
+    parser.add_argument("--clips", type=int, default=1000, help="Number of clips")
+    parser.add_argument("--output", required=True, help="Corpus folder")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--copy", action="store_true", help="Copy template files instead of linking"
+    )
+    args = parser.parse_args()
+
+    generate = (
+        generate_librispeech if args.kind == "librispeech" else generate_commonvoice
+    )
+    paths = generate(args.output, args.clips, seed=args.seed, link=not args.copy)
+    print(f"✅ Generated {args.clips} clips: {', '.join(paths)}")
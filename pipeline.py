@@ -0,0 +1,633 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from graphlib import TopologicalSorter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Stage modules pull in pandas, librosa, pyarrow, ... so they are imported
+# inside the stage functions: --help and fully cached runs stay instant.
+
+STATE_FILE = "pipeline_state.json"
+REPORT_FILE = "pipeline_report.json"
+DATASETS = ["librispeech", "commonvoice"]
+# Larger files (release archives) are hashed by size and mtime only
+CONTENT_HASH_MAX_BYTES = 256 * 2**20
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2")
+
+
+def path_digest(path):
+    """
+    Content hash of a stage input. Files are hashed by content; directories
+    (audio corpora) and very large files by the relative path, size and
+    mtime of every file, so they do not have to be read. Returns None if the
+    path is missing.
+    """
+    h = hashlib.sha256()
+    if os.path.isfile(path) and os.path.getsize(path) > CONTENT_HASH_MAX_BYTES:
+        st = os.stat(path)
+        h.update(f"{st.st_size}\0{st.st_mtime_ns}".encode())
+    elif os.path.isfile(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                full = os.path.join(root, file)
+                st = os.stat(full)
+                rel = os.path.relpath(full, path).replace(os.sep, "/")
+                h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    else:
+        return None
+    return h.hexdigest()
+
+
+def stage_digest(stage):
+    """Hash of a stage's parameters and inputs, None if a required input is
+    missing. Optional inputs are hashed when present."""
+    h = hashlib.sha256(json.dumps(stage["params"], sort_keys=True).encode())
+    for path in stage["inputs"]:
+        digest = path_digest(path)
+        if digest is None:
+            return None
+        h.update(f"{path}\0{digest}\n".encode())
+    for path in stage.get("optional_inputs", []):
+        h.update(f"{path}\0{path_digest(path)}\n".encode())
+    return h.hexdigest()
+
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+RSS_INTERVAL_SEC = 0.1
+
+
+def _tree_rss_mb(pid):
+    """RSS of `pid` and all its descendants from /proc, in MB. Pages shared
+    with forked workers are counted once per process."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat[stat.rindex(")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    pages, todo = 0, [pid]
+    while todo:
+        current = todo.pop()
+        todo += children.get(current, [])
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                pages += int(f.read().split()[1])
+        except OSError:  # exited meanwhile
+            pass
+    return pages * PAGE_SIZE / 2**20
+
+
+class RssSampler(threading.Thread):
+    """
+    Polls the RSS of this process and its worker processes during a stage
+    and keeps the peak, so native buffers and process pools are covered.
+    Needs /proc; elsewhere `peak_mb` stays None.
+    """
+
+    def __init__(self, interval=RSS_INTERVAL_SEC):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_mb = None
+        self.stop_event = threading.Event()
+
+    def run(self):
+        if not os.path.isdir("/proc/self"):
+            return
+        pid = os.getpid()
+        stopped = False
+        while not stopped:
+            rss = _tree_rss_mb(pid)
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+            stopped = self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        return self.peak_mb
+
+
+def _max_rss_mb(who):
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# --- Stages -----------------------------------------------------------------
+
+
+def scan_librispeech_stage(root_dir, speakers_file, output_path, workers):
+    from common.metadata_store import save_metadata
+    from librispeech.scan_metadata import scan_librispeech
+
+    df = scan_librispeech(root_dir, speakers_file, workers=workers)
+    save_metadata(df, output_path)
+
+
+def scan_commonvoice_stage(source, metadata_path, output_path, workers):
+    from common.metadata_store import save_metadata
+
+    if source.endswith(ARCHIVE_SUFFIXES):
+        from commonvoice.scan_archive import scan_archive
+
+        df = scan_archive(source, metadata_path)
+    else:
+        from commonvoice.select_CV_subset import scan_commonvoice
+
+        df = scan_commonvoice(source, metadata_path, workers=workers)
+    save_metadata(df, output_path)
+
+
+def select_librispeech_stage(metadata_path, output_csv, target_minutes):
+    from common.metadata_store import load_metadata
+    from librispeech.scan_metadata import select_balanced_subset
+
+    df = load_metadata(metadata_path)
+    subset = select_balanced_subset(df, target_minutes=target_minutes)
+    subset.drop(columns=["duration_min"]).to_csv(output_csv, index=False)
+
+
+def select_commonvoice_stage(metadata_path, output_csv, target_minutes):
+    from common.metadata_store import load_metadata
+    from commonvoice.select_CV_subset import select_balanced_subset
+
+    df = load_metadata(metadata_path)
+    subset = select_balanced_subset(df, target_minutes=target_minutes)
+    subset.drop(columns=["duration_min"]).to_csv(output_csv, index=False)
+
+
+def copy_librispeech_stage(input_dir, subset_csv, output_dir, mode):
+    from librispeech.copy_selected_files import process_subset
+
+    process_subset(input_dir, subset_csv, output_dir, flat_structure=True, mode=mode)
+
+
+def copy_commonvoice_stage(source, subset_csv, output_dir, mode):
+    if source.endswith(ARCHIVE_SUFFIXES):
+        import pandas as pd
+
+        from commonvoice.scan_archive import extract_selected
+
+        extract_selected(source, pd.read_csv(subset_csv), output_dir)
+    else:
+        from commonvoice.copy_selected_files import process_commonvoice_subset
+
+        process_commonvoice_subset(source, subset_csv, output_dir, mode=mode)
+
+
+def normalize_stage(jobs, target_dBFS, workers):
+    from normalize_volume.volume import normalize_audio_volume_numpy
+
+    for input_dir, output_dir, file_ext in jobs:
+        normalize_audio_volume_numpy(
+            input_dir, output_dir, target_dBFS, file_ext=file_ext, workers=workers
+        )
+
+
+def bundle_stage(jobs, workers):
+    from analysis.score_transcriptions import load_transcriptions
+    from common.audio_bundle import write_bundle
+
+    for audio_dir, subset_csv, transcripts, bundle_path in jobs:
+        texts = load_transcriptions(transcripts) if os.path.exists(transcripts) else {}
+        write_bundle(audio_dir, subset_csv, bundle_path, texts, workers=workers)
+
+
+def features_stage(jobs, n_mels, workers):
+    from common.audio_features import write_features
+
+    for audio_dir, subset_csv, store_path in jobs:
+        write_features(audio_dir, subset_csv, store_path, n_mels, workers=workers)
+
+
+def score_stage(hyp_dir, references, output_dir, workers):
+    from analysis.score_transcriptions import score_transcriptions
+
+    per_utt, summary = score_transcriptions(hyp_dir, references, workers=workers)
+    os.makedirs(output_dir, exist_ok=True)
+    per_utt.to_csv(os.path.join(output_dir, "wer_per_utterance.csv"), index=False)
+    summary.to_csv(os.path.join(output_dir, "wer_summary.csv"), index=False)
+
+
+def report_stage(
+    results_dir, store_dir, metadata, wer_summary_csv, feature_stores, output_csv
+):
+    import pandas as pd
+
+    from analysis.ingest_results import ingest_results
+    from analysis.rtf_summary import (
+        GROUP_KEYS,
+        add_speech_metrics,
+        load_durations,
+        run_metrics,
+        summarize_runs,
+    )
+    from common.audio_features import load_speech_durations
+
+    ingest_results(results_dir, store_dir)
+    runs = run_metrics(store_dir, load_durations(metadata))
+    feature_stores = [p for p in feature_stores if os.path.exists(p)]
+    if feature_stores:
+        runs = add_speech_metrics(runs, load_speech_durations(feature_stores))
+    summary = summarize_runs(runs)
+    summary[GROUP_KEYS] = summary[GROUP_KEYS].astype(str)
+    wer = pd.DataFrame()
+    if os.path.exists(wer_summary_csv):
+        try:
+            wer = pd.read_csv(wer_summary_csv, usecols=GROUP_KEYS + ["wer", "cer"])
+        except pd.errors.EmptyDataError:  # written before empty scores had a header
+            pass
+    if not wer.empty:
+        wer[GROUP_KEYS] = wer[GROUP_KEYS].astype(str)
+        summary = summary.merge(wer, on=GROUP_KEYS, how="left")
+    else:
+        print("⚠️ No scored transcriptions, the report has no WER/CER")
+    summary.to_csv(output_csv, index=False)
+
+
+def build_stages(args):
+    """
+    The pipeline as a dependency graph. Each stage lists the paths it reads
+    (hashed to decide whether it has to run), the paths it writes and the
+    parameters that change its result.
+    """
+    out = lambda name: os.path.join(args.workdir, name)
+    ls_dataset = "librispeech_" + os.path.basename(os.path.normpath(args.librispeech))
+    ls_dataset = ls_dataset.replace("test-", "")
+
+    stages = []
+    normalize_jobs, bundle_jobs, feature_jobs, references = [], [], [], {}
+    # Scanned metadata and subsets, for clip durations in the report
+    duration_files = []
+    if "librispeech" in args.datasets:
+        ls_meta = out("librispeech_metadata.parquet")
+        ls_subset = out("librispeech_subset.csv")
+        ls_audio = out("librispeech_audio")
+        stages += [
+            dict(
+                name="scan_librispeech",
+                deps=[],
+                inputs=[args.librispeech, args.speakers],
+                outputs=[ls_meta],
+                params={},
+                run=lambda: scan_librispeech_stage(
+                    args.librispeech, args.speakers, ls_meta, args.workers
+                ),
+            ),
+            dict(
+                name="select_librispeech",
+                deps=["scan_librispeech"],
+                inputs=[ls_meta],
+                outputs=[ls_subset],
+                params={"target_minutes": args.target_minutes},
+                run=lambda: select_librispeech_stage(
+                    ls_meta, ls_subset, args.target_minutes
+                ),
+            ),
+            dict(
+                name="copy_librispeech",
+                deps=["select_librispeech"],
+                inputs=[ls_subset],
+                outputs=[ls_audio],
+                params={"source": args.librispeech},
+                run=lambda: copy_librispeech_stage(
+                    args.librispeech, ls_subset, ls_audio, args.copy_mode
+                ),
+            ),
+        ]
+        normalize_jobs.append((ls_audio, out("normalized/librispeech"), "flac"))
+        references[ls_dataset] = os.path.join(ls_audio, "combined_transcriptions.txt")
+        bundle_jobs.append(
+            (ls_audio, ls_subset, references[ls_dataset], out("librispeech.pcm"))
+        )
+        duration_files += [ls_subset, ls_meta]
+        feature_jobs.append((ls_audio, ls_subset, out("librispeech.features")))
+
+    if "commonvoice" in args.datasets:
+        cv_meta = out("commonvoice_metadata.parquet")
+        cv_subset = out("commonvoice_subset.csv")
+        cv_audio = out("commonvoice_audio")
+        # Release archives ship validated.tsv, which is read from the stream
+        cv_tsv = args.commonvoice_tsv
+        if cv_tsv is None and not args.commonvoice.endswith(ARCHIVE_SUFFIXES):
+            cv_tsv = "transcript_en_test.tsv"
+        stages += [
+            dict(
+                name="scan_commonvoice",
+                deps=[],
+                inputs=[args.commonvoice] + ([cv_tsv] if cv_tsv else []),
+                outputs=[cv_meta],
+                params={},
+                run=lambda: scan_commonvoice_stage(
+                    args.commonvoice, cv_tsv, cv_meta, args.workers
+                ),
+            ),
+            dict(
+                name="select_commonvoice",
+                deps=["scan_commonvoice"],
+                inputs=[cv_meta],
+                outputs=[cv_subset],
+                params={"target_minutes": args.target_minutes},
+                run=lambda: select_commonvoice_stage(
+                    cv_meta, cv_subset, args.target_minutes
+                ),
+            ),
+            dict(
+                name="copy_commonvoice",
+                deps=["select_commonvoice"],
+                inputs=[cv_subset],
+                outputs=[cv_audio],
+                params={"source": args.commonvoice},
+                run=lambda: copy_commonvoice_stage(
+                    args.commonvoice, cv_subset, cv_audio, args.copy_mode
+                ),
+            ),
+        ]
+        normalize_jobs.append((cv_audio, out("normalized/commonvoice"), "mp3"))
+        references["commonvoice"] = os.path.join(
+            cv_audio, "combined_transcriptions.tsv"
+        )
+        bundle_jobs.append(
+            (cv_audio, cv_subset, references["commonvoice"], out("commonvoice.pcm"))
+        )
+        duration_files += [cv_subset, cv_meta]
+        feature_jobs.append((cv_audio, cv_subset, out("commonvoice.features")))
+
+    copy_stages = [s["name"] for s in stages if s["name"].startswith("copy_")]
+    select_stages = [s["name"] for s in stages if s["name"].startswith("select_")]
+    wer_dir = out("wer_results")
+    stages += [
+        dict(
+            name="normalize",
+            deps=copy_stages,
+            inputs=[audio for audio, _, _ in normalize_jobs],
+            outputs=[output for _, output, _ in normalize_jobs],
+            params={"target_dBFS": args.target_dbfs},
+            run=lambda: normalize_stage(normalize_jobs, args.target_dbfs, args.workers),
+        ),
+        dict(
+            name="bundle",
+            deps=copy_stages,
+            inputs=[path for job in bundle_jobs for path in job[:2]],
+            outputs=[job[3] for job in bundle_jobs],
+            params={},
+            run=lambda: bundle_stage(bundle_jobs, args.workers),
+        ),
+        dict(
+            name="features",
+            deps=copy_stages,
+            inputs=[path for job in feature_jobs for path in job[:2]],
+            outputs=[job[2] for job in feature_jobs],
+            params={"n_mels": args.mels},
+            run=lambda: features_stage(feature_jobs, args.mels, args.workers),
+        ),
+        dict(
+            name="score",
+            deps=copy_stages,
+            inputs=[args.transcriptions] + list(references.values()),
+            outputs=[wer_dir],
+            params={"datasets": sorted(references)},
+            run=lambda: score_stage(
+                args.transcriptions, references, wer_dir, args.workers
+            ),
+        ),
+        dict(
+            name="report",
+            deps=["score", "features"] + select_stages,
+            inputs=[args.results] + duration_files,
+            optional_inputs=[os.path.join(wer_dir, "wer_summary.csv")]
+            + [job[2] + ".index.csv" for job in feature_jobs],
+            outputs=[out("report.csv")],
+            params={},
+            run=lambda: report_stage(
+                args.results,
+                out("benchmark_store"),
+                duration_files,
+                os.path.join(wer_dir, "wer_summary.csv"),
+                [job[2] for job in feature_jobs],
+                out("report.csv"),
+            ),
+        ),
+    ]
+    return stages
+
+
+def run_pipeline(stages, state_path, only=None, force=False, trace_memory=False):
+    """
+    Runs stages in dependency order and returns one report entry per stage.
+
+    A stage is skipped when the hash of its inputs and parameters matches
+    the one stored after its last successful run and its outputs exist.
+    Stages with a missing input or downstream of a failed stage are blocked;
+    WER is optional for the report, so it still runs without it. With `only`,
+    stages outside the selection are not run and their outputs are taken
+    as they are on disk.
+
+    Each stage that runs reports its time and the peak RSS of this process
+    plus its workers, sampled every RSS_INTERVAL_SEC. `trace_memory` also
+    records the peak of Python allocations in this process, which slows
+    the stages.
+    """
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    by_name = {stage["name"]: stage for stage in stages}
+    order = TopologicalSorter({s["name"]: s["deps"] for s in stages}).static_order()
+    status, report = {}, []
+
+    for name in order:
+        stage = by_name[name]
+        entry = {"stage": name, "seconds": 0.0, "peak_rss_mb": None, "py_peak_mb": None}
+        report.append(entry)
+
+        if only and name not in only:
+            status[name] = entry["status"] = "not selected"
+            continue
+        failed = [d for d in stage["deps"] if status.get(d) == "failed"]
+        if failed:
+            status[name] = entry["status"] = "blocked"
+            print(f"⚠️ {name}: blocked by failed {', '.join(failed)}")
+            continue
+
+        digest = stage_digest(stage)
+        if digest is None:
+            missing = [p for p in stage["inputs"] if not os.path.exists(p)]
+            status[name] = entry["status"] = "blocked"
+            print(f"⚠️ {name}: missing input {', '.join(missing)}")
+            continue
+        outputs_exist = all(os.path.exists(p) for p in stage["outputs"])
+        if not force and state.get(name) == digest and outputs_exist:
+            status[name] = entry["status"] = "cached"
+            print(f"⏭️  {name}: inputs unchanged, skipping")
+            continue
+
+        print(f"\n▶️  {name}")
+        if trace_memory:
+            tracemalloc.start()
+        sampler = RssSampler()
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            stage["run"]()
+            status[name] = entry["status"] = "ran"
+            state[name] = digest
+        except Exception as e:
+            status[name] = entry["status"] = "failed"
+            entry["error"] = f"{type(e).__name__}: {e}"
+            print(f"❌ {name} failed: {entry['error']}")
+        entry["seconds"] = time.perf_counter() - start
+        entry["peak_rss_mb"] = sampler.stop()
+        if trace_memory:
+            entry["py_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+
+        with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(state_path + ".tmp", state_path)
+
+    return report
+
+
+def max_rss():
+    """
+    Peak RSS in MB of this process and of its largest worker over the whole
+    run, as kept by the kernel (also where /proc is missing for RssSampler)
+    """
+    if resource is None:
+        return None
+    return {
+        "main_mb": _max_rss_mb(resource.RUSAGE_SELF),
+        "largest_worker_mb": _max_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def print_report(report, rss=None):
+    print("\n=== Pipeline report ===")
+    print(
+        f"{'stage':<20} {'status':<13} {'time [s]':>9} "
+        f"{'rss peak [MB]':>14} {'py peak [MB]':>13}"
+    )
+    for entry in report:
+        rss_peak, py_peak = (
+            "" if value is None else f"{value:.1f}"
+            for value in (entry["peak_rss_mb"], entry["py_peak_mb"])
+        )
+        print(
+            f"{entry['stage']:<20} {entry['status']:<13} "
+            f"{entry['seconds']:>9.2f} {rss_peak:>14} {py_peak:>13}"
+        )
+    if rss:
+        print(
+            f"Peak RSS of the run: {rss['main_mb']:.0f} MB main process, "
+            f"{rss['largest_worker_mb']:.0f} MB largest worker"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run scan -> select -> copy -> normalize/bundle/features -> "
+        "score -> report, skipping stages whose inputs did not change"
+    )
+    parser.add_argument(
+        "--workdir", default="pipeline_output", help="Folder for all stage outputs"
+    )
+    parser.add_argument(
+        "--datasets", nargs="+", choices=DATASETS, default=DATASETS, help="Corpora"
+    )
+    parser.add_argument(
+        "--librispeech", default="test-clean", help="LibriSpeech folder"
+    )
+    parser.add_argument("--speakers", default="SPEAKERS.TXT", help="SPEAKERS.TXT path")
+    parser.add_argument(
+        "--commonvoice",
+        default="en_test_0",
+        help="Common Voice clips folder or .tar/.tar.gz release",
+    )
+    parser.add_argument(
+        "--commonvoice-tsv",
+        default=None,
+        help="Common Voice TSV (default: transcript_en_test.tsv, or validated.tsv "
+        "inside an archive)",
+    )
+    parser.add_argument(
+        "--transcriptions", default="transcription_results", help="Hypotheses folder"
+    )
+    parser.add_argument("--results", default="benchmark_results", help="Results folder")
+    parser.add_argument("--target-minutes", type=float, default=30, help="Subset size")
+    parser.add_argument("--target-dbfs", type=float, default=-20.0, help="Target level")
+    parser.add_argument(
+        "--mels", type=int, default=0, help="Log-mel bins in the feature store"
+    )
+    parser.add_argument(
+        "--copy-mode",
+        choices=["copy", "hardlink", "reflink"],
+        default="copy",
+        help="How files are transferred",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--stages", nargs="+", help="Run only these stages")
+    parser.add_argument("--force", action="store_true", help="Ignore cached hashes")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the Python allocation peak per stage (slower)",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    stages = build_stages(args)
+    unknown = set(args.stages or []) - {s["name"] for s in stages}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    report = run_pipeline(
+        stages,
+        os.path.join(args.workdir, STATE_FILE),
+        only=set(args.stages or []),
+        force=args.force,
+        trace_memory=args.trace_memory,
+    )
+    rss = max_rss()
+    print_report(report, rss)
+
+    report_path = os.path.join(args.workdir, REPORT_FILE)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "total_seconds": time.perf_counter() - start,
+                "max_rss": rss,
+                "stages": report,
+            },
+            f,
+            indent=1,
+        )
+    print(f"\n✅ Saved report to {report_path}")
+    if any(entry["status"] == "failed" for entry in report):
+        sys.exit(1)
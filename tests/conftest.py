@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Scripts import each other from the repo root, as when they are run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,83 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from common.audio_probe import ProbeError, probe_duration, probe_flac, probe_mp3
+
+# MPEG-1 Layer III, no CRC, 128 kbps, 44.1 kHz, stereo
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+SAMPLES_PER_FRAME = 1152
+SAMPLE_RATE = 44100
+SIDE_INFO = 32
+
+
+def id3v2_tag(size):
+    synchsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x04\x00\x00" + synchsafe + b"\x00" * size
+
+
+def frame(payload=b""):
+    body = FRAME_HEADER + b"\x00" * SIDE_INFO + payload
+    return body + b"\x00" * (FRAME_LENGTH - len(body))
+
+
+def mp3(first_payload, frames, tag=b""):
+    return tag + frame(first_payload) + frame() * frames
+
+
+def xing(frames, lame=None):
+    payload = b"Xing" + struct.pack(">II", 0x1, frames)
+    if lame is not None:
+        delay, padding = lame
+        payload += b"LAME" + b"\x00" * 17
+        payload += bytes([delay >> 4, ((delay & 0x0F) << 4) | (padding >> 8)])
+        payload += bytes([padding & 0xFF])
+    return payload
+
+
+def vbri(frames):
+    return b"VBRI" + struct.pack(">HHHII", 1, 0, 75, 0, frames)
+
+
+def test_xing_frame_count():
+    data = mp3(xing(500), 20)
+    assert probe_mp3(io.BytesIO(data)) == pytest.approx(500 * 1152 / SAMPLE_RATE)
+
+
+def test_xing_lame_delay_and_padding():
+    data = mp3(xing(500, lame=(576, 1000)), 20)
+    expected = (500 * SAMPLES_PER_FRAME - 576 - 1000) / SAMPLE_RATE
+    assert probe_mp3(io.BytesIO(data)) == pytest.approx(expected)
+
+
+def test_vbri_frame_count_after_id3v2_tag():
+    data = mp3(vbri(300), 20, tag=id3v2_tag(1000))
+    assert probe_mp3(io.BytesIO(data)) == pytest.approx(300 * 1152 / SAMPLE_RATE)
+
+
+def test_cbr_duration_from_size_without_id3v1():
+    frames = 40
+    data = mp3(b"", frames - 1, tag=id3v2_tag(200)) + b"TAG" + b"\x00" * 125
+    expected = frames * FRAME_LENGTH * 8 / 128000
+    assert probe_mp3(io.BytesIO(data)) == pytest.approx(expected)
+
+
+def test_mp3_without_frames():
+    with pytest.raises(ProbeError):
+        probe_mp3(io.BytesIO(b"\x00" * 4096))
+
+
+@pytest.mark.parametrize("sample_rate, samples", [(16000, 24000), (44100, 12345)])
+def test_flac_streaminfo(tmp_path, sample_rate, samples):
+    path = str(tmp_path / "clip.flac")
+    sf.write(path, np.zeros(samples, dtype=np.int16), sample_rate, format="FLAC")
+    assert probe_duration(path) == pytest.approx(samples / sample_rate)
+
+
+def test_flac_missing_marker():
+    with pytest.raises(ProbeError):
+        probe_flac(io.BytesIO(b"RIFF" + b"\x00" * 60))
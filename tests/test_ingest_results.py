@@ -0,0 +1,111 @@
+import glob
+import io
+import json
+import os
+
+import pytest
+
+from analysis.ingest_results import _JsonReader, stream_result_file
+
+RESULTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark_results"
+)
+
+DOCUMENT = {
+    "name": "Results",
+    "status": "SUCCESS",
+    "iterations": [
+        {
+            "time": 1234.5,
+            "startTime": 0,
+            "status": "SUCCESS",
+            "transcript": 'he said "hi"\\n\u017c\u00f3\u0142w',
+            "measures": [
+                {
+                    "cpu": {
+                        "perName": {"UI Thread": 12.5, "Thread-3 (2)": 0, "x": -1e-3},
+                        "perCore": {"0": 100, "7": 0.0},
+                    },
+                    "fps": 60,
+                    "ram": 123.456789,
+                    "time": 500,
+                },
+                {"cpu": {}, "fps": 0, "ram": 1e2, "time": 1000},
+            ],
+        },
+        {"time": 99, "status": "FAILURE", "measures": []},
+    ],
+}
+
+
+def expected_columns(doc):
+    """What stream_result_file should return, built from json.load"""
+    columns = {
+        "iterations": {"iteration": [], "time": [], "start_time": [], "status": []},
+        "samples": {
+            "iteration": [],
+            "sample": [],
+            "time_ms": [],
+            "fps": [],
+            "ram_mb": [],
+        },
+        "threads": {"iteration": [], "sample": [], "thread": [], "cpu": []},
+        "cores": {"iteration": [], "sample": [], "core": [], "cpu": []},
+    }
+    for i, iteration in enumerate(doc["iterations"]):
+        for j, measure in enumerate(iteration.get("measures", [])):
+            samples = columns["samples"]
+            for name, value in [
+                ("iteration", i),
+                ("sample", j),
+                ("time_ms", measure.get("time")),
+                ("fps", measure.get("fps")),
+                ("ram_mb", measure.get("ram")),
+            ]:
+                samples[name].append(value)
+            cpu = measure.get("cpu", {})
+            for table, key, values in [
+                ("threads", "thread", cpu.get("perName", {})),
+                ("cores", "core", cpu.get("perCore", {})),
+            ]:
+                for name, value in values.items():
+                    if value:
+                        columns[table]["iteration"].append(i)
+                        columns[table]["sample"].append(j)
+                        columns[table][key].append(int(name) if key == "core" else name)
+                        columns[table]["cpu"].append(value)
+        its = columns["iterations"]
+        its["iteration"].append(i)
+        its["time"].append(iteration.get("time"))
+        its["start_time"].append(iteration.get("startTime"))
+        its["status"].append(iteration.get("status"))
+    return columns
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_decode_matches_json_load(chunk_size, indent):
+    text = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False)
+    assert _JsonReader(io.StringIO(text), chunk_size).decode() == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["12.5", "[1, 23.25e-1]", '{"a": 100}'])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_numbers_cut_at_chunk_edge(text, chunk_size):
+    assert _JsonReader(io.StringIO(text), chunk_size).decode() == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_stream_result_file_matches_json_load(tmp_path, chunk_size):
+    path = tmp_path / "results_s23_100-1-0000_vosk.json"
+    path.write_text(json.dumps(DOCUMENT, ensure_ascii=False), encoding="utf-8")
+    assert stream_result_file(str(path), chunk_size) == expected_columns(DOCUMENT)
+
+
+def test_stream_benchmark_result_file():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*", "*", "results_*.json")))
+    if not paths:
+        pytest.skip("no benchmark_results in the tree")
+    with open(paths[0], "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    assert stream_result_file(paths[0], chunk_size=4096) == expected_columns(doc)
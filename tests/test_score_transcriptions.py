@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from analysis.score_transcriptions import edit_ops, normalize_text
+
+
+def levenshtein(ref, hyp):
+    """Textbook O(n*m) edit distance"""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        row = [i]
+        for j, h in enumerate(hyp, 1):
+            row.append(min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = row
+    return prev[-1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_edit_ops_matches_reference_levenshtein(seed):
+    rng = np.random.default_rng(seed)
+    ref = rng.integers(0, 4, rng.integers(0, 30)).tolist()
+    hyp = rng.integers(0, 4, rng.integers(0, 30)).tolist()
+
+    sub, ins, dele = edit_ops(ref, hyp)
+    assert sub + ins + dele == levenshtein(ref, hyp)
+    # The alignment has to account for both lengths
+    assert len(ref) - dele + ins == len(hyp)
+
+
+@pytest.mark.parametrize(
+    "ref, hyp, expected",
+    [
+        ([], [], (0, 0, 0)),
+        ([], [1, 2], (0, 2, 0)),
+        ([1, 2, 3], [], (0, 0, 3)),
+        ([1, 2, 3], [1, 2, 3], (0, 0, 0)),
+        ([1, 2, 3], [1, 4, 3], (1, 0, 0)),
+        ([1, 2, 3], [1, 3], (0, 0, 1)),
+        ([1, 3], [1, 2, 3], (0, 1, 0)),
+    ],
+)
+def test_edit_ops_counts(ref, hyp, expected):
+    assert edit_ops(ref, hyp) == expected
+
+
+def test_normalize_text():
+    assert normalize_text("Hello,  World! It’s 'quoted'") == "hello world it's quoted"
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.subset_selection import add_duration_columns, select_duration_budget
+
+GROUP_WEIGHTS = {
+    ("F", "short"): 0.15,
+    ("F", "medium"): 0.35,
+    ("F", "long"): 0.15,
+    ("M", "short"): 0.15,
+    ("M", "medium"): 0.35,
+    ("M", "long"): 0.15,
+}
+
+
+def corpus(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "filename": [f"clip_{i}.mp3" for i in range(n)],
+            "sex": rng.choice(["F", "M"], n),
+            "duration_sec": rng.gamma(2.0, 3.0, n) + 1.0,
+        }
+    )
+    return add_duration_columns(df)
+
+
+def select(df, target_minutes, tolerance_sec=5.0, weights=GROUP_WEIGHTS):
+    return select_duration_budget(
+        df,
+        weights,
+        group_cols=["sex", "duration_cat"],
+        target_minutes=target_minutes,
+        tolerance_sec=tolerance_sec,
+    )
+
+
+@pytest.mark.parametrize("target_minutes", [1, 5, 30, 60])
+def test_total_within_tolerance(target_minutes):
+    subset = select(corpus(), target_minutes)
+    assert abs(subset["duration_sec"].sum() - 60 * target_minutes) <= 5.0
+    assert subset["filename"].is_unique
+
+
+def test_budget_split_by_weight():
+    subset = select(corpus(), 60)
+    shares = subset.groupby(["sex", "duration_cat"], observed=True)[
+        "duration_sec"
+    ].sum() / (60 * 60)
+    # Weights are shares relative to their sum
+    total_weight = sum(GROUP_WEIGHTS.values())
+    for group, weight in GROUP_WEIGHTS.items():
+        assert shares[group] == pytest.approx(weight / total_weight, abs=0.02)
+
+
+def test_clips_longer_than_their_budget_are_skipped():
+    # The long groups get 60 * 0.15 / 1.3 = 6.9 s of a 1 minute target
+    budget = 60 * 0.15 / sum(GROUP_WEIGHTS.values())
+    subset = select(corpus(), 1)
+    long_clips = subset[subset["duration_cat"] == "long"]
+    assert (long_clips["duration_sec"] <= budget + 5.0).all()
+    assert abs(subset["duration_sec"].sum() - 60) <= 5.0
+
+
+def test_deterministic():
+    df = corpus()
+    assert select(df, 5)["filename"].tolist() == select(df, 5)["filename"].tolist()
+
+
+def test_missed_tolerance_is_reported(capsys):
+    df = corpus(n=10)
+    subset = select(df, 60)
+    assert len(subset) == len(df)
+    assert "away from the" in capsys.readouterr().out
+
+
+def test_groups_without_weight_are_left_out():
+    subset = select(corpus(), 5, weights={("F", "medium"): 1.0})
+    assert set(subset["sex"]) == {"F"}
+    assert set(subset["duration_cat"]) == {"medium"}
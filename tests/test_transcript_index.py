@@ -0,0 +1,65 @@
+import json
+import os
+
+import librispeech.transcript_index as transcript_index
+from librispeech.transcript_index import load_transcript_index
+
+
+def write_chapter(root, speaker, chapter, lines):
+    folder = os.path.join(root, str(speaker), str(chapter))
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{speaker}-{chapter}.trans.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "\n".join(f"{speaker}-{chapter}-{i:04d} {t}" for i, t in enumerate(lines))
+        )
+    return path
+
+
+def count_parses(monkeypatch):
+    parsed = []
+    parse = transcript_index.parse_trans_file
+
+    def counting_parse(path):
+        parsed.append(os.path.basename(path))
+        return parse(path)
+
+    monkeypatch.setattr(transcript_index, "parse_trans_file", counting_parse)
+    return parsed
+
+
+def test_index_is_reused_and_updated(tmp_path, monkeypatch):
+    root = str(tmp_path / "test-clean")
+    index_path = str(tmp_path / "transcript_index.json")
+    write_chapter(root, 100, 1, ["ONE", "TWO"])
+    changed = write_chapter(root, 200, 2, ["THREE"])
+
+    first = load_transcript_index(root, index_path)
+    assert first == {"100-1-0000": "ONE", "100-1-0001": "TWO", "200-2-0000": "THREE"}
+    with open(index_path, encoding="utf-8") as f:
+        assert json.load(f)["root"] == os.path.abspath(root)
+
+    parsed = count_parses(monkeypatch)
+    mtime = os.stat(index_path).st_mtime_ns
+    assert load_transcript_index(root, index_path) == first
+    assert parsed == []
+    assert os.stat(index_path).st_mtime_ns == mtime
+
+    with open(changed, "a", encoding="utf-8") as f:
+        f.write("\n200-2-0001 FOUR")
+    index = load_transcript_index(root, index_path)
+    assert parsed == ["200-2.trans.txt"]
+    assert index["200-2-0001"] == "FOUR"
+
+
+def test_index_of_another_folder_is_ignored(tmp_path, monkeypatch):
+    index_path = str(tmp_path / "transcript_index.json")
+    write_chapter(str(tmp_path / "a"), 100, 1, ["ONE"])
+    write_chapter(str(tmp_path / "b"), 100, 1, ["OTHER"])
+    load_transcript_index(str(tmp_path / "a"), index_path)
+
+    parsed = count_parses(monkeypatch)
+    assert load_transcript_index(str(tmp_path / "b"), index_path) == {
+        "100-1-0000": "OTHER"
+    }
+    assert parsed == ["100-1.trans.txt"]